@@ -125,6 +125,11 @@ func runServer(args []string) {
 	}
 	store := storage.NewStore(db, abs)
 	store.SetMaxBackups(cfg.Backup.MaxBackups)
+	if rdb, err := storage.OpenReader(abs); err != nil {
+		log.Printf("read-only pool unavailable, sharing the main pool: %v", err)
+	} else {
+		store.SetReader(rdb)
+	}
 
 	// Keep the JWT secret next to the database. systemd services run with CWD="/"
 	// which the pymon user cannot write to, so a relative ".pymon_jwt_secret"
@@ -167,14 +172,22 @@ func runServer(args []string) {
 	} else {
 		addr = fmt.Sprintf("%s:%d", bindHost, cfg.Server.Port)
 	}
+	// IdleTimeout defaults to ReadTimeout, which closed keep-alive
+	// connections between the dashboard's 60s polls, so every poll paid a
+	// fresh TCP (and TLS, behind a proxy) handshake. Keep them open across
+	// a poll interval.
 	srv := &http.Server{
-		Addr:         addr,
-		Handler:      app.Handler(),
-		ReadTimeout:  30 * time.Second,
-		WriteTimeout: 60 * time.Second,
+		Addr:              addr,
+		Handler:           app.Handler(),
+		ReadHeaderTimeout: 10 * time.Second,
+		ReadTimeout:       30 * time.Second,
+		WriteTimeout:      60 * time.Second,
+		IdleTimeout:       2 * time.Minute,
 	}
 
+	stopped := make(chan struct{})
 	go func() {
+		defer close(stopped)
 		sig := make(chan os.Signal, 1)
 		signal.Notify(sig, os.Interrupt, syscall.SIGTERM)
 		<-sig
@@ -189,6 +202,12 @@ func runServer(args []string) {
 	if err := srv.ListenAndServe(); err != nil && err != http.ErrServerClosed {
 		log.Fatalf("server: %v", err)
 	}
+	// ListenAndServe returns as soon as Shutdown starts; let in-flight
+	// requests finish before closing the pools under them.
+	<-stopped
+	if err := store.Close(); err != nil {
+		log.Printf("close db: %v", err)
+	}
 }
 
 func runResetAdmin(args []string) {
@@ -205,6 +224,7 @@ func runResetAdmin(args []string) {
 		log.Fatalf("open db: %v", err)
 	}
 	store := storage.NewStore(db, abs)
+	defer store.Close()
 	resetAdmin(store, cfg)
 }
 
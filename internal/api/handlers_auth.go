@@ -97,7 +97,7 @@ func (a *App) handleChangePassword(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "password_changed", "Password changed for "+u.Username)
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 func (a *App) handleCreateAPIKey(w http.ResponseWriter, r *http.Request) {
@@ -132,15 +132,21 @@ func (a *App) handleListAPIKeys(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	out := make([]map[string]any, 0, len(keys))
+	out := make([]apiKeyView, 0, len(keys))
 	for _, k := range keys {
-		out = append(out, map[string]any{
-			"id": k.ID, "name": k.Name, "created_at": k.CreatedAt, "last_used": k.LastUsed,
-		})
+		out = append(out, apiKeyView{ID: k.ID, Name: k.Name, CreatedAt: k.CreatedAt, LastUsed: k.LastUsed})
 	}
 	writeJSON(w, http.StatusOK, map[string]any{"api_keys": out})
 }
 
+// apiKeyView is an API key as listed to its owner.
+type apiKeyView struct {
+	ID        int64  `json:"id"`
+	Name      string `json:"name"`
+	CreatedAt string `json:"created_at"`
+	LastUsed  string `json:"last_used"`
+}
+
 func (a *App) handleDeleteAPIKey(w http.ResponseWriter, r *http.Request) {
 	id, err := pathInt(r, "key_id")
 	if err != nil {
@@ -156,7 +162,7 @@ func (a *App) handleDeleteAPIKey(w http.ResponseWriter, r *http.Request) {
 				return
 			}
 			a.audit(r, "api_key_deleted", "API key deleted")
-			writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+			writeOK(w)
 			return
 		}
 	}
@@ -269,7 +275,7 @@ func (a *App) handleUpdateUser(w http.ResponseWriter, r *http.Request) {
 		fields["must_change_password"] = n
 	}
 	if len(fields) == 0 {
-		writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+		writeOK(w)
 		return
 	}
 	if err := a.Store.UpdateUser(id, fields); err != nil {
@@ -277,7 +283,7 @@ func (a *App) handleUpdateUser(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "user_updated", "User "+u.Username+" updated")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 func (a *App) handleDeleteUser(w http.ResponseWriter, r *http.Request) {
@@ -303,5 +309,5 @@ func (a *App) handleDeleteUser(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "user_deleted", "User "+u.Username+" deleted")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
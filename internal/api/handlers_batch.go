@@ -0,0 +1,106 @@
+package api
+
+import (
+	"bytes"
+	"encoding/json"
+	"net/http"
+	"net/url"
+	"strings"
+	"sync"
+)
+
+// maxBatchRequests bounds how many reads one batch call may fan out to.
+const maxBatchRequests = 20
+
+// batchResult is one entry of a batch response: the status and JSON body
+// the path would have answered on its own.
+type batchResult struct {
+	Status int             `json:"status"`
+	Body   json.RawMessage `json:"body"`
+}
+
+// handleBatch answers several GET API reads in one round trip, so the
+// dashboard's refresh tick is one request instead of one per widget. Each
+// path is served by the regular handler, concurrently, under the caller's
+// credentials; identical paths in one batch are served once.
+func (a *App) handleBatch(mux http.Handler) http.HandlerFunc {
+	return func(w http.ResponseWriter, r *http.Request) {
+		var body struct {
+			Requests []string `json:"requests"`
+		}
+		if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
+			writeErr(w, http.StatusBadRequest, "Invalid JSON")
+			return
+		}
+		if len(body.Requests) > maxBatchRequests {
+			writeErr(w, http.StatusBadRequest, "Too many requests in batch")
+			return
+		}
+		results := make([]batchResult, len(body.Requests))
+		first := map[string]int{}
+		var wg sync.WaitGroup
+		for i, path := range body.Requests {
+			if _, ok := first[path]; ok {
+				continue
+			}
+			first[path] = i
+			u, err := url.ParseRequestURI(path)
+			if err != nil || !strings.HasPrefix(u.Path, "/api/v1/") || u.Path == r.URL.Path {
+				results[i] = batchResult{Status: http.StatusBadRequest, Body: json.RawMessage(`{"detail":"Invalid path"}`)}
+				continue
+			}
+			wg.Add(1)
+			go func(i int, u *url.URL) {
+				defer wg.Done()
+				results[i] = a.serveBatched(mux, r, u)
+			}(i, u)
+		}
+		wg.Wait()
+		for i, path := range body.Requests {
+			if j := first[path]; j != i {
+				results[i] = results[j]
+			}
+		}
+		writeJSON(w, http.StatusOK, map[string]any{"results": results})
+	}
+}
+
+// serveBatched runs one GET through mux with the outer request's headers
+// and context; the principal already in the context skips re-authentication.
+func (a *App) serveBatched(mux http.Handler, outer *http.Request, u *url.URL) batchResult {
+	req := outer.Clone(outer.Context())
+	req.Method = http.MethodGet
+	req.URL = u
+	req.RequestURI = u.RequestURI()
+	req.Body = http.NoBody
+	req.ContentLength = 0
+	req.Header.Del("Content-Type")
+	rec := &bufferedResponse{header: http.Header{}, status: http.StatusOK}
+	mux.ServeHTTP(rec, req)
+	b := bytes.TrimSpace(rec.body.Bytes())
+	if !json.Valid(b) {
+		b, _ = json.Marshal(string(b))
+	}
+	return batchResult{Status: rec.status, Body: b}
+}
+
+// bufferedResponse collects a handler's response in memory.
+type bufferedResponse struct {
+	header      http.Header
+	status      int
+	wroteHeader bool
+	body        bytes.Buffer
+}
+
+func (b *bufferedResponse) Header() http.Header { return b.header }
+
+func (b *bufferedResponse) WriteHeader(status int) {
+	if !b.wroteHeader {
+		b.status, b.wroteHeader = status, true
+	}
+}
+
+func (b *bufferedResponse) Write(p []byte) (int, error) {
+	b.wroteHeader = true
+	return b.body.Write(p)
+}
@@ -3,6 +3,7 @@ package api
 import (
 	"encoding/json"
 	"net/http"
+	"sort"
 	"strconv"
 	"strings"
 
@@ -11,34 +12,64 @@ import (
 
 // --- metrics ---
 
+type pushedMetric struct {
+	Name   string   `json:"name"`
+	Value  *float64 `json:"value"`
+	Type   string   `json:"type"`
+	Labels []struct {
+		Name  string `json:"name"`
+		Value string `json:"value"`
+	} `json:"labels"`
+	HelpText string `json:"help_text"`
+}
+
+// handlePushMetric accepts one metric object or an array of them. A batch is
+// registered under one registry lock and stored in one transaction.
 func (a *App) handlePushMetric(w http.ResponseWriter, r *http.Request) {
-	var body struct {
-		Name   string   `json:"name"`
-		Value  *float64 `json:"value"`
-		Type   string   `json:"type"`
-		Labels []struct {
-			Name  string `json:"name"`
-			Value string `json:"value"`
-		} `json:"labels"`
-		HelpText string `json:"help_text"`
-	}
-	if err := json.NewDecoder(r.Body).Decode(&body); err != nil || body.Value == nil {
+	var raw json.RawMessage
+	if err := json.NewDecoder(r.Body).Decode(&raw); err != nil {
+		writeErr(w, http.StatusBadRequest, "Invalid request body")
+		return
+	}
+	var batch []pushedMetric
+	single := !strings.HasPrefix(strings.TrimSpace(string(raw)), "[")
+	if single {
+		batch = make([]pushedMetric, 1)
+		if err := json.Unmarshal(raw, &batch[0]); err != nil {
+			writeErr(w, http.StatusBadRequest, "Invalid request body")
+			return
+		}
+	} else if err := json.Unmarshal(raw, &batch); err != nil {
 		writeErr(w, http.StatusBadRequest, "Invalid request body")
 		return
 	}
-	labelsMap := map[string]string{}
-	for _, l := range body.Labels {
-		labelsMap[l.Name] = l.Value
+	entries := make([]registryEntry, 0, len(batch))
+	rows := make([]storage.Metric, 0, len(batch))
+	for _, m := range batch {
+		if m.Value == nil {
+			writeErr(w, http.StatusBadRequest, "Invalid request body")
+			return
+		}
+		labelsMap := map[string]string{}
+		for _, l := range m.Labels {
+			labelsMap[l.Name] = l.Value
+		}
+		labelsJSON, _ := json.Marshal(labelsMap)
+		entries = append(entries, registryEntry{Name: m.Name, Type: m.Type, Help: m.HelpText, Value: *m.Value, Labels: labelsMap})
+		rows = append(rows, storage.Metric{Name: m.Name, Labels: string(labelsJSON), Value: *m.Value})
 	}
-	labelsJSON, _ := json.Marshal(labelsMap)
 	if a.Metrics != nil {
-		a.Metrics.Add(registryEntry{Name: body.Name, Type: body.Type, Help: body.HelpText, Value: *body.Value, Labels: labelsMap})
+		a.Metrics.Add(entries...)
 	}
-	if err := a.Store.PushMetric(body.Name, string(labelsJSON), *body.Value); err != nil {
+	if err := a.Store.PushMetrics(rows); err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	if single {
+		writeOK(w)
+		return
+	}
+	writeJSON(w, http.StatusOK, map[string]any{"status": "ok", "count": len(rows)})
 }
 
 func (a *App) handleListMetrics(w http.ResponseWriter, r *http.Request) {
@@ -69,66 +100,57 @@ func (a *App) handleMetricsTrend(w http.ResponseWriter, r *http.Request) {
 		NetRXAvg  float64 `json:"net_rx_avg"`
 		NetTXAvg  float64 `json:"net_tx_avg"`
 	}
-	buckets := map[string]*struct {
-		cpuSum, memSum, diskSum, rxSum, txSum float64
-		cpuN, memN, diskN, rxN, txN           int
-	}{}
-	order := []string{}
+	// Accumulators live by value in one slice (cpu, mem, disk, rx, tx),
+	// indexed by timestamp, rather than one heap object per bucket.
+	type bucket struct {
+		ts  string
+		sum [5]float64
+		n   [5]int
+	}
+	var buckets []bucket
+	index := map[string]int{}
 	for _, pts := range history {
-		for _, p := range pts {
-			b, ok := buckets[p.Timestamp]
+		for i := range pts {
+			p := &pts[i]
+			bi, ok := index[p.Timestamp]
 			if !ok {
-				b = &struct {
-					cpuSum, memSum, diskSum, rxSum, txSum float64
-					cpuN, memN, diskN, rxN, txN           int
-				}{}
-				buckets[p.Timestamp] = b
-				order = append(order, p.Timestamp)
-			}
-			if p.CPUPercent != nil {
-				b.cpuSum += *p.CPUPercent
-				b.cpuN++
-			}
-			if p.MemoryPercent != nil {
-				b.memSum += *p.MemoryPercent
-				b.memN++
-			}
-			if p.DiskPercent != nil {
-				b.diskSum += *p.DiskPercent
-				b.diskN++
-			}
-			if p.NetworkRX != nil {
-				b.rxSum += *p.NetworkRX
-				b.rxN++
+				bi = len(buckets)
+				index[p.Timestamp] = bi
+				buckets = append(buckets, bucket{ts: p.Timestamp})
 			}
-			if p.NetworkTX != nil {
-				b.txSum += *p.NetworkTX
-				b.txN++
+			b := &buckets[bi]
+			for f, v := range [5]*float64{p.CPUPercent, p.MemoryPercent, p.DiskPercent, p.NetworkRX, p.NetworkTX} {
+				if v != nil {
+					b.sum[f] += *v
+					b.n[f]++
+				}
 			}
 		}
 	}
-	avg := func(sum float64, n int) float64 {
-		if n == 0 {
+	// history is a map, so buckets arrive in no particular order; the
+	// fixed-layout timestamps sort chronologically as strings.
+	sort.Slice(buckets, func(i, j int) bool { return buckets[i].ts < buckets[j].ts })
+	avg := func(b *bucket, f int) float64 {
+		if b.n[f] == 0 {
 			return 0
 		}
-		return sum / float64(n)
+		return b.sum[f] / float64(b.n[f])
 	}
-	out := make([]agg, 0, len(order))
-	for _, ts := range order {
-		b := buckets[ts]
-		out = append(out, agg{ts, avg(b.cpuSum, b.cpuN), avg(b.memSum, b.memN),
-			avg(b.diskSum, b.diskN), avg(b.rxSum, b.rxN), avg(b.txSum, b.txN)})
+	out := make([]agg, 0, len(buckets))
+	for i := range buckets {
+		b := &buckets[i]
+		out = append(out, agg{b.ts, avg(b, 0), avg(b, 1), avg(b, 2), avg(b, 3), avg(b, 4)})
 	}
 	writeJSON(w, http.StatusOK, map[string]any{"history": out})
 }
 
 func (a *App) handleClearMetricHistory(w http.ResponseWriter, r *http.Request) {
-	if _, err := a.Store.DB.Exec(`DELETE FROM metrics_history`); err != nil {
+	if err := a.Store.ClearMetricHistory(); err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
 	a.audit(r, "metrics_cleared", "Metric history cleared")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 // --- alerts ---
@@ -197,7 +219,7 @@ func (a *App) handleDeleteAlert(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "alert_deleted", "Alert deleted")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 // --- services ---
@@ -286,7 +308,7 @@ func (a *App) handleDeleteService(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "service_deleted", "Service deleted")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 // --- audit logs ---
@@ -316,7 +338,7 @@ func (a *App) handleClearAudit(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "audit_cleared", "Audit log cleared")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 func (a *App) handleSystemLogs(w http.ResponseWriter, r *http.Request) {
@@ -333,5 +355,5 @@ func (a *App) handleSystemLogs(w http.ResponseWriter, r *http.Request) {
 func (a *App) handleClearSystemLogs(w http.ResponseWriter, r *http.Request) {
 	_ = truncateLogFile(a.LogFilePath())
 	a.audit(r, "system_logs_cleared", "System logs cleared")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
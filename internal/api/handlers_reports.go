@@ -1,10 +1,10 @@
 package api
 
 import (
-	"encoding/json"
+	"bytes"
 	"fmt"
+	"html/template"
 	"net/http"
-	"strings"
 	"time"
 )
 
@@ -13,14 +13,46 @@ func (a *App) handleHealth(w http.ResponseWriter, r *http.Request) {
 	if a.Store == nil {
 		status = "degraded"
 	}
-	writeJSON(w, http.StatusOK, map[string]any{
-		"status":         status,
-		"version":        a.Version.Version,
-		"uptime_seconds": int64(time.Since(a.StartTime).Seconds()),
-		"time":           time.Now().Format(time.RFC3339),
-	})
+	// A typed body (fields in the map's old key order) spares the health
+	// probe a map, interface boxing and key sorting on every poll; the
+	// clock is read once for both the uptime and the timestamp.
+	now := time.Now()
+	writeJSON(w, http.StatusOK, struct {
+		Status        string `json:"status"`
+		Time          string `json:"time"`
+		UptimeSeconds int64  `json:"uptime_seconds"`
+		Version       string `json:"version"`
+	}{status, now.Format(time.RFC3339), int64(now.Sub(a.StartTime).Seconds()), a.Version.Version})
 }
 
+// reportTmpl is parsed once. html/template escapes the text fields for their
+// HTML context and encodes the chart series as JSON inside the script, so
+// no value from the database can break out of either.
+var reportTmpl = template.Must(template.New("report").Parse(`<!DOCTYPE html>
+<html lang="uk"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Report: {{.Name}}</title>
+<script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"></script>
+<style>body{font-family:system-ui,sans-serif;margin:24px;color:#0f172a}table{border-collapse:collapse;width:100%;margin:16px 0}
+th,td{border:1px solid #cbd5e1;padding:8px;text-align:left}.chart{max-width:100%;margin:24px 0}h2{color:#334155}
+button{padding:10px 16px;border:0;border-radius:6px;background:#2563eb;color:#fff;cursor:pointer}
+@media print { button{display:none} }</style>
+</head><body>
+<h1>Server Report: {{.Name}}</h1>
+<p>Generated: {{.Generated}}</p>
+<h2>Status</h2>
+<table><tr><th>Host</th><th>Status</th><th>CPU</th><th>Memory</th><th>Disk</th><th>Last check</th></tr>
+<tr><td>{{.Host}}</td><td>{{.Status}}</td><td>{{.CPU}}</td><td>{{.Mem}}</td><td>{{.Disk}}</td><td>{{.LastCheck}}</td></tr></table>
+<h2>CPU (24h)</h2><div class="chart"><canvas id="cpuChart"></canvas></div>
+<h2>Memory (24h)</h2><div class="chart"><canvas id="memChart"></canvas></div>
+<button onclick="window.print()">Print / PDF</button>
+<script>
+const labels = {{.Labels}}; const cpu = {{.CPUSeries}}; const mem = {{.MemSeries}};
+function mk(id,label,data,color){new Chart(document.getElementById(id),{type:'line',data:{labels:labels,
+datasets:[{label:label,data:data,borderColor:color,fill:true,tension:0.3}]},
+options:{scales:{y:{beginAtZero:true}},plugins:{legend:{display:false}}}});}
+mk('cpuChart','CPU %',cpu,'#2563eb'); mk('memChart','Memory %',mem,'#16a34a');
+</script></body></html>`))
+
 func (a *App) handleServerReport(w http.ResponseWriter, r *http.Request) {
 	id, err := pathInt(r, "server_id")
 	if err != nil {
@@ -37,68 +69,32 @@ func (a *App) handleServerReport(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	type pt struct {
-		Timestamp string   `json:"timestamp"`
-		CPU       *float64 `json:"cpu"`
-		Memory    *float64 `json:"memory"`
+	// The chart series share one label column; empty slices (not nil) keep
+	// the script valid for a server without history.
+	labels := make([]string, len(history))
+	cpu := make([]*float64, len(history))
+	mem := make([]*float64, len(history))
+	for i, h := range history {
+		labels[i], cpu[i], mem[i] = h.Timestamp, h.CPUPercent, h.MemoryPercent
 	}
-	var cpuPts, memPts []pt
-	for _, h := range history {
-		cpuPts = append(cpuPts, pt{h.Timestamp, h.CPUPercent, nil})
-		memPts = append(memPts, pt{h.Timestamp, nil, h.MemoryPercent})
+	data := map[string]any{
+		"Name":      s.Name,
+		"Generated": time.Now().Format("2006-01-02 15:04"),
+		"Host":      s.Host,
+		"Status":    s.LastStatus,
+		"CPU":       fmt.Sprintf("%.1f%%", s.CPUPercent),
+		"Mem":       fmt.Sprintf("%.1f%%", s.MemoryPercent),
+		"Disk":      fmt.Sprintf("%.1f%%", s.DiskPercent),
+		"LastCheck": s.LastCheck,
+		"Labels":    labels,
+		"CPUSeries": cpu,
+		"MemSeries": mem,
+	}
+	var buf bytes.Buffer
+	if err := reportTmpl.Execute(&buf, data); err != nil {
+		writeErr(w, http.StatusInternalServerError, "Report error")
+		return
 	}
-	cpuJSON, _ := json.Marshal(cpuPts)
-	memJSON, _ := json.Marshal(memPts)
-	gen := time.Now().Format("2006-01-02 15:04")
-
-	const head = `<!DOCTYPE html>
-<html lang="uk"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>Report: %TITLE%</title>
-<script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"></script>
-<style>body{font-family:system-ui,sans-serif;margin:24px;color:#0f172a}table{border-collapse:collapse;width:100%;margin:16px 0}
-th,td{border:1px solid #cbd5e1;padding:8px;text-align:left}.chart{max-width:100%;margin:24px 0}h2{color:#334155}
-button{padding:10px 16px;border:0;border-radius:6px;background:#2563eb;color:#fff;cursor:pointer}
-@media print { button{display:none} }</style>
-</head><body>
-<h1>Server Report: %TITLE%</h1>
-<p>Generated: %GEN%</p>
-<h2>Status</h2>
-<table><tr><th>Host</th><th>Status</th><th>CPU</th><th>Memory</th><th>Disk</th><th>Last check</th></tr>
-<tr><td>%HOST%</td><td>%STATUS%</td><td>%CPU%</td><td>%MEM%</td><td>%DISK%</td><td>%LAST%</td></tr></table>
-<h2>CPU (24h)</h2><div class="chart"><canvas id="cpuChart"></canvas></div>
-<h2>Memory (24h)</h2><div class="chart"><canvas id="memChart"></canvas></div>
-<button onclick="window.print()">Print / PDF</button>
-<script>
-const cpu = %CPUJSON%; const mem = %MEMJSON%;
-function mk(id,label,data,color){new Chart(document.getElementById(id),{type:'line',data:{labels:data.map(p=>p.timestamp),
-datasets:[{label:label,data:data.map(p=>p.cpu??p.memory??null),borderColor:color,fill:true,tension:0.3}]},
-options:{scales:{y:{beginAtZero:true}},plugins:{legend:{display:false}}}});}
-mk('cpuChart','CPU %',cpu,'#2563eb'); mk('memChart','Memory %',mem,'#16a34a');
-</script></body></html>`
-
-	cpuPct := fmt.Sprintf("%.1f%%", s.CPUPercent)
-	memPct := fmt.Sprintf("%.1f%%", s.MemoryPercent)
-	diskPct := fmt.Sprintf("%.1f%%", s.DiskPercent)
-
-	replacer := strings.NewReplacer(
-		"%TITLE%", escapeHTML(s.Name),
-		"%GEN%", gen,
-		"%HOST%", escapeHTML(s.Host),
-		"%STATUS%", escapeHTML(s.LastStatus),
-		"%CPU%", cpuPct,
-		"%MEM%", memPct,
-		"%DISK%", diskPct,
-		"%LAST%", escapeHTML(s.LastCheck),
-		"%CPUJSON%", string(cpuJSON),
-		"%MEMJSON%", string(memJSON),
-	)
-	html := replacer.Replace(head)
-
 	w.Header().Set("Content-Type", "text/html; charset=utf-8")
-	_, _ = w.Write([]byte(html))
-}
-
-func escapeHTML(s string) string {
-	r := strings.NewReplacer("&", "&amp;", "<", "&lt;", ">", "&gt;", "\"", "&quot;", "'", "&#39;")
-	return r.Replace(s)
+	_, _ = w.Write(buf.Bytes())
 }
@@ -4,6 +4,7 @@ import (
 	"encoding/csv"
 	"encoding/json"
 	"fmt"
+	"log"
 	"net/http"
 	"strconv"
 	"strings"
@@ -12,7 +13,7 @@ import (
 )
 
 func hostNameRe(s string) bool {
-	if s == "" {
+	if s == "" || len(s) > 253 {
 		return false
 	}
 	for _, c := range s {
@@ -25,6 +26,8 @@ func hostNameRe(s string) bool {
 	return true
 }
 
+func validPort(p int) bool { return p > 0 && p <= 65535 }
+
 func validServerName(s string) bool {
 	if s == "" || len(s) > 100 {
 		return false
@@ -39,57 +42,110 @@ func validServerName(s string) bool {
 	return true
 }
 
+// genJSON is an encoded response tagged with the store generation it was
+// built from.
+type genJSON struct {
+	gen  uint64
+	body []byte
+}
+
+// handleListServers is polled by every open dashboard but the list only
+// changes when the servers table does (a scrape round, an edit), so the
+// encoded body is kept until Store.ServersGen moves on. The generation is
+// read before the query: a write racing with it leaves an entry that is
+// already stale and is rebuilt by the next request. A rebuild encodes each
+// row as it is scanned, so the body is the only copy of the list in memory,
+// sized from the previous one.
 func (a *App) handleListServers(w http.ResponseWriter, r *http.Request) {
-	servers, err := a.Store.ListServers()
+	gen := a.Store.ServersGen()
+	c := a.serversJSON.Load()
+	if c != nil && c.gen == gen {
+		writeJSONBytes(w, http.StatusOK, c.body)
+		return
+	}
+	size := 512
+	if c != nil {
+		size = len(c.body) + 512
+	}
+	body := append(make([]byte, 0, size), `{"servers":[`...)
+	first := true
+	err := a.Store.EachServer(func(s *storage.Server) error {
+		if !first {
+			body = append(body, ',')
+		}
+		first = false
+		body = appendServer(body, s)
+		return nil
+	})
 	if err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	writeJSON(w, http.StatusOK, map[string]any{"servers": servers})
+	body = append(body, "]}\n"...)
+	a.serversJSON.Store(&genJSON{gen: gen, body: body})
+	writeJSONBytes(w, http.StatusOK, body)
 }
 
-func (a *App) handleCreateServer(w http.ResponseWriter, r *http.Request) {
-	var body struct {
-		Name           string `json:"name"`
-		Host           string `json:"host"`
-		OSType         string `json:"os_type"`
-		AgentPort      int    `json:"agent_port"`
-		Enabled        *bool  `json:"enabled"`
-		ServerGroup    string `json:"server_group"`
-		ScrapeInterval int    `json:"scrape_interval"`
+// serverInput is the body of a server create, alone or as one entry of a
+// bulk create.
+type serverInput struct {
+	Name           string `json:"name"`
+	Host           string `json:"host"`
+	OSType         string `json:"os_type"`
+	AgentPort      int    `json:"agent_port"`
+	Enabled        *bool  `json:"enabled"`
+	ServerGroup    string `json:"server_group"`
+	ScrapeInterval int    `json:"scrape_interval"`
+}
+
+// server validates the input and fills in defaults; on failure it returns
+// the error detail for the response.
+func (in *serverInput) server() (*storage.Server, string) {
+	if !validServerName(in.Name) {
+		return nil, "Invalid server name"
 	}
-	if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
-		writeErr(w, http.StatusBadRequest, "Invalid request body")
-		return
+	if !hostNameRe(in.Host) {
+		return nil, "Invalid host"
 	}
-	if !validServerName(body.Name) {
-		writeErr(w, http.StatusBadRequest, "Invalid server name")
-		return
+	if in.AgentPort != 0 && !validPort(in.AgentPort) {
+		return nil, "Invalid agent port"
 	}
-	if !hostNameRe(body.Host) {
-		writeErr(w, http.StatusBadRequest, "Invalid host")
-		return
+	if in.ScrapeInterval < 0 {
+		return nil, "Invalid scrape interval"
 	}
-	port := body.AgentPort
+	port := in.AgentPort
 	if port == 0 {
-		if strings.EqualFold(body.OSType, "windows") {
+		if strings.EqualFold(in.OSType, "windows") {
 			port = 9182
 		} else {
 			port = 9100
 		}
 	}
-	osType := body.OSType
+	osType := in.OSType
 	if osType == "" {
 		osType = "linux"
 	}
 	enabled := 1
-	if body.Enabled != nil && !*body.Enabled {
+	if in.Enabled != nil && !*in.Enabled {
 		enabled = 0
 	}
-	s := &storage.Server{
-		Name: body.Name, Host: body.Host, OSType: osType, AgentPort: port,
-		Enabled: enabled, ServerGroup: body.ServerGroup, ScrapeInterval: body.ScrapeInterval,
+	return &storage.Server{
+		Name: in.Name, Host: in.Host, OSType: osType, AgentPort: port,
+		Enabled: enabled, ServerGroup: in.ServerGroup, ScrapeInterval: in.ScrapeInterval,
 		Volumes: "[]", Labels: "{}",
+	}, ""
+}
+
+func (a *App) handleCreateServer(w http.ResponseWriter, r *http.Request) {
+	var body serverInput
+	if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
+		writeErr(w, http.StatusBadRequest, "Invalid request body")
+		return
+	}
+	s, msg := body.server()
+	if s == nil {
+		writeErr(w, http.StatusBadRequest, msg)
+		return
 	}
 	id, err := a.Store.CreateServer(s)
 	if err != nil {
@@ -100,6 +156,42 @@ func (a *App) handleCreateServer(w http.ResponseWriter, r *http.Request) {
 	writeJSON(w, http.StatusOK, map[string]any{"status": "ok", "id": id})
 }
 
+// maxBulkServers bounds how many servers one bulk create may insert.
+const maxBulkServers = 1000
+
+// handleCreateServers creates a list of servers in one transaction. The
+// whole list is validated first; any invalid entry rejects the request
+// and nothing is created.
+func (a *App) handleCreateServers(w http.ResponseWriter, r *http.Request) {
+	var body struct {
+		Servers []serverInput `json:"servers"`
+	}
+	if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
+		writeErr(w, http.StatusBadRequest, "Invalid request body")
+		return
+	}
+	if len(body.Servers) > maxBulkServers {
+		writeErr(w, http.StatusBadRequest, "Too many servers")
+		return
+	}
+	servers := make([]*storage.Server, len(body.Servers))
+	for i := range body.Servers {
+		s, msg := body.Servers[i].server()
+		if s == nil {
+			writeErr(w, http.StatusBadRequest, fmt.Sprintf("servers[%d]: %s", i, msg))
+			return
+		}
+		servers[i] = s
+	}
+	ids, err := a.Store.CreateServers(servers)
+	if err != nil {
+		writeErr(w, http.StatusInternalServerError, "Database error")
+		return
+	}
+	a.audit(r, "servers_created", fmt.Sprintf("%d servers created", len(ids)))
+	writeJSON(w, http.StatusOK, map[string]any{"status": "ok", "ids": ids})
+}
+
 func (a *App) handleGetServer(w http.ResponseWriter, r *http.Request) {
 	id, err := pathInt(r, "id")
 	if err != nil {
@@ -129,50 +221,69 @@ func (a *App) handleUpdateServer(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusNotFound, "Server not found")
 		return
 	}
-	var body map[string]any
+	// Absent fields are left as they are. Decoding into typed fields rejects
+	// a wrong JSON type with a 400 instead of panicking on a type assertion.
+	var body struct {
+		Name           *string `json:"name"`
+		Host           *string `json:"host"`
+		OSType         *string `json:"os_type"`
+		AgentPort      *int    `json:"agent_port"`
+		Enabled        *bool   `json:"enabled"`
+		ServerGroup    *string `json:"server_group"`
+		ScrapeInterval *int    `json:"scrape_interval"`
+	}
 	if err := json.NewDecoder(r.Body).Decode(&body); err != nil {
 		writeErr(w, http.StatusBadRequest, "Invalid request body")
 		return
 	}
 	fields := map[string]any{}
-	for k, v := range body {
-		switch k {
-		case "name":
-			name, _ := v.(string)
-			if !validServerName(name) {
-				writeErr(w, http.StatusBadRequest, "Invalid server name")
-				return
-			}
-			fields["name"] = name
-		case "host":
-			host, _ := v.(string)
-			if !hostNameRe(host) {
-				writeErr(w, http.StatusBadRequest, "Invalid host")
-				return
-			}
-			fields["host"] = host
-		case "os_type":
-			fields["os_type"] = v.(string)
-		case "agent_port":
-			fields["agent_port"] = int(v.(float64))
-		case "enabled":
-			n := 0
-			if v.(bool) {
-				n = 1
-			}
-			fields["enabled"] = n
-		case "server_group":
-			fields["server_group"] = v.(string)
-		case "scrape_interval":
-			fields["scrape_interval"] = int(v.(float64))
+	if body.Name != nil {
+		if !validServerName(*body.Name) {
+			writeErr(w, http.StatusBadRequest, "Invalid server name")
+			return
+		}
+		fields["name"] = *body.Name
+	}
+	if body.Host != nil {
+		if !hostNameRe(*body.Host) {
+			writeErr(w, http.StatusBadRequest, "Invalid host")
+			return
 		}
+		fields["host"] = *body.Host
+	}
+	if body.OSType != nil {
+		fields["os_type"] = *body.OSType
+	}
+	if body.AgentPort != nil {
+		if !validPort(*body.AgentPort) {
+			writeErr(w, http.StatusBadRequest, "Invalid agent port")
+			return
+		}
+		fields["agent_port"] = *body.AgentPort
+	}
+	if body.Enabled != nil {
+		n := 0
+		if *body.Enabled {
+			n = 1
+		}
+		fields["enabled"] = n
+	}
+	if body.ServerGroup != nil {
+		fields["server_group"] = *body.ServerGroup
+	}
+	if body.ScrapeInterval != nil {
+		if *body.ScrapeInterval < 0 {
+			writeErr(w, http.StatusBadRequest, "Invalid scrape interval")
+			return
+		}
+		fields["scrape_interval"] = *body.ScrapeInterval
 	}
 	if err := a.Store.UpdateServer(id, fields); err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
 	a.audit(r, "server_updated", "Server "+s.Name+" updated")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 func (a *App) handleDeleteServer(w http.ResponseWriter, r *http.Request) {
@@ -189,7 +300,28 @@ func (a *App) handleDeleteServer(w http.ResponseWriter, r *http.Request) {
 	if s != nil {
 		a.audit(r, "server_deleted", "Server "+s.Name+" deleted")
 	}
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
+}
+
+// serverHistory and serverStat are the per-server rows of the history and
+// compare responses. Typed rows encode straight from struct fields; the
+// maps they replace cost an allocation per row and a key sort on every
+// encode.
+type serverHistory struct {
+	ID      int64                 `json:"id"`
+	Name    string                `json:"name"`
+	Host    string                `json:"host"`
+	History []storage.MetricPoint `json:"history"`
+}
+
+type serverStat struct {
+	ServerID   int64   `json:"server_id"`
+	ServerName string  `json:"server_name"`
+	Metric     string  `json:"metric"`
+	Average    float64 `json:"average"`
+	Min        float64 `json:"min"`
+	Max        float64 `json:"max"`
+	DataPoints int     `json:"data_points"`
 }
 
 func (a *App) handleServersHistory(w http.ResponseWriter, r *http.Request) {
@@ -207,15 +339,13 @@ func (a *App) handleServersHistory(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	out := make([]map[string]any, 0, len(servers))
+	out := make([]serverHistory, 0, len(servers))
 	for _, s := range servers {
 		h := history[s.ID]
 		if h == nil {
 			h = []storage.MetricPoint{}
 		}
-		out = append(out, map[string]any{
-			"id": s.ID, "name": s.Name, "host": s.Host, "history": h,
-		})
+		out = append(out, serverHistory{ID: s.ID, Name: s.Name, Host: s.Host, History: h})
 	}
 	writeJSON(w, http.StatusOK, map[string]any{"range": token, "servers": out})
 }
@@ -235,12 +365,49 @@ func (a *App) handleServerHistory(w http.ResponseWriter, r *http.Request) {
 	if token == "" {
 		token = "1h"
 	}
+	if strings.Contains(r.Header.Get("Accept"), "application/x-ndjson") {
+		a.streamServerHistory(w, id, token)
+		return
+	}
 	history, err := a.Store.ServerHistory(id, token)
 	if err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	writeJSON(w, http.StatusOK, map[string]any{"history": history})
+	body := make([]byte, 0, 160*len(history)+16)
+	body = append(appendMetricPoints(append(body, `{"history":`...), history), "}\n"...)
+	writeJSONBytes(w, http.StatusOK, body)
+}
+
+// streamServerHistory writes the history window as NDJSON, one point per
+// line, sending every ndjsonFlushRows points so the client can parse the
+// window while the rest is still arriving. The window is bounded by the
+// range's bucketing and is read whole first, so a slow client never holds
+// a reader-pool connection (and its read transaction) open.
+func (a *App) streamServerHistory(w http.ResponseWriter, id int64, token string) {
+	const ndjsonFlushRows = 256
+	history, err := a.Store.ServerHistory(id, token)
+	if err != nil {
+		writeErr(w, http.StatusInternalServerError, "Database error")
+		return
+	}
+	w.Header().Set("Content-Type", "application/x-ndjson")
+	flusher, _ := w.(http.Flusher)
+	var buf []byte
+	for i := range history {
+		buf = append(appendMetricPoint(buf, &history[i]), '\n')
+		if (i+1)%ndjsonFlushRows != 0 && i != len(history)-1 {
+			continue
+		}
+		if _, err := w.Write(buf); err != nil {
+			log.Printf("history stream for server %d cut short: %v", id, err)
+			return
+		}
+		buf = buf[:0]
+		if flusher != nil {
+			flusher.Flush()
+		}
+	}
 }
 
 func (a *App) handleDiskBreakdown(w http.ResponseWriter, r *http.Request) {
@@ -283,13 +450,12 @@ func (a *App) handleUptimeTimeline(w http.ResponseWriter, r *http.Request) {
 		Timestamp string `json:"timestamp"`
 		Status    string `json:"status"`
 	}
-	out := make([]tlPoint, 0, len(timeline))
-	for _, p := range timeline {
-		st := "down"
-		if p.CPUPercent != nil {
-			st = "up"
+	out := make([]tlPoint, len(timeline.Timestamps))
+	for i, ts := range timeline.Timestamps {
+		out[i] = tlPoint{ts, "down"}
+		if timeline.Up[i] {
+			out[i].Status = "up"
 		}
-		out = append(out, tlPoint{p.Timestamp, st})
 	}
 	writeJSON(w, http.StatusOK, map[string]any{
 		"timeline": out, "uptime_percent": uptime,
@@ -314,22 +480,11 @@ func (a *App) handleServerSummary(w http.ResponseWriter, r *http.Request) {
 }
 
 func (a *App) handleSummaryAll(w http.ResponseWriter, r *http.Request) {
-	servers, err := a.Store.ListServers()
+	t, err := a.Store.ServerTotals()
 	if err != nil {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	total := len(servers)
-	online := 0
-	var cpuSum, memSum, diskSum float64
-	for _, s := range servers {
-		if s.LastStatus == "up" {
-			online++
-		}
-		cpuSum += s.CPUPercent
-		memSum += s.MemoryPercent
-		diskSum += s.DiskPercent
-	}
 	avg := func(sum float64, n int) float64 {
 		if n == 0 {
 			return 0
@@ -337,9 +492,9 @@ func (a *App) handleSummaryAll(w http.ResponseWriter, r *http.Request) {
 		return sum / float64(n)
 	}
 	writeJSON(w, http.StatusOK, map[string]any{
-		"total": total, "online": online, "offline": total - online,
-		"avg_cpu": avg(cpuSum, total), "avg_memory": avg(memSum, total),
-		"avg_disk": avg(diskSum, total),
+		"total": t.Total, "online": t.Online, "offline": t.Total - t.Online,
+		"avg_cpu": avg(t.CPUSum, t.Total), "avg_memory": avg(t.MemorySum, t.Total),
+		"avg_disk": avg(t.DiskSum, t.Total),
 	})
 }
 
@@ -522,22 +677,23 @@ func (a *App) handleServersCompare(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	out := []map[string]any{}
+	field := func(p *storage.MetricPoint) *float64 { return nil }
+	switch metric {
+	case "cpu":
+		field = func(p *storage.MetricPoint) *float64 { return p.CPUPercent }
+	case "memory", "mem":
+		field = func(p *storage.MetricPoint) *float64 { return p.MemoryPercent }
+	case "disk":
+		field = func(p *storage.MetricPoint) *float64 { return p.DiskPercent }
+	}
+	out := make([]serverStat, 0, len(servers))
 	for _, s := range servers {
 		points := history[s.ID]
 		var sum, min, max float64
 		var n int
 		haveMin := false
-		for _, p := range points {
-			var v *float64
-			switch metric {
-			case "cpu":
-				v = p.CPUPercent
-			case "memory", "mem":
-				v = p.MemoryPercent
-			case "disk":
-				v = p.DiskPercent
-			}
+		for i := range points {
+			v := field(&points[i])
 			if v == nil {
 				continue
 			}
@@ -555,10 +711,8 @@ func (a *App) handleServersCompare(w http.ResponseWriter, r *http.Request) {
 		if n > 0 {
 			avg = sum / float64(n)
 		}
-		out = append(out, map[string]any{
-			"server_id": s.ID, "server_name": s.Name, "metric": metric,
-			"average": avg, "min": min, "max": max, "data_points": n,
-		})
+		out = append(out, serverStat{ServerID: s.ID, ServerName: s.Name, Metric: metric,
+			Average: avg, Min: min, Max: max, DataPoints: n})
 	}
 	writeJSON(w, http.StatusOK, map[string]any{"metric": metric, "range": token, "servers": out})
 }
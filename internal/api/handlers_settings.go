@@ -3,6 +3,7 @@ package api
 import (
 	"encoding/json"
 	"fmt"
+	"log"
 	"net/http"
 	"strings"
 
@@ -21,11 +22,15 @@ func (a *App) handleGetNotifications(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusInternalServerError, "Database error")
 		return
 	}
-	cfg := map[string]any{}
-	if n != nil && n.Config != "" {
-		_ = json.Unmarshal([]byte(n.Config), &cfg)
+	// The stored config is the JSON object handleSaveNotifications encoded,
+	// so it is sent as is rather than decoded into a map and re-encoded.
+	body := []byte("{}\n")
+	if n != nil {
+		if c := strings.TrimSpace(n.Config); strings.HasPrefix(c, "{") && json.Valid([]byte(c)) {
+			body = []byte(c + "\n")
+		}
 	}
-	writeJSON(w, http.StatusOK, cfg)
+	writeJSONBytes(w, http.StatusOK, body)
 }
 
 func (a *App) handleSaveNotifications(w http.ResponseWriter, r *http.Request) {
@@ -44,7 +49,7 @@ func (a *App) handleSaveNotifications(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 	a.audit(r, "settings_updated", "Notification settings updated")
-	writeJSON(w, http.StatusOK, map[string]any{"status": "ok"})
+	writeOK(w)
 }
 
 func (a *App) handleTestNotifications(w http.ResponseWriter, r *http.Request) {
@@ -123,6 +128,11 @@ func (a *App) handleImportPrometheus(w http.ResponseWriter, r *http.Request) {
 		writeErr(w, http.StatusBadRequest, "Invalid YAML: "+err.Error())
 		return
 	}
+	idx, err := a.newTargetIndex()
+	if err != nil {
+		writeErr(w, http.StatusInternalServerError, "Database error")
+		return
+	}
 	imported := 0
 	for _, sc := range cfg.ScrapeConfigs {
 		for _, ssc := range sc.StaticConfigs {
@@ -133,23 +143,63 @@ func (a *App) handleImportPrometheus(w http.ResponseWriter, r *http.Request) {
 				}
 				if strings.HasPrefix(t, "http://") || strings.HasPrefix(t, "https://") {
 					// service
-					if _, err := a.upsertServiceFromTarget(t, sc.JobName); err == nil {
+					if _, err := a.upsertServiceFromTarget(idx, t, sc.JobName); err == nil {
 						imported++
 					}
 				} else {
 					// server host:port
-					if _, err := a.upsertServerFromTarget(t, sc.JobName, ssc.Labels); err == nil {
+					if err := a.upsertServerFromTarget(idx, t, sc.JobName, ssc.Labels); err == nil {
 						imported++
 					}
 				}
 			}
 		}
 	}
+	// New servers go in as one transaction rather than a commit per target,
+	// so a failure drops all of them; services are already in.
+	if _, err := a.Store.CreateServers(idx.newServers); err != nil {
+		log.Printf("prometheus import: create %d servers: %v", len(idx.newServers), err)
+		imported -= len(idx.newServers)
+		if imported > 0 {
+			a.audit(r, "prometheus_import", fmt.Sprintf("Imported %d targets, %d servers failed", imported, len(idx.newServers)))
+		}
+		writeErr(w, http.StatusInternalServerError, fmt.Sprintf("Database error: %d servers not imported", len(idx.newServers)))
+		return
+	}
 	a.audit(r, "prometheus_import", fmt.Sprintf("Imported %d targets", imported))
 	writeJSON(w, http.StatusOK, map[string]any{"status": "ok", "imported": imported})
 }
 
-func (a *App) upsertServerFromTarget(target, job string, labels map[string]string) (int64, error) {
+// targetIndex maps existing servers (host+port) and services (URL) to their
+// ids, loaded once per import so each target is an O(1) upsert check.
+// Servers new to this import are collected in newServers and created
+// together at the end.
+type targetIndex struct {
+	servers    map[storage.Endpoint]int64
+	services   map[string]int64
+	newServers []*storage.Server
+}
+
+func (a *App) newTargetIndex() (*targetIndex, error) {
+	servers, err := a.Store.ServerEndpoints()
+	if err != nil {
+		return nil, err
+	}
+	services, err := a.Store.ListServices()
+	if err != nil {
+		return nil, err
+	}
+	idx := &targetIndex{
+		servers:  servers,
+		services: make(map[string]int64, len(services)),
+	}
+	for _, s := range services {
+		idx.services[s.TargetURL] = s.ID
+	}
+	return idx, nil
+}
+
+func (a *App) upsertServerFromTarget(idx *targetIndex, target, job string, labels map[string]string) error {
 	host := target
 	port := 0
 	if idx := strings.LastIndex(target, ":"); idx > 0 {
@@ -160,7 +210,7 @@ func (a *App) upsertServerFromTarget(target, job string, labels map[string]strin
 		port = 9100
 	}
 	if !hostNameRe(host) {
-		return 0, fmt.Errorf("invalid host %q", host)
+		return fmt.Errorf("invalid host %q", host)
 	}
 	osType := "linux"
 	if port == 9182 || port == 1030 || port == 1035 {
@@ -171,36 +221,36 @@ func (a *App) upsertServerFromTarget(target, job string, labels map[string]strin
 		name = target
 	}
 	// upsert by host+port
-	servers, _ := a.Store.ListServers()
-	for _, s := range servers {
-		if s.Host == host && s.AgentPort == port {
-			return s.ID, nil
-		}
+	key := storage.Endpoint{Host: host, Port: port}
+	if _, ok := idx.servers[key]; ok {
+		return nil
 	}
 	labelJSON, _ := json.Marshal(labels)
-	s := &storage.Server{
+	idx.newServers = append(idx.newServers, &storage.Server{
 		Name: name, Host: host, AgentPort: port, OSType: osType,
 		Enabled: 1, Volumes: "[]", Labels: string(labelJSON),
-	}
-	return a.Store.CreateServer(s)
+	})
+	idx.servers[key] = 0 // id assigned on insert
+	return nil
 }
 
-func (a *App) upsertServiceFromTarget(url, job string) (int64, error) {
+func (a *App) upsertServiceFromTarget(idx *targetIndex, url, job string) (int64, error) {
 	name := job
 	if name == "" {
 		name = url
 	}
-	services, _ := a.Store.ListServices()
-	for _, s := range services {
-		if s.TargetURL == url {
-			return s.ID, nil
-		}
+	if id, ok := idx.services[url]; ok {
+		return id, nil
 	}
 	s := &storage.Service{
 		Name: name, TargetURL: url, CheckType: "http",
 		Interval: 60, Timeout: 10, ExpectedStatus: 200, Enabled: 1,
 	}
-	return a.Store.CreateService(s)
+	id, err := a.Store.CreateService(s)
+	if err == nil {
+		idx.services[url] = id
+	}
+	return id, err
 }
 
 func parsePort(s string) (int, error) {
@@ -0,0 +1,102 @@
+package api
+
+import (
+	"math"
+	"strconv"
+
+	"github.com/ajjs1ajjs/Monitoring/internal/jsonenc"
+	"github.com/ajjs1ajjs/Monitoring/internal/storage"
+)
+
+// appendMetricPoints encodes a history series without reflection, byte for
+// byte as encoding/json would. History windows are the largest responses
+// the dashboard polls; appending straight into the response buffer halves
+// their encoding time and, for the NDJSON stream, replaces an encoder
+// call and allocation per point.
+func appendMetricPoints(b []byte, ps []storage.MetricPoint) []byte {
+	b = append(b, '[')
+	for i := range ps {
+		if i > 0 {
+			b = append(b, ',')
+		}
+		b = appendMetricPoint(b, &ps[i])
+	}
+	return append(b, ']')
+}
+
+func appendMetricPoint(b []byte, p *storage.MetricPoint) []byte {
+	b = append(b, `{"id":`...)
+	b = strconv.AppendInt(b, p.ID, 10)
+	b = append(b, `,"server_id":`...)
+	b = strconv.AppendInt(b, p.ServerID, 10)
+	b = append(b, `,"cpu":`...)
+	b = appendJSONFloatPtr(b, p.CPUPercent)
+	b = append(b, `,"mem":`...)
+	b = appendJSONFloatPtr(b, p.MemoryPercent)
+	b = append(b, `,"disk":`...)
+	b = appendJSONFloatPtr(b, p.DiskPercent)
+	b = append(b, `,"net_rx":`...)
+	b = appendJSONFloatPtr(b, p.NetworkRX)
+	b = append(b, `,"net_tx":`...)
+	b = appendJSONFloatPtr(b, p.NetworkTX)
+	b = append(b, `,"disk_info":`...)
+	b = jsonenc.AppendString(b, p.DiskInfo)
+	b = append(b, `,"timestamp":`...)
+	b = jsonenc.AppendString(b, p.Timestamp)
+	return append(b, '}')
+}
+
+// appendServer encodes one server the same way; handleListServers
+// appends one per row as it scans.
+func appendServer(b []byte, s *storage.Server) []byte {
+	b = append(b, `{"id":`...)
+	b = strconv.AppendInt(b, s.ID, 10)
+	b = append(b, `,"name":`...)
+	b = jsonenc.AppendString(b, s.Name)
+	b = append(b, `,"host":`...)
+	b = jsonenc.AppendString(b, s.Host)
+	b = append(b, `,"agent_port":`...)
+	b = strconv.AppendInt(b, int64(s.AgentPort), 10)
+	b = append(b, `,"server_group":`...)
+	b = jsonenc.AppendString(b, s.ServerGroup)
+	b = append(b, `,"os_type":`...)
+	b = jsonenc.AppendString(b, s.OSType)
+	b = append(b, `,"enabled":`...)
+	b = strconv.AppendInt(b, int64(s.Enabled), 10)
+	b = append(b, `,"last_status":`...)
+	b = jsonenc.AppendString(b, s.LastStatus)
+	b = append(b, `,"last_check":`...)
+	b = jsonenc.AppendString(b, s.LastCheck)
+	b = append(b, `,"cpu_percent":`...)
+	b = appendJSONFloatPtr(b, &s.CPUPercent)
+	b = append(b, `,"memory_percent":`...)
+	b = appendJSONFloatPtr(b, &s.MemoryPercent)
+	b = append(b, `,"disk_percent":`...)
+	b = appendJSONFloatPtr(b, &s.DiskPercent)
+	b = append(b, `,"exporter_version":`...)
+	b = jsonenc.AppendString(b, s.ExporterVersion)
+	b = append(b, `,"error_message":`...)
+	b = jsonenc.AppendString(b, s.ErrorMessage)
+	b = append(b, `,"is_maintenance":`...)
+	b = strconv.AppendInt(b, int64(s.IsMaintenance), 10)
+	b = append(b, `,"flapping_count":`...)
+	b = strconv.AppendInt(b, int64(s.FlappingCount), 10)
+	b = append(b, `,"volumes":`...)
+	b = jsonenc.AppendString(b, s.Volumes)
+	b = append(b, `,"scrape_interval":`...)
+	b = strconv.AppendInt(b, int64(s.ScrapeInterval), 10)
+	b = append(b, `,"labels":`...)
+	b = jsonenc.AppendString(b, s.Labels)
+	b = append(b, `,"created_at":`...)
+	b = jsonenc.AppendString(b, s.CreatedAt)
+	return append(b, '}')
+}
+
+// appendJSONFloatPtr formats like encoding/json, with null for nil. NaN
+// and Inf cannot come out of SQLite and are written as null.
+func appendJSONFloatPtr(b []byte, f *float64) []byte {
+	if f == nil || math.IsNaN(*f) || math.IsInf(*f, 0) {
+		return append(b, "null"...)
+	}
+	return jsonenc.AppendFloat(b, *f)
+}
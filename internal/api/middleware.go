@@ -2,12 +2,14 @@ package api
 
 import (
 	"bufio"
+	"compress/gzip"
 	"context"
 	"errors"
 	"io"
 	"log"
 	"net"
 	"net/http"
+	"strconv"
 	"strings"
 	"sync"
 	"time"
@@ -31,6 +33,12 @@ const principalKey ctxKey = 0
 // Users with must_change_password are blocked except for change-password/me.
 func (a *App) withAuth(next http.HandlerFunc) http.HandlerFunc {
 	return func(w http.ResponseWriter, r *http.Request) {
+		// A principal already in the context means an outer handler (a
+		// batch call) authenticated this request; clients cannot set one.
+		if a.principal(r) != nil {
+			next(w, r)
+			return
+		}
 		authz := r.Header.Get("Authorization")
 		apiKey := r.Header.Get("X-API-Key")
 
@@ -174,11 +182,125 @@ func (a *App) withRecovery(next http.HandlerFunc) http.HandlerFunc {
 
 // --- security headers ---
 
+// withETag lets writeJSON answer a GET with 304 Not Modified when the body
+// it is about to send matches the client's If-None-Match, so dashboard
+// polls of unchanged data cost a round trip instead of the payload.
+func withETag(next http.HandlerFunc) http.HandlerFunc {
+	return func(w http.ResponseWriter, r *http.Request) {
+		if r.Method != http.MethodGet {
+			next(w, r)
+			return
+		}
+		next(&etagWriter{ResponseWriter: w, ifNoneMatch: r.Header.Get("If-None-Match")}, r)
+	}
+}
+
+type etagWriter struct {
+	http.ResponseWriter
+	ifNoneMatch string
+}
+
+func (w *etagWriter) Flush() {
+	if f, ok := w.ResponseWriter.(http.Flusher); ok {
+		f.Flush()
+	}
+}
+
+// minGzipSize is the smallest JSON body worth compressing; below it the
+// gzip framing eats most of the saving.
+const minGzipSize = 1000
+
+var gzipWriters = sync.Pool{New: func() any { return gzip.NewWriter(io.Discard) }}
+
+// withGzip compresses JSON responses of at least minGzipSize bytes for
+// clients that accept gzip. Repeated keys make server lists and histories
+// shrink several times over. Only bodies with a known Content-Length
+// qualify, so streams pass through untouched, as do pages and assets,
+// which come with their own precompressed copy.
+func withGzip(next http.Handler) http.Handler {
+	return http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		if !acceptsGzip(r) {
+			next.ServeHTTP(w, r)
+			return
+		}
+		gw := &gzipWriter{ResponseWriter: w}
+		defer gw.close()
+		next.ServeHTTP(gw, r)
+	})
+}
+
+type gzipWriter struct {
+	http.ResponseWriter
+	zw          *gzip.Writer // nil unless this response is compressed
+	wroteHeader bool
+}
+
+func (w *gzipWriter) WriteHeader(status int) {
+	if !w.wroteHeader && status >= http.StatusOK {
+		w.wroteHeader = true
+		h := w.Header()
+		n, _ := strconv.Atoi(h.Get("Content-Length"))
+		if status != http.StatusNoContent && status != http.StatusNotModified && n >= minGzipSize &&
+			h.Get("Content-Encoding") == "" && strings.HasPrefix(h.Get("Content-Type"), "application/json") {
+			h.Del("Content-Length")
+			h["Content-Encoding"] = hdrGzip
+			h.Add("Vary", "Accept-Encoding")
+			w.zw = gzipWriters.Get().(*gzip.Writer)
+			w.zw.Reset(w.ResponseWriter)
+		}
+	}
+	w.ResponseWriter.WriteHeader(status)
+}
+
+func (w *gzipWriter) Write(p []byte) (int, error) {
+	if !w.wroteHeader {
+		w.WriteHeader(http.StatusOK)
+	}
+	if w.zw != nil {
+		return w.zw.Write(p)
+	}
+	return w.ResponseWriter.Write(p)
+}
+
+func (w *gzipWriter) Flush() {
+	if w.zw != nil {
+		_ = w.zw.Flush()
+	}
+	if f, ok := w.ResponseWriter.(http.Flusher); ok {
+		f.Flush()
+	}
+}
+
+// Hijack passes the WebSocket upgrade through, like statusWriter's.
+func (w *gzipWriter) Hijack() (net.Conn, *bufio.ReadWriter, error) {
+	hj, ok := w.ResponseWriter.(http.Hijacker)
+	if !ok {
+		return nil, nil, errors.New("response writer does not support hijacking")
+	}
+	return hj.Hijack()
+}
+
+func (w *gzipWriter) close() {
+	if w.zw != nil {
+		_ = w.zw.Close()
+		w.zw.Reset(io.Discard)
+		gzipWriters.Put(w.zw)
+	}
+}
+
+// Security header values, shared like the ones in server.go.
+var (
+	hdrNosniff    = []string{"nosniff"}
+	hdrDeny       = []string{"DENY"}
+	hdrNoReferrer = []string{"no-referrer"}
+)
+
 func (a *App) withSecurity(next http.Handler) http.Handler {
 	return http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
-		w.Header().Set("X-Content-Type-Options", "nosniff")
-		w.Header().Set("X-Frame-Options", "DENY")
-		w.Header().Set("Referrer-Policy", "no-referrer")
+		h := w.Header()
+		h["X-Content-Type-Options"] = hdrNosniff
+		h["X-Frame-Options"] = hdrDeny
+		h["Referrer-Policy"] = hdrNoReferrer
 		next.ServeHTTP(w, r)
 	})
 }
@@ -4,6 +4,7 @@ import (
 	"fmt"
 	"net/http"
 	"sort"
+	"strconv"
 	"strings"
 	"sync"
 	"time"
@@ -15,88 +16,101 @@ type registryEntry struct {
 	Help   string
 	Value  float64
 	Labels map[string]string
+
+	series string // rendered name{labels}, computed once in Add
+	head   string // HELP/TYPE lines plus series and a space, see Add
 }
 
 // MetricRegistry is an in-memory store for push metrics (POST /api/v1/metrics).
 type MetricRegistry struct {
 	mu    sync.Mutex
 	items []registryEntry
+	index map[string]int // series -> position in items
 }
 
-func (r *MetricRegistry) Add(e registryEntry) {
+// Add inserts or replaces the series identified by name + labels. Lookup is
+// by the rendered series string, so repeated pushes of a known series are a
+// map hit instead of a scan over every registered metric. A batch is applied
+// under a single lock acquisition.
+func (r *MetricRegistry) Add(entries ...registryEntry) {
+	for i := range entries {
+		e := &entries[i]
+		e.series = seriesKey(e.Name, e.Labels)
+		// Everything but the value is fixed for the entry, so its exposition
+		// text is rendered here once rather than on every scrape.
+		var head strings.Builder
+		if e.Help != "" {
+			head.WriteString("# HELP " + e.Name + " " + e.Help + "\n")
+		}
+		if e.Type != "" {
+			head.WriteString("# TYPE " + e.Name + " " + e.Type + "\n")
+		}
+		head.WriteString(e.series + " ")
+		e.head = head.String()
+	}
 	r.mu.Lock()
 	defer r.mu.Unlock()
-	for i, it := range r.items {
-		if it.Name == e.Name && labelEqual(it.Labels, e.Labels) {
+	if r.index == nil {
+		r.index = map[string]int{}
+	}
+	for _, e := range entries {
+		if i, ok := r.index[e.series]; ok {
 			r.items[i] = e
-			return
+			continue
 		}
+		r.index[e.series] = len(r.items)
+		r.items = append(r.items, e)
 	}
-	r.items = append(r.items, e)
 }
 
-func (r *MetricRegistry) Snapshot() []registryEntry {
+// appendExposition appends every series in the text exposition format.
+func (r *MetricRegistry) appendExposition(b []byte) []byte {
 	r.mu.Lock()
 	defer r.mu.Unlock()
-	out := make([]registryEntry, len(r.items))
-	copy(out, r.items)
-	return out
+	for i := range r.items {
+		b = append(b, r.items[i].head...)
+		b = strconv.AppendFloat(b, r.items[i].Value, 'g', -1, 64)
+		b = append(b, '\n')
+	}
+	return b
 }
 
-func labelEqual(a, b map[string]string) bool {
-	if len(a) != len(b) {
-		return false
+// seriesKey renders name{k="v",...} with sorted label names, which is both
+// the identity of a series and its exposition-format prefix.
+func seriesKey(name string, labels map[string]string) string {
+	if len(labels) == 0 {
+		return name
 	}
-	for k, v := range a {
-		if b[k] != v {
-			return false
-		}
+	keys := make([]string, 0, len(labels))
+	for k := range labels {
+		keys = append(keys, k)
 	}
-	return true
+	sort.Strings(keys)
+	parts := make([]string, 0, len(keys))
+	for _, k := range keys {
+		parts = append(parts, fmt.Sprintf("%s=%q", k, labels[k]))
+	}
+	return name + "{" + strings.Join(parts, ",") + "}"
 }
 
 func (a *App) handlePrometheusExport(w http.ResponseWriter, r *http.Request) {
-	var sb strings.Builder
-	sb.WriteString("# HELP pymon_uptime_seconds Seconds the server has been up\n")
-	sb.WriteString("# TYPE pymon_uptime_seconds gauge\n")
-	fmt.Fprintf(&sb, "pymon_uptime_seconds %.0f\n", time.Since(a.StartTime).Seconds())
+	b := make([]byte, 0, 4096)
+	b = append(b, "# HELP pymon_uptime_seconds Seconds the server has been up\n"+
+		"# TYPE pymon_uptime_seconds gauge\n"+
+		"pymon_uptime_seconds "...)
+	b = strconv.AppendFloat(b, time.Since(a.StartTime).Seconds(), 'f', 0, 64)
+	b = append(b, '\n')
 
-	if servers, err := a.Store.ListServers(); err == nil {
-		online := 0
-		for _, s := range servers {
-			if s.LastStatus == "up" {
-				online++
-			}
-		}
-		sb.WriteString("# HELP pymon_servers_total Total servers\n# TYPE pymon_servers_total gauge\n")
-		fmt.Fprintf(&sb, "pymon_servers_total %d\n", len(servers))
-		sb.WriteString("# HELP pymon_servers_online Online servers\n# TYPE pymon_servers_online gauge\n")
-		fmt.Fprintf(&sb, "pymon_servers_online %d\n", online)
+	if total, online, err := a.Store.ServerCounts(); err == nil {
+		b = append(b, "# HELP pymon_servers_total Total servers\n# TYPE pymon_servers_total gauge\npymon_servers_total "...)
+		b = strconv.AppendInt(b, int64(total), 10)
+		b = append(b, "\n# HELP pymon_servers_online Online servers\n# TYPE pymon_servers_online gauge\npymon_servers_online "...)
+		b = strconv.AppendInt(b, int64(online), 10)
+		b = append(b, '\n')
 	}
 
-	for _, e := range a.Metrics.Snapshot() {
-		if e.Help != "" {
-			fmt.Fprintf(&sb, "# HELP %s %s\n", e.Name, e.Help)
-		}
-		if e.Type != "" {
-			fmt.Fprintf(&sb, "# TYPE %s %s\n", e.Name, e.Type)
-		}
-		sb.WriteString(e.Name)
-		if len(e.Labels) > 0 {
-			keys := make([]string, 0, len(e.Labels))
-			for k := range e.Labels {
-				keys = append(keys, k)
-			}
-			sort.Strings(keys)
-			var labels []string
-			for _, k := range keys {
-				labels = append(labels, fmt.Sprintf("%s=%q", k, e.Labels[k]))
-			}
-			sb.WriteString("{" + strings.Join(labels, ",") + "}")
-		}
-		fmt.Fprintf(&sb, " %g\n", e.Value)
-	}
+	b = a.Metrics.appendExposition(b)
 
 	w.Header().Set("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
-	_, _ = w.Write([]byte(sb.String()))
+	_, _ = w.Write(b)
 }
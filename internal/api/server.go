@@ -1,12 +1,22 @@
 package api
 
 import (
+	"bytes"
+	"compress/gzip"
+	"crypto/sha256"
 	"embed"
+	"encoding/hex"
 	"encoding/json"
+	"hash/fnv"
 	"io/fs"
+	"mime"
 	"net/http"
+	"path"
+	"regexp"
 	"strconv"
 	"strings"
+	"sync"
+	"sync/atomic"
 	"time"
 
 	"github.com/ajjs1ajjs/Monitoring/internal/auth"
@@ -34,6 +44,8 @@ type App struct {
 	StartTime time.Time
 	Version   Version
 	LogPath   string
+
+	serversJSON atomic.Pointer[genJSON] // see handleListServers
 }
 
 //go:embed all:web
@@ -49,8 +61,10 @@ func (a *App) Handler() http.Handler {
 	mux.HandleFunc("GET /metrics", a.handlePrometheusExport)
 
 	// Authenticated API
-	authed := func(h http.HandlerFunc) http.HandlerFunc { return a.withRecovery(a.withAuth(h)) }
-	admin := func(h http.HandlerFunc) http.HandlerFunc { return a.withRecovery(a.withAuth(a.withAdmin(h))) }
+	authed := func(h http.HandlerFunc) http.HandlerFunc { return a.withRecovery(a.withAuth(withETag(h))) }
+	admin := func(h http.HandlerFunc) http.HandlerFunc {
+		return a.withRecovery(a.withAuth(a.withAdmin(withETag(h))))
+	}
 
 	mux.Handle("GET /api/v1/auth/me", authed(a.handleMe))
 	mux.Handle("POST /api/v1/auth/change-password", authed(a.handleChangePassword))
@@ -65,6 +79,7 @@ func (a *App) Handler() http.Handler {
 
 	mux.Handle("GET /api/v1/servers", authed(a.handleListServers))
 	mux.Handle("POST /api/v1/servers", admin(a.handleCreateServer))
+	mux.Handle("POST /api/v1/servers/bulk", admin(a.handleCreateServers))
 	mux.Handle("GET /api/v1/servers/history", authed(a.handleServersHistory))
 	mux.Handle("GET /api/v1/servers/export", authed(a.handleServersExport))
 	mux.Handle("GET /api/v1/servers/compare", authed(a.handleServersCompare))
@@ -113,55 +128,518 @@ func (a *App) Handler() http.Handler {
 	mux.Handle("POST /api/v1/backup/create", admin(a.handleBackupCreate))
 	mux.Handle("POST /api/v1/backup/restore", admin(a.handleBackupRestore))
 
+	mux.Handle("POST /api/v1/batch", authed(a.handleBatch(mux)))
+
 	// Frontend
-	web, _ := fs.Sub(webFS, "web")
-	fileServer := http.FileServer(http.FS(web))
-	// The embedded FS is rooted at internal/api/web, so the request path
-	// /static/css/dashboard.css maps to static/css/dashboard.css directly.
-	// Do NOT strip the /static/ prefix (that would look up css/... and 404).
-	mux.Handle("/static/", fileServer)
-	mux.HandleFunc("/dashboard/", func(w http.ResponseWriter, r *http.Request) {
-		serveFile(w, r, web, "templates/dashboard.html")
-	})
-	mux.HandleFunc("/dashboard", func(w http.ResponseWriter, r *http.Request) {
-		http.Redirect(w, r, "/dashboard/", http.StatusFound)
-	})
-	mux.HandleFunc("/login", func(w http.ResponseWriter, r *http.Request) {
-		serveFile(w, r, web, "templates/login.html")
-	})
-	mux.HandleFunc("/favicon.ico", func(w http.ResponseWriter, r *http.Request) {
-		serveFile(w, r, web, "static/favicon.svg")
-	})
+	fe := frontend()
+	mux.Handle("/static/", fe.static)
+	mux.Handle("/dashboard/", fe.dashboard)
+	toDashboard := redirect("/dashboard/")
+	mux.Handle("/dashboard", toDashboard)
+	mux.Handle("/login", fe.login)
+	mux.Handle("/favicon.ico", fe.favicon)
 	mux.HandleFunc("/", func(w http.ResponseWriter, r *http.Request) {
 		if r.URL.Path == "/" {
-			http.Redirect(w, r, "/dashboard/", http.StatusFound)
+			toDashboard.ServeHTTP(w, r)
 			return
 		}
 		http.NotFound(w, r)
 	})
 
-	return a.withSecurity(a.withLogging(mux))
+	return a.withSecurity(a.withLogging(withGzip(mux)))
+}
+
+// page is a frontend file read from the embedded FS once, when the handler
+// is built, rather than copied out of it on every request. Text files also
+// keep a gzip copy compressed at the same time, so serving a compressed
+// response costs no CPU. A nil page (file missing from the build) answers
+// 404.
+type page struct {
+	body    []byte
+	gz      []byte // nil when compression does not pay off
+	version string // content hash, see fingerprint
+
+	// Header values, built once and assigned to each response as is.
+	ctype, etag, gzETag []string
+	size, gzSize        []string // Content-Length of body and gz
+	cache               []string // Cache-Control unless the URL is fingerprinted
+}
+
+// Header values shared by every response. Each slice has len == cap, so a
+// later Header().Add copies instead of appending into the shared array.
+var (
+	hdrNoCache   = []string{"no-cache"}
+	hdrImmutable = []string{"public, max-age=31536000, immutable"}
+	hdrShortLive = []string{"public, max-age=60"}
+	hdrVary      = []string{"Accept-Encoding"}
+	hdrGzip      = []string{"gzip"}
+	hdrBytes     = []string{"bytes"}
+)
+
+// frontendPages are the embedded pages and assets, ready to serve.
+type frontendPages struct {
+	static                    assets
+	dashboard, login, favicon *page
+}
+
+// frontend builds the pages once per process rather than once per Handler
+// call: the embedded files never change, and minifying and compressing
+// them is the only costly part of setting up the mux.
+var frontend = sync.OnceValue(func() frontendPages {
+	web, _ := fs.Sub(webFS, "web")
+	// The embedded FS is rooted at internal/api/web, so the request path
+	// /static/css/dashboard.css maps to static/css/dashboard.css directly.
+	// Do NOT strip the /static/ prefix (that would look up css/... and 404).
+	static := loadAssets(web, "static")
+	dashboard := static.fingerprint(loadPage(web, "templates/dashboard.html"))
+	if dashboard != nil {
+		// Reloads and extra tabs within a minute reuse the cached shell
+		// without even a revalidation; its assets are fingerprinted, so a
+		// stale copy still loads matching scripts and styles.
+		dashboard.cache = hdrShortLive
+	}
+	return frontendPages{
+		static:    static,
+		dashboard: dashboard,
+		login:     static.fingerprint(loadPage(web, "templates/login.html")),
+		favicon:   loadPage(web, "static/favicon.svg"),
+	}
+})
+
+// redirect answers with a bodiless 302 to a fixed location. Unlike
+// http.Redirect it does not resolve the target against the request or
+// render an HTML link body on every GET of the site root.
+func redirect(location string) http.HandlerFunc {
+	loc := []string{location}
+	return func(w http.ResponseWriter, r *http.Request) {
+		w.Header()["Location"] = loc
+		w.WriteHeader(http.StatusFound)
+	}
 }
 
-func serveFile(w http.ResponseWriter, r *http.Request, fsys fs.FS, name string) {
+func loadPage(fsys fs.FS, name string) *page {
 	b, err := fs.ReadFile(fsys, name)
 	if err != nil {
+		return nil
+	}
+	return newPage(name, minify(name, b))
+}
+
+// minify drops the bytes that only serve readers of the source: indentation
+// in HTML, comments and layout whitespace in CSS, and comment lines and
+// indentation in JavaScript. It runs once per file at startup.
+func minify(name string, b []byte) []byte {
+	switch path.Ext(name) {
+	case ".html":
+		return trimIndent(b)
+	case ".css":
+		return minifyCSS(b)
+	case ".js":
+		return minifyJS(b)
+	}
+	return b
+}
+
+// trimIndent removes leading whitespace and blank lines. The line break
+// itself is kept, so whitespace between inline elements still renders as
+// one space.
+func trimIndent(b []byte) []byte {
+	out := make([]byte, 0, len(b))
+	for len(b) > 0 {
+		line, rest, _ := bytes.Cut(b, []byte{'\n'})
+		if line = bytes.TrimSpace(line); len(line) > 0 {
+			out = append(append(out, line...), '\n')
+		}
+		b = rest
+	}
+	return out
+}
+
+// minifyCSS strips comments, collapses whitespace runs to one space and
+// drops it around braces and semicolons. Quoted strings are copied as is.
+func minifyCSS(b []byte) []byte {
+	out := make([]byte, 0, len(b))
+	space := false
+	for i := 0; i < len(b); i++ {
+		c := b[i]
+		switch {
+		case c == '/' && i+1 < len(b) && b[i+1] == '*':
+			end := bytes.Index(b[i+2:], []byte("*/"))
+			if end < 0 {
+				return out
+			}
+			i += end + 3
+			continue
+		case c == ' ' || c == '\t' || c == '\n' || c == '\r' || c == '\f':
+			space = true
+			continue
+		}
+		if space && len(out) > 0 && !bytes.ContainsAny(out[len(out)-1:], "{};") && !strings.ContainsRune("{};", rune(c)) {
+			out = append(out, ' ')
+		}
+		space = false
+		if c == '"' || c == '\'' {
+			j := i + 1
+			for j < len(b) && b[j] != c {
+				if b[j] == '\\' {
+					j++
+				}
+				j++
+			}
+			if j >= len(b) {
+				return append(out, b[i:]...)
+			}
+			out = append(out, b[i:j+1]...)
+			i = j
+			continue
+		}
+		out = append(out, c)
+	}
+	return out
+}
+
+// minifyJS removes blank and comment-only lines and trims the others. Line
+// breaks are kept, so automatic semicolon insertion reads the code exactly
+// as before, and text inside template literals (which carries whitespace
+// into the page) is copied as is.
+func minifyJS(b []byte) []byte {
+	out := make([]byte, 0, len(b))
+	var sc jsScanner
+	for len(b) > 0 {
+		line, rest, _ := bytes.Cut(b, []byte{'\n'})
+		b = rest
+		inTemplate := sc.inTemplate()
+		sc.scan(line)
+		switch {
+		case inTemplate:
+			// Leading whitespace is part of the literal.
+			if !sc.inTemplate() {
+				line = bytes.TrimRight(line, " \t\r")
+			}
+		case sc.inTemplate():
+			// Trailing whitespace is part of the literal.
+			line = bytes.TrimLeft(line, " \t")
+		default:
+			line = bytes.TrimSpace(line)
+			if len(line) == 0 || bytes.HasPrefix(line, []byte("//")) {
+				continue
+			}
+		}
+		out = append(append(out, line...), '\n')
+	}
+	return out
+}
+
+// jsScanner tracks, line by line, just enough JavaScript lexical state to
+// tell whether a line break falls inside a template literal: strings,
+// comments, regular expression literals and ${} nesting.
+type jsScanner struct {
+	stack []byte // '`' per open template literal, '{' per brace inside ${}
+	mode  byte   // a quote inside a string, '*' inside a block comment
+	prev  byte   // last significant code byte, to tell a regexp from division
+}
+
+func (sc *jsScanner) inTemplate() bool {
+	return sc.mode == 0 && len(sc.stack) > 0 && sc.stack[len(sc.stack)-1] == '`'
+}
+
+func (sc *jsScanner) scan(line []byte) {
+	defer func() {
+		if sc.mode == '\'' || sc.mode == '"' {
+			sc.mode = 0 // strings end with the line
+		}
+	}()
+	for i := 0; i < len(line); i++ {
+		c := line[i]
+		next := byte(0)
+		if i+1 < len(line) {
+			next = line[i+1]
+		}
+		switch {
+		case sc.mode == '*':
+			if c == '*' && next == '/' {
+				sc.mode = 0
+				i++
+			}
+		case sc.mode != 0:
+			if c == '\\' {
+				i++
+			} else if c == sc.mode {
+				sc.mode, sc.prev = 0, c
+			}
+		case sc.inTemplate():
+			switch {
+			case c == '\\':
+				i++
+			case c == '`':
+				sc.stack, sc.prev = sc.stack[:len(sc.stack)-1], c
+			case c == '$' && next == '{':
+				sc.stack = append(sc.stack, '{')
+				i++
+			}
+		default:
+			switch c {
+			case '\'', '"':
+				sc.mode = c
+				continue
+			case '`':
+				sc.stack = append(sc.stack, '`')
+				continue
+			case '{':
+				if len(sc.stack) > 0 {
+					sc.stack = append(sc.stack, '{')
+				}
+			case '}':
+				if len(sc.stack) > 0 {
+					sc.stack = sc.stack[:len(sc.stack)-1]
+				}
+			case '/':
+				if next == '/' {
+					return
+				}
+				if next == '*' {
+					sc.mode = '*'
+					i++
+					continue
+				}
+				if sc.prev == 0 || strings.IndexByte("(,=:[!&|?{};+-*%<>~^", sc.prev) >= 0 {
+					i = skipRegexp(line, i)
+				}
+			}
+			if c != ' ' && c != '\t' && c != '\r' {
+				sc.prev = c
+			}
+		}
+	}
+}
+
+// skipRegexp returns the index of the slash closing the regular expression
+// literal that opens at line[i].
+func skipRegexp(line []byte, i int) int {
+	class := false
+	for j := i + 1; j < len(line); j++ {
+		switch c := line[j]; {
+		case c == '\\':
+			j++
+		case c == '[':
+			class = true
+		case c == ']':
+			class = false
+		case c == '/' && !class:
+			return j
+		}
+	}
+	return len(line)
+}
+
+func newPage(name string, b []byte) *page {
+	sum := sha256.Sum256(b)
+	// Cacheable but always revalidated by default, so an upgraded binary's
+	// pages and assets are picked up on the next load.
+	p := &page{body: b, version: hex.EncodeToString(sum[:8]), cache: hdrNoCache}
+	if ctype := mime.TypeByExtension(path.Ext(name)); ctype != "" {
+		p.ctype = []string{ctype}
+	}
+	// Embedded files carry no modification time, so without a strong ETag
+	// browsers would re-download every asset. The encoded body is a
+	// different representation and gets its own validator.
+	p.etag = []string{`"` + p.version + `"`}
+	p.size = []string{strconv.Itoa(len(b))}
+	if gz := gzipBytes(b); len(gz) < len(b)-len(b)/10 {
+		p.gz = gz
+		p.gzETag = []string{`"` + p.version + `-gz"`}
+		p.gzSize = []string{strconv.Itoa(len(gz))}
+	}
+	return p
+}
+
+// ServeHTTP does no per-request work beyond header assignment; only range
+// and If-Match requests go through http.ServeContent. Pages are immutable
+// once built, so any number of requests can share one. A revalidation that
+// matches needs only a header compare: it is the common request for the
+// dashboard shell.
+func (p *page) ServeHTTP(w http.ResponseWriter, r *http.Request) {
+	if p == nil {
 		http.NotFound(w, r)
 		return
 	}
-	switch {
-	case strings.HasSuffix(name, ".html"):
-		w.Header().Set("Content-Type", "text/html; charset=utf-8")
-	case strings.HasSuffix(name, ".svg"):
-		w.Header().Set("Content-Type", "image/svg+xml")
+	h := w.Header()
+	body, etag, size := p.body, p.etag, p.size
+	if p.gz != nil {
+		h["Vary"] = hdrVary
+		if acceptsGzip(r) {
+			body, etag, size = p.gz, p.gzETag, p.gzSize
+			h["Content-Encoding"] = hdrGzip
+		}
+	}
+	h["Etag"] = etag
+	if v, ok := strings.CutPrefix(r.URL.RawQuery, "v="); ok && v == p.version {
+		// A fingerprinted URL names these exact bytes; it never changes.
+		h["Cache-Control"] = hdrImmutable
+	} else {
+		h["Cache-Control"] = p.cache
+	}
+	if inm := r.Header.Get("If-None-Match"); inm != "" && (r.Method == http.MethodGet || r.Method == http.MethodHead) &&
+		etagMatches(inm, etag[0]) {
+		w.WriteHeader(http.StatusNotModified)
+		return
+	}
+	if p.ctype != nil {
+		h["Content-Type"] = p.ctype
+	}
+	if r.Header.Get("Range") != "" || r.Header.Get("If-Match") != "" {
+		http.ServeContent(w, r, "", time.Time{}, bytes.NewReader(body))
+		return
+	}
+	// A whole-body GET, by far the common case, is one write of the
+	// prebuilt bytes: no reader, no seeking, no precondition parsing.
+	h["Accept-Ranges"] = hdrBytes
+	h["Content-Length"] = size
+	w.WriteHeader(http.StatusOK)
+	if r.Method != http.MethodHead {
+		_, _ = w.Write(body)
+	}
+}
+
+func gzipBytes(b []byte) []byte {
+	var buf bytes.Buffer
+	zw, _ := gzip.NewWriterLevel(&buf, gzip.BestCompression)
+	_, _ = zw.Write(b)
+	_ = zw.Close()
+	return buf.Bytes()
+}
+
+// acceptsGzip reports whether the request's Accept-Encoding allows gzip
+// (a "gzip;q=0" entry refuses it).
+func acceptsGzip(r *http.Request) bool {
+	for rest := r.Header.Get("Accept-Encoding"); rest != ""; {
+		var part string
+		part, rest, _ = strings.Cut(rest, ",")
+		coding, params, _ := strings.Cut(strings.TrimSpace(part), ";")
+		if !strings.EqualFold(strings.TrimSpace(coding), "gzip") {
+			continue
+		}
+		q := strings.ReplaceAll(params, " ", "")
+		return q != "q=0" && q != "q=0.0" && q != "q=0.00" && q != "q=0.000"
+	}
+	return false
+}
+
+// assets serves every file under a directory of the embedded FS from
+// memory, keyed by request path without the leading slash.
+type assets map[string]*page
+
+func loadAssets(fsys fs.FS, dir string) assets {
+	out := assets{}
+	_ = fs.WalkDir(fsys, dir, func(name string, d fs.DirEntry, err error) error {
+		if err != nil || d.IsDir() {
+			return err
+		}
+		if p := loadPage(fsys, name); p != nil {
+			out[name] = p
+		}
+		return nil
+	})
+	return out
+}
+
+var assetRef = regexp.MustCompile(`"/(static/[^"?]+)(\?[^"]*)?"`)
+
+// fingerprint rewrites the page's references to known assets as
+// /static/...?v=<content hash>. Those URLs are served as immutable, so a
+// browser fetches each asset once per release while the page itself stays
+// a constant, revalidated response.
+func (a assets) fingerprint(p *page) *page {
+	if p == nil {
+		return nil
 	}
-	_, _ = w.Write(b)
+	body := assetRef.ReplaceAllFunc(p.body, func(ref []byte) []byte {
+		m := assetRef.FindSubmatch(ref)
+		asset := a[string(m[1])]
+		if asset == nil {
+			return ref
+		}
+		return []byte(`"/` + string(m[1]) + "?v=" + asset.version + `"`)
+	})
+	q := newPage("", body)
+	q.ctype = p.ctype
+	return q
+}
+
+func (a assets) ServeHTTP(w http.ResponseWriter, r *http.Request) {
+	a[strings.TrimPrefix(r.URL.Path, "/")].ServeHTTP(w, r)
 }
 
+// jsonBufs recycles the buffers responses are encoded into. Buffers that
+// grew past maxPooledJSON (a large history export) are left to the GC.
+var jsonBufs = sync.Pool{New: func() any { return new(bytes.Buffer) }}
+
+const maxPooledJSON = 1 << 20
+
+// writeJSON encodes v into a pooled buffer and sends it in one write with a
+// Content-Length, instead of streaming through the encoder (chunked, and a
+// half-written body on an encoding error).
 func writeJSON(w http.ResponseWriter, status int, v any) {
+	buf := jsonBufs.Get().(*bytes.Buffer)
+	buf.Reset()
+	defer func() {
+		if buf.Cap() <= maxPooledJSON {
+			jsonBufs.Put(buf)
+		}
+	}()
+	if err := json.NewEncoder(buf).Encode(v); err != nil {
+		buf.Reset()
+		buf.WriteString(`{"detail":"Encoding error"}` + "\n")
+		status = http.StatusInternalServerError
+	}
+	writeJSONBytes(w, status, buf.Bytes())
+}
+
+func writeJSONBytes(w http.ResponseWriter, status int, body []byte) {
 	w.Header().Set("Content-Type", "application/json")
+	if ew, ok := w.(*etagWriter); ok && status == http.StatusOK {
+		tag := jsonETag(body)
+		w.Header().Set("ETag", tag)
+		// Browsers may keep the response but must check back every time.
+		w.Header().Set("Cache-Control", "private, no-cache")
+		if etagMatches(ew.ifNoneMatch, tag) {
+			w.WriteHeader(http.StatusNotModified)
+			return
+		}
+	}
+	w.Header().Set("Content-Length", strconv.Itoa(len(body)))
 	w.WriteHeader(status)
-	_ = json.NewEncoder(w).Encode(v)
+	_, _ = w.Write(body)
+}
+
+// jsonETag is a weak validator for an encoded API response. FNV is plenty
+// to tell one poll's body from the next and much cheaper than sha256.
+func jsonETag(body []byte) string {
+	h := fnv.New64a()
+	_, _ = h.Write(body)
+	return `W/"` + strconv.FormatUint(h.Sum64(), 16) + `"`
+}
+
+// etagMatches reports whether an If-None-Match header names tag, comparing
+// weakly as RFC 9110 requires for If-None-Match.
+func etagMatches(header, tag string) bool {
+	tag = strings.TrimPrefix(tag, "W/")
+	for rest := header; rest != ""; {
+		var part string
+		part, rest, _ = strings.Cut(rest, ",")
+		part = strings.TrimSpace(part)
+		if part == "*" || strings.TrimPrefix(part, "W/") == tag {
+			return true
+		}
+	}
+	return false
+}
+
+// statusOK is the body most write endpoints answer with, encoded once.
+var statusOK = []byte(`{"status":"ok"}` + "\n")
+
+func writeOK(w http.ResponseWriter) {
+	writeJSONBytes(w, http.StatusOK, statusOK)
 }
 
 func writeErr(w http.ResponseWriter, status int, msg string) {
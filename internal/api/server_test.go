@@ -2,10 +2,14 @@ package api
 
 import (
 	"bytes"
+	"compress/gzip"
 	"encoding/json"
+	"io"
 	"net/http"
 	"net/http/httptest"
 	"path/filepath"
+	"reflect"
+	"strconv"
 	"strings"
 	"testing"
 	"time"
@@ -13,6 +17,7 @@ import (
 	"github.com/ajjs1ajjs/Monitoring/internal/auth"
 	"github.com/ajjs1ajjs/Monitoring/internal/config"
 	"github.com/ajjs1ajjs/Monitoring/internal/storage"
+	"github.com/gorilla/websocket"
 )
 
 func newTestApp(t *testing.T) (*App, string) {
@@ -111,6 +116,12 @@ func TestServerLifecycle(t *testing.T) {
 	if rec.Code != http.StatusOK {
 		t.Fatalf("create server = %d: %s", rec.Code, rec.Body.String())
 	}
+	rec = doAuth(t, h, http.MethodPost, "/api/v1/servers", token, map[string]any{
+		"name": "web-02", "host": "192.168.1.11", "agent_port": -1,
+	})
+	if rec.Code != http.StatusBadRequest {
+		t.Fatalf("create with port -1 = %d: %s", rec.Code, rec.Body.String())
+	}
 
 	// list
 	rec = doAuth(t, h, http.MethodGet, "/api/v1/servers", token, nil)
@@ -132,6 +143,23 @@ func TestServerLifecycle(t *testing.T) {
 		t.Fatalf("summary = %d", rec.Code)
 	}
 
+	// update: a wrongly typed field is a 400, absent fields are kept
+	rec = doAuth(t, h, http.MethodPut, "/api/v1/servers/"+itoa(id), token, map[string]any{"agent_port": "9100"})
+	if rec.Code != http.StatusBadRequest {
+		t.Fatalf("update with string port = %d: %s", rec.Code, rec.Body.String())
+	}
+	rec = doAuth(t, h, http.MethodPut, "/api/v1/servers/"+itoa(id), token, map[string]any{"agent_port": 70000})
+	if rec.Code != http.StatusBadRequest {
+		t.Fatalf("update with port 70000 = %d: %s", rec.Code, rec.Body.String())
+	}
+	rec = doAuth(t, h, http.MethodPut, "/api/v1/servers/"+itoa(id), token, map[string]any{"agent_port": 9200, "enabled": false})
+	if rec.Code != http.StatusOK {
+		t.Fatalf("update = %d: %s", rec.Code, rec.Body.String())
+	}
+	if s, _ := app.Store.GetServer(id); s == nil || s.AgentPort != 9200 || s.Enabled != 0 || s.Name != "web-01" {
+		t.Fatalf("updated server = %+v", s)
+	}
+
 	// delete
 	rec = doAuth(t, h, http.MethodDelete, "/api/v1/servers/"+itoa(id), token, nil)
 	if rec.Code != http.StatusOK {
@@ -139,6 +167,74 @@ func TestServerLifecycle(t *testing.T) {
 	}
 }
 
+func TestBulkCreateServers(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+
+	// one bad entry rejects the whole list
+	rec := doAuth(t, h, http.MethodPost, "/api/v1/servers/bulk", token, map[string]any{
+		"servers": []map[string]any{
+			{"name": "web-01", "host": "10.0.0.1"},
+			{"name": "web-02", "host": "bad host"},
+		},
+	})
+	if rec.Code != http.StatusBadRequest {
+		t.Fatalf("bulk with bad host = %d: %s", rec.Code, rec.Body.String())
+	}
+	if servers, _ := app.Store.ListServers(); len(servers) != 0 {
+		t.Fatalf("servers after rejected bulk = %d, want 0", len(servers))
+	}
+
+	rec = doAuth(t, h, http.MethodPost, "/api/v1/servers/bulk", token, map[string]any{
+		"servers": []map[string]any{
+			{"name": "web-01", "host": "10.0.0.1"},
+			{"name": "win-01", "host": "10.0.0.2", "os_type": "windows"},
+		},
+	})
+	if rec.Code != http.StatusOK {
+		t.Fatalf("bulk = %d: %s", rec.Code, rec.Body.String())
+	}
+	var resp struct {
+		IDs []int64 `json:"ids"`
+	}
+	_ = json.Unmarshal(rec.Body.Bytes(), &resp)
+	if len(resp.IDs) != 2 {
+		t.Fatalf("ids = %v", resp.IDs)
+	}
+	if s, _ := app.Store.GetServer(resp.IDs[1]); s == nil || s.Name != "win-01" || s.AgentPort != 9182 {
+		t.Fatalf("second server = %+v", s)
+	}
+}
+
+func TestServerListCacheFollowsWrites(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	count := func() int {
+		rec := doAuth(t, h, http.MethodGet, "/api/v1/servers", token, nil)
+		var list struct {
+			Servers []storage.Server `json:"servers"`
+		}
+		if err := json.Unmarshal(rec.Body.Bytes(), &list); err != nil {
+			t.Fatalf("list = %d %s", rec.Code, rec.Body.String())
+		}
+		return len(list.Servers)
+	}
+	if n := count(); n != 0 {
+		t.Fatalf("servers = %d, want 0", n)
+	}
+	id, _ := app.Store.CreateServer(&storage.Server{Name: "a", Host: "h", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	if n := count(); n != 1 {
+		t.Fatalf("after create servers = %d, want 1", n)
+	}
+	_ = app.Store.WriteScrapes([]storage.ScrapeWrite{{ServerID: id, Up: true, Timestamp: storage.Now(), CPU: 42, DiskInfo: "{}"}})
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/servers", token, nil)
+	if !strings.Contains(rec.Body.String(), `"cpu_percent":42`) {
+		t.Errorf("list after scrape = %s", rec.Body.String())
+	}
+}
+
 func TestNonAdminForbiddenOnAdminRoutes(t *testing.T) {
 	app, _ := newTestApp(t)
 	h := app.Handler()
@@ -193,6 +289,85 @@ func TestPrometheusExport(t *testing.T) {
 	if !strings.Contains(rec.Body.String(), "pymon_uptime_seconds") {
 		t.Fatalf("metrics body missing uptime")
 	}
+
+	app.Metrics.Add(registryEntry{Name: "jobs", Type: "gauge", Help: "Queued jobs", Value: 2.5,
+		Labels: map[string]string{"q": "a"}})
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/metrics", nil))
+	want := "# HELP jobs Queued jobs\n# TYPE jobs gauge\njobs{q=\"a\"} 2.5\n"
+	if !strings.HasSuffix(rec.Body.String(), want) {
+		t.Errorf("metrics body = %q, want suffix %q", rec.Body.String(), want)
+	}
+}
+
+func TestMetricRegistryReplacesSeries(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	app.Metrics.Add(registryEntry{Name: "jobs", Value: 1, Labels: map[string]string{"b": "2", "a": "1"}})
+	app.Metrics.Add(registryEntry{Name: "jobs", Value: 1, Labels: map[string]string{"a": "x"}})
+	app.Metrics.Add(registryEntry{Name: "jobs", Value: 5, Labels: map[string]string{"a": "1", "b": "2"}})
+	rec := httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/metrics", nil))
+	want := "jobs{a=\"1\",b=\"2\"} 5\njobs{a=\"x\"} 1\n"
+	if !strings.HasSuffix(rec.Body.String(), want) {
+		t.Errorf("metrics body = %q, want suffix %q", rec.Body.String(), want)
+	}
+}
+
+func TestPushMetricsBatch(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	rec := doAuth(t, h, http.MethodPost, "/api/v1/metrics", token, map[string]any{"name": "one", "value": 1})
+	if rec.Code != http.StatusOK {
+		t.Fatalf("single push = %d: %s", rec.Code, rec.Body.String())
+	}
+	rec = doAuth(t, h, http.MethodPost, "/api/v1/metrics", token, []map[string]any{
+		{"name": "jobs", "value": 2, "labels": []map[string]string{{"name": "q", "value": "a"}}},
+		{"name": "jobs", "value": 3, "labels": []map[string]string{{"name": "q", "value": "b"}}},
+	})
+	if rec.Code != http.StatusOK || !strings.Contains(rec.Body.String(), `"count":2`) {
+		t.Fatalf("batch push = %d: %s", rec.Code, rec.Body.String())
+	}
+	if got, _ := app.Store.RecentMetrics(10); len(got) != 3 {
+		t.Errorf("stored %d metrics, want 3", len(got))
+	}
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/metrics", nil))
+	for _, series := range []string{"\none 1\n", "\njobs{q=\"a\"} 2\n", "\njobs{q=\"b\"} 3\n"} {
+		if !strings.Contains(rec.Body.String(), series) {
+			t.Errorf("metrics body missing %q:\n%s", series, rec.Body.String())
+		}
+	}
+	rec = doAuth(t, h, http.MethodPost, "/api/v1/metrics", token, []map[string]any{{"name": "x"}})
+	if rec.Code != http.StatusBadRequest {
+		t.Errorf("batch without value = %d, want 400", rec.Code)
+	}
+}
+
+func TestImportPrometheusDeduplicatesTargets(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	yml := "scrape_configs:\n" +
+		"  - job_name: node\n" +
+		"    static_configs:\n" +
+		"      - targets: ['10.0.0.1:9100', '10.0.0.1:9100', '10.0.0.2:9182', 'https://example.com']\n"
+	for i := 0; i < 2; i++ {
+		rec := doAuth(t, h, http.MethodPost, "/api/v1/settings/config/import-prometheus", token,
+			map[string]string{"yaml_content": yml})
+		if rec.Code != http.StatusOK {
+			t.Fatalf("import = %d: %s", rec.Code, rec.Body.String())
+		}
+	}
+	servers, _ := app.Store.ListServers()
+	if len(servers) != 2 {
+		t.Errorf("servers = %d, want 2", len(servers))
+	}
+	services, _ := app.Store.ListServices()
+	if len(services) != 1 {
+		t.Errorf("services = %d, want 1", len(services))
+	}
 }
 
 func TestStaticAssetsServed(t *testing.T) {
@@ -220,6 +395,13 @@ func TestStaticAssetsServed(t *testing.T) {
 	if rec.Code != http.StatusOK || !strings.Contains(rec.Body.String(), "PyMon") {
 		t.Fatalf("dashboard = %d", rec.Code)
 	}
+	for _, path := range []string{"/login", "/favicon.ico"} {
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, path, nil))
+		if rec.Code != http.StatusOK || rec.Body.Len() == 0 {
+			t.Errorf("%s = %d (%d bytes)", path, rec.Code, rec.Body.Len())
+		}
+	}
 }
 
 func itoa(i int64) string {
@@ -235,6 +417,470 @@ func jsonNumber(i int64) string {
 	return string(b)
 }
 
+func TestRootRedirectsToDashboard(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	for _, path := range []string{"/", "/dashboard"} {
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, path, nil))
+		if rec.Code != http.StatusFound || rec.Header().Get("Location") != "/dashboard/" {
+			t.Errorf("%s = %d, Location %q", path, rec.Code, rec.Header().Get("Location"))
+		}
+	}
+}
+
+func TestAssetsRevalidateWithETag(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	for _, path := range []string{"/dashboard/", "/static/js/dashboard.js"} {
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, path, nil))
+		tag := rec.Header().Get("ETag")
+		if rec.Code != http.StatusOK || tag == "" {
+			t.Fatalf("%s = %d, etag %q", path, rec.Code, tag)
+		}
+		req := httptest.NewRequest(http.MethodGet, path, nil)
+		req.Header.Set("If-None-Match", tag)
+		rec = httptest.NewRecorder()
+		h.ServeHTTP(rec, req)
+		if rec.Code != http.StatusNotModified || rec.Body.Len() != 0 {
+			t.Errorf("%s revalidation = %d (%d bytes), want 304", path, rec.Code, rec.Body.Len())
+		}
+		if rec.Header().Get("ETag") != tag || rec.Header().Get("Content-Type") != "" {
+			t.Errorf("%s 304 headers = %v", path, rec.Header())
+		}
+	}
+}
+
+func TestAssetsWholeAndRangeRequests(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	rec := httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/static/js/dashboard.js", nil))
+	if rec.Code != http.StatusOK || rec.Header().Get("Content-Length") != strconv.Itoa(rec.Body.Len()) {
+		t.Fatalf("GET = %d, Content-Length %q for %d bytes", rec.Code, rec.Header().Get("Content-Length"), rec.Body.Len())
+	}
+	whole := rec.Body.Bytes()
+	req := httptest.NewRequest(http.MethodGet, "/static/js/dashboard.js", nil)
+	req.Header.Set("Range", "bytes=0-9")
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, req)
+	if rec.Code != http.StatusPartialContent || !bytes.Equal(rec.Body.Bytes(), whole[:10]) {
+		t.Errorf("range GET = %d, %q", rec.Code, rec.Body.String())
+	}
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodHead, "/static/js/dashboard.js", nil))
+	if rec.Code != http.StatusOK || rec.Body.Len() != 0 || rec.Header().Get("Content-Length") != strconv.Itoa(len(whole)) {
+		t.Errorf("HEAD = %d, %d bytes, Content-Length %q", rec.Code, rec.Body.Len(), rec.Header().Get("Content-Length"))
+	}
+}
+
+func TestAssetsServedGzipped(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	for _, path := range []string{"/dashboard/", "/static/js/dashboard.js"} {
+		plain := httptest.NewRecorder()
+		h.ServeHTTP(plain, httptest.NewRequest(http.MethodGet, path, nil))
+		req := httptest.NewRequest(http.MethodGet, path, nil)
+		req.Header.Set("Accept-Encoding", "br, gzip")
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, req)
+		if rec.Header().Get("Content-Encoding") != "gzip" || rec.Header().Get("Vary") != "Accept-Encoding" {
+			t.Fatalf("%s headers = %v", path, rec.Header())
+		}
+		if rec.Header().Get("ETag") == plain.Header().Get("ETag") {
+			t.Errorf("%s gzip and identity bodies share an ETag", path)
+		}
+		zr, err := gzip.NewReader(rec.Body)
+		if err != nil {
+			t.Fatal(err)
+		}
+		got, err := io.ReadAll(zr)
+		if err != nil || !bytes.Equal(got, plain.Body.Bytes()) {
+			t.Errorf("%s gzip body does not match identity body (err %v)", path, err)
+		}
+	}
+}
+
+func TestLargeJSONServedGzipped(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	for i := int64(0); i < 10; i++ {
+		doAuth(t, h, http.MethodPost, "/api/v1/servers", token, map[string]any{
+			"name": "web-" + itoa(i), "host": "10.0.0." + itoa(i+1),
+		})
+	}
+	get := func(path, encoding string) *httptest.ResponseRecorder {
+		req := httptest.NewRequest(http.MethodGet, path, nil)
+		req.Header.Set("Authorization", "Bearer "+token)
+		req.Header.Set("Accept-Encoding", encoding)
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, req)
+		return rec
+	}
+	plain := get("/api/v1/servers", "identity")
+	if plain.Header().Get("Content-Encoding") != "" || plain.Body.Len() < minGzipSize {
+		t.Fatalf("identity response: %v, %d bytes", plain.Header(), plain.Body.Len())
+	}
+	rec := get("/api/v1/servers", "gzip")
+	if rec.Header().Get("Content-Encoding") != "gzip" || rec.Header().Get("Content-Length") != "" {
+		t.Fatalf("gzip response headers = %v", rec.Header())
+	}
+	zr, err := gzip.NewReader(rec.Body)
+	if err != nil {
+		t.Fatal(err)
+	}
+	got, err := io.ReadAll(zr)
+	if err != nil || !bytes.Equal(got, plain.Body.Bytes()) {
+		t.Errorf("gzip body does not match identity body (err %v)", err)
+	}
+	if rec := get("/api/v1/auth/me", "gzip"); rec.Header().Get("Content-Encoding") != "" {
+		t.Errorf("small response compressed: %v", rec.Header())
+	}
+}
+
+func TestFingerprintedAssetsImmutable(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	rec := httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/dashboard/", nil))
+	if cc := rec.Header().Get("Cache-Control"); cc != "public, max-age=60" {
+		t.Errorf("dashboard Cache-Control = %q, want public, max-age=60", cc)
+	}
+	body := rec.Body.String()
+	i := strings.Index(body, "/static/js/dashboard.js?v=")
+	if i < 0 {
+		t.Fatal("dashboard does not reference a fingerprinted dashboard.js")
+	}
+	ref := body[i : i+strings.IndexByte(body[i:], '"')]
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, ref, nil))
+	if rec.Code != http.StatusOK || !strings.Contains(rec.Header().Get("Cache-Control"), "immutable") {
+		t.Errorf("%s = %d, Cache-Control %q", ref, rec.Code, rec.Header().Get("Cache-Control"))
+	}
+	rec = httptest.NewRecorder()
+	h.ServeHTTP(rec, httptest.NewRequest(http.MethodGet, "/static/js/dashboard.js?v=stale", nil))
+	if cc := rec.Header().Get("Cache-Control"); cc != "no-cache" {
+		t.Errorf("stale version Cache-Control = %q, want no-cache", cc)
+	}
+}
+
+func TestMinify(t *testing.T) {
+	css := "/* layout */\n.a .b {\n    color: red;\n    content: \"x  /* y */\";\n}\n\n@media (max-width: 600px) {\n  .c { margin: 0 auto; }\n}\n"
+	want := `.a .b{color: red;content: "x  /* y */";}@media (max-width: 600px){.c{margin: 0 auto;}}`
+	if got := string(minify("x.css", []byte(css))); got != want {
+		t.Errorf("css = %q, want %q", got, want)
+	}
+	html := "<div>\n    <span>a</span>\n\n    <span>b</span>\n</div>\n"
+	if got := string(minify("x.html", []byte(html))); got != "<div>\n<span>a</span>\n<span>b</span>\n</div>\n" {
+		t.Errorf("html = %q", got)
+	}
+	js := "// setup\nif (a) {\n    b(); // call\n\n    el.innerHTML = `\n        <p>${x.map(y => `\n  ${y}`)}</p> `;\n    s = '`'; r = /`/;\n}\n"
+	want = "if (a) {\nb(); // call\nel.innerHTML = `\n        <p>${x.map(y => `\n  ${y}`)}</p> `;\ns = '`'; r = /`/;\n}\n"
+	if got := string(minify("x.js", []byte(js))); got != want {
+		t.Errorf("js = %q, want %q", got, want)
+	}
+}
+
+func TestAppendMetricPointsMatchesEncodingJSON(t *testing.T) {
+	f := func(v float64) *float64 { return &v }
+	ps := []storage.MetricPoint{
+		{ID: 1, ServerID: 2, CPUPercent: f(12.5), MemoryPercent: f(1e-9), DiskPercent: f(3e21), NetworkRX: f(-0.25)},
+		{ID: 3, DiskInfo: `{"/":{"used":1}} <&> ` + "\u2028\xff\t\x01", Timestamp: "2026-01-01T00:00:00"},
+	}
+	want, _ := json.Marshal(ps)
+	if got := appendMetricPoints(nil, ps); !bytes.Equal(got, want) {
+		t.Errorf("got  %s\nwant %s", got, want)
+	}
+	if got := appendMetricPoints(nil, nil); string(got) != "[]" {
+		t.Errorf("empty = %s", got)
+	}
+}
+
+func TestListServersMatchesEncodingJSON(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	id, _ := app.Store.CreateServer(&storage.Server{Name: "web <01>", Host: "10.0.0.1", AgentPort: 9100, Enabled: 1,
+		ScrapeInterval: 15, Volumes: `["/"]`, Labels: `{"env":"prod"}`})
+	_ = app.Store.UpdateServer(id, map[string]any{"last_status": "up", "cpu_percent": 12.5, "memory_percent": 1e-9,
+		"disk_percent": 99.99, "error_message": "bad \"x\"\n\b\f", "flapping_count": 3})
+	app.Store.CreateServer(&storage.Server{Name: "win", Host: "h", OSType: "windows\u2028", Volumes: "[]", Labels: "{}"})
+
+	servers, _ := app.Store.ListServers()
+	want, _ := json.Marshal(map[string]any{"servers": servers})
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/servers", token, nil)
+	if got := bytes.TrimSpace(rec.Body.Bytes()); rec.Code != http.StatusOK || !bytes.Equal(got, want) {
+		t.Errorf("%d\ngot  %s\nwant %s", rec.Code, got, want)
+	}
+}
+
+func TestNotificationSettingsRoundTrip(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/settings/notifications", token, nil)
+	if rec.Code != http.StatusOK || strings.TrimSpace(rec.Body.String()) != "{}" {
+		t.Fatalf("empty settings = %d %q", rec.Code, rec.Body.String())
+	}
+	saved := map[string]any{"enabled": true, "telegram": map[string]any{"chat_id": "<1>", "token": "t"}}
+	if rec := doAuth(t, h, http.MethodPost, "/api/v1/settings/notifications", token, saved); rec.Code != http.StatusOK {
+		t.Fatalf("save = %d: %s", rec.Code, rec.Body.String())
+	}
+	rec = doAuth(t, h, http.MethodGet, "/api/v1/settings/notifications", token, nil)
+	var got map[string]any
+	if err := json.Unmarshal(rec.Body.Bytes(), &got); err != nil || !reflect.DeepEqual(got, saved) {
+		t.Errorf("settings = %s (%v), want %v", rec.Body.String(), err, saved)
+	}
+}
+
+func TestWSBroadcastDoesNotWaitForClients(t *testing.T) {
+	app, _ := newTestApp(t)
+	srv := httptest.NewServer(app.Handler())
+	defer srv.Close()
+	token := loginToken(t, srv.Config.Handler)
+	conn, _, err := websocket.DefaultDialer.Dial("ws"+strings.TrimPrefix(srv.URL, "http")+"/api/v1/ws/metrics", nil)
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer conn.Close()
+	if err := conn.WriteJSON(map[string]string{"type": "auth", "token": token}); err != nil {
+		t.Fatal(err)
+	}
+	for deadline := time.Now().Add(5 * time.Second); ; time.Sleep(10 * time.Millisecond) {
+		app.WS.mu.Lock()
+		n := len(app.WS.clients)
+		app.WS.mu.Unlock()
+		if n == 1 {
+			break
+		}
+		if time.Now().After(deadline) {
+			t.Fatal("client never registered")
+		}
+	}
+	app.WS.Broadcast(map[string]any{"type": "metrics_updated", "server_id": 7})
+	_ = conn.SetReadDeadline(time.Now().Add(5 * time.Second))
+	_, msg, err := conn.ReadMessage()
+	if err != nil || string(msg) != `{"server_id":7,"type":"metrics_updated"}` {
+		t.Fatalf("message = %q, %v", msg, err)
+	}
+	// The client stops reading; broadcasts must still return at once.
+	start := time.Now()
+	for i := 0; i < 10000; i++ {
+		app.WS.Broadcast(map[string]any{"type": "metrics_updated", "server_id": i, "pad": strings.Repeat("x", 1024)})
+	}
+	if d := time.Since(start); d > 5*time.Second {
+		t.Errorf("broadcasts to a stalled client took %v", d)
+	}
+}
+
+func TestBatchServesEachPath(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	rec := doAuth(t, h, http.MethodPost, "/api/v1/batch", token, map[string]any{"requests": []string{
+		"/api/v1/servers", "/api/v1/audit-log?limit=1", "/api/v1/servers", "/login", "/api/v1/batch",
+	}})
+	if rec.Code != http.StatusOK {
+		t.Fatalf("batch = %d: %s", rec.Code, rec.Body.String())
+	}
+	var resp struct {
+		Results []struct {
+			Status int             `json:"status"`
+			Body   json.RawMessage `json:"body"`
+		} `json:"results"`
+	}
+	if err := json.Unmarshal(rec.Body.Bytes(), &resp); err != nil || len(resp.Results) != 5 {
+		t.Fatalf("batch body = %s", rec.Body.String())
+	}
+	want := []int{http.StatusOK, http.StatusOK, http.StatusOK, http.StatusBadRequest, http.StatusBadRequest}
+	for i, r := range resp.Results {
+		if r.Status != want[i] {
+			t.Errorf("result %d status = %d, want %d (%s)", i, r.Status, want[i], r.Body)
+		}
+	}
+	if !strings.Contains(string(resp.Results[0].Body), `"servers"`) ||
+		!strings.Contains(string(resp.Results[1].Body), `"logs"`) {
+		t.Errorf("batch bodies = %s", rec.Body.String())
+	}
+
+	rec = doAuth(t, h, http.MethodPost, "/api/v1/batch", "bad", map[string]any{"requests": []string{"/api/v1/servers"}})
+	if rec.Code != http.StatusUnauthorized {
+		t.Errorf("unauthenticated batch = %d, want 401", rec.Code)
+	}
+}
+
+func TestAPIRevalidatesWithETag(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/servers", token, nil)
+	tag := rec.Header().Get("ETag")
+	if rec.Code != http.StatusOK || !strings.HasPrefix(tag, `W/"`) {
+		t.Fatalf("servers = %d, etag %q", rec.Code, tag)
+	}
+	get := func(inm string) *httptest.ResponseRecorder {
+		req := httptest.NewRequest(http.MethodGet, "/api/v1/servers", nil)
+		req.Header.Set("Authorization", "Bearer "+token)
+		req.Header.Set("If-None-Match", inm)
+		rec := httptest.NewRecorder()
+		h.ServeHTTP(rec, req)
+		return rec
+	}
+	if rec := get(tag); rec.Code != http.StatusNotModified || rec.Body.Len() != 0 {
+		t.Errorf("unchanged revalidation = %d (%d bytes), want 304", rec.Code, rec.Body.Len())
+	}
+	app.Store.CreateServer(&storage.Server{Name: "new", Host: "h", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	if rec := get(tag); rec.Code != http.StatusOK || !strings.Contains(rec.Body.String(), `"new"`) {
+		t.Errorf("changed revalidation = %d, want 200 with the new server", rec.Code)
+	}
+}
+
+func TestWriteJSON(t *testing.T) {
+	rec := httptest.NewRecorder()
+	writeJSON(rec, http.StatusCreated, map[string]any{"id": 7})
+	if rec.Code != http.StatusCreated || rec.Body.String() != "{\"id\":7}\n" {
+		t.Fatalf("writeJSON = %d %q", rec.Code, rec.Body.String())
+	}
+	if cl := rec.Header().Get("Content-Length"); cl != strconv.Itoa(rec.Body.Len()) {
+		t.Errorf("Content-Length = %q, body %d bytes", cl, rec.Body.Len())
+	}
+	rec = httptest.NewRecorder()
+	writeJSON(rec, http.StatusOK, map[string]any{"bad": make(chan int)})
+	if rec.Code != http.StatusInternalServerError || !strings.Contains(rec.Body.String(), "Encoding error") {
+		t.Errorf("unencodable value = %d %q", rec.Code, rec.Body.String())
+	}
+	rec = httptest.NewRecorder()
+	writeOK(rec)
+	var got map[string]string
+	if err := json.Unmarshal(rec.Body.Bytes(), &got); err != nil || got["status"] != "ok" {
+		t.Errorf("writeOK = %q", rec.Body.String())
+	}
+}
+
+func TestServersCompare(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	id, _ := app.Store.CreateServer(&storage.Server{Name: "web", Host: "h", AgentPort: 9100,
+		Enabled: 1, Volumes: "[]", Labels: "{}"})
+	// One row per minute bucket, so history keeps all three.
+	for i, cpu := range []any{10.0, 30.0, nil} {
+		at := storage.Stamp(time.Now().Add(-time.Duration(5*i+1) * time.Minute))
+		if _, err := app.Store.DB.Exec(`INSERT INTO metrics_history (server_id, cpu_percent, memory_percent, timestamp)
+			VALUES (?, ?, 50, ?)`, id, cpu, at); err != nil {
+			t.Fatal(err)
+		}
+	}
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/servers/compare?metric=cpu", token, nil)
+	var resp struct {
+		Servers []serverStat `json:"servers"`
+	}
+	if err := json.Unmarshal(rec.Body.Bytes(), &resp); err != nil || len(resp.Servers) != 1 {
+		t.Fatalf("compare = %d %s", rec.Code, rec.Body.String())
+	}
+	want := serverStat{ServerID: id, ServerName: "web", Metric: "cpu", Average: 20, Min: 10, Max: 30, DataPoints: 2}
+	if resp.Servers[0] != want {
+		t.Errorf("compare row = %+v, want %+v", resp.Servers[0], want)
+	}
+}
+
+func TestMetricsTrendSortedAverages(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	base := time.Now().Add(-30 * time.Minute)
+	for s := 0; s < 2; s++ {
+		id, _ := app.Store.CreateServer(&storage.Server{Name: "s" + strconv.Itoa(s), Host: "h", AgentPort: 9100,
+			Enabled: 1, Volumes: "[]", Labels: "{}"})
+		for i := 0; i < 3; i++ {
+			at := storage.Stamp(base.Add(time.Duration(i) * 5 * time.Minute))
+			if _, err := app.Store.DB.Exec(`INSERT INTO metrics_history (server_id, cpu_percent, timestamp)
+				VALUES (?, ?, ?)`, id, 10*(s+1), at); err != nil {
+				t.Fatal(err)
+			}
+		}
+	}
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/metrics/trend?range=1h", token, nil)
+	var resp struct {
+		History []struct {
+			Timestamp string  `json:"timestamp"`
+			CPUAvg    float64 `json:"cpu_avg"`
+			MemAvg    float64 `json:"mem_avg"`
+		} `json:"history"`
+	}
+	if err := json.Unmarshal(rec.Body.Bytes(), &resp); err != nil || len(resp.History) != 3 {
+		t.Fatalf("trend = %d %s", rec.Code, rec.Body.String())
+	}
+	for i, p := range resp.History {
+		if i > 0 && p.Timestamp <= resp.History[i-1].Timestamp {
+			t.Errorf("trend not in time order: %q after %q", p.Timestamp, resp.History[i-1].Timestamp)
+		}
+		if p.CPUAvg != 15 || p.MemAvg != 0 {
+			t.Errorf("bucket %s = cpu %v mem %v, want 15 and 0", p.Timestamp, p.CPUAvg, p.MemAvg)
+		}
+	}
+}
+
+func TestServerHistoryNDJSON(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	id, _ := app.Store.CreateServer(&storage.Server{Name: "web", Host: "h", AgentPort: 9100,
+		Enabled: 1, Volumes: "[]", Labels: "{}"})
+	for i := 0; i < 2; i++ {
+		at := storage.Stamp(time.Now().Add(-time.Duration(5*i+1) * time.Minute))
+		if _, err := app.Store.DB.Exec(`INSERT INTO metrics_history (server_id, cpu_percent, timestamp)
+			VALUES (?, 10, ?)`, id, at); err != nil {
+			t.Fatal(err)
+		}
+	}
+	path := "/api/v1/metrics/history/" + strconv.FormatInt(id, 10)
+	req := httptest.NewRequest(http.MethodGet, path, nil)
+	req.Header.Set("Authorization", "Bearer "+token)
+	req.Header.Set("Accept", "application/x-ndjson")
+	rec := httptest.NewRecorder()
+	h.ServeHTTP(rec, req)
+	if rec.Code != http.StatusOK || rec.Header().Get("Content-Type") != "application/x-ndjson" {
+		t.Fatalf("ndjson history = %d %q", rec.Code, rec.Header().Get("Content-Type"))
+	}
+	lines := strings.Split(strings.TrimSpace(rec.Body.String()), "\n")
+	if len(lines) != 2 {
+		t.Fatalf("ndjson lines = %q", rec.Body.String())
+	}
+	for _, line := range lines {
+		var p storage.MetricPoint
+		if err := json.Unmarshal([]byte(line), &p); err != nil || p.ServerID != id || p.CPUPercent == nil {
+			t.Errorf("ndjson line %q: %v", line, err)
+		}
+	}
+	// Without the Accept header the endpoint still answers one JSON object.
+	rec = doAuth(t, h, http.MethodGet, path, token, nil)
+	if !strings.HasPrefix(rec.Body.String(), `{"history":[`) {
+		t.Errorf("json history = %q", rec.Body.String())
+	}
+}
+
+func TestServerReportEscapesValues(t *testing.T) {
+	app, _ := newTestApp(t)
+	h := app.Handler()
+	token := loginToken(t, h)
+	id, _ := app.Store.CreateServer(&storage.Server{Name: `O'Brien <b>`, Host: "h", AgentPort: 9100,
+		Enabled: 1, Volumes: "[]", Labels: "{}"})
+	rec := doAuth(t, h, http.MethodGet, "/api/v1/reports/server/"+strconv.FormatInt(id, 10), token, nil)
+	if rec.Code != http.StatusOK {
+		t.Fatalf("report = %d: %s", rec.Code, rec.Body.String())
+	}
+	body := rec.Body.String()
+	if strings.Contains(body, "<b>") || !strings.Contains(body, "O&#39;Brien &lt;b&gt;") {
+		t.Errorf("server name not escaped in report")
+	}
+	if !strings.Contains(body, "const labels = [];") {
+		t.Errorf("empty history should render an empty series")
+	}
+}
+
 // TestEmptyListsAreArrays guards against nil slices being marshaled as JSON
 // null (Go marshals nil slices to null, which the frontend's .forEach/.map
 // calls cannot handle).
@@ -1,3 +1,33 @@
+// Overview chart cards differ only in metric, icon and title, so the page
+// carries one template here instead of five copies of the markup. Built
+// before the icons are initialised and before initOverviewCharts looks up
+// the canvases.
+const overviewCards = [
+    { metric: 'cpu', icon: 'cpu', tone: 'text-accent', title: 'Використання CPU (%)' },
+    { metric: 'ram', icon: 'database', tone: 'text-success', title: 'Використання RAM (%)' },
+    { metric: 'disk', icon: 'hard-drive', tone: 'text-warning', title: 'Використання диска (%)' },
+    { metric: 'net', icon: 'activity', tone: 'text-accent', title: 'Мережева активність та трафік' },
+    { metric: 'service', icon: 'globe', tone: 'text-success', title: 'Затримка сервісів (ms)', wide: true }
+];
+const chartCardsEl = document.getElementById('overviewChartCards');
+if (chartCardsEl) {
+    chartCardsEl.innerHTML = overviewCards.map(c => `
+        <div class="chart-card"${c.wide ? ' style="grid-column: span 2;"' : ''}>
+            <div class="chart-header-row">
+                <div class="chart-title">
+                    <i data-lucide="${c.icon}" class="${c.tone}" style="width: 16px; height: 16px;"></i>
+                    ${c.title}
+                </div>
+                <div class="chart-actions">
+                    <button class="chart-action-btn" data-click="expandChart" data-args='["${c.metric}"]' title="Expand"><i data-lucide="maximize-2" style="width: 14px; height: 14px;"></i></button>
+                </div>
+            </div>
+            <div class="chart-canvas-wrapper">
+                <canvas id="${c.metric}OverviewChart"></canvas>
+            </div>
+        </div>`).join('');
+}
+
 // Init Lucide
 if (window.lucide) lucide.createIcons();
 
@@ -212,7 +242,31 @@ if (logoutBtn) logoutBtn.addEventListener('click', () => {
 });
 
 // Auth Helper
+// GET responses fetched ahead of time by one /api/v1/batch call; apiFetch
+// answers from here while a refresh tick runs (see pollTick).
+const batched = new Map();
+
+async function prefetchBatch(paths) {
+    batched.clear();
+    const resp = await apiFetch('/api/v1/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ requests: paths })
+    });
+    if (!resp || !resp.ok) return;
+    const data = await resp.json();
+    paths.forEach((p, i) => {
+        const r = (data.results || [])[i];
+        if (r) batched.set(p, r);
+    });
+}
+
 async function apiFetch(url, options = {}) {
+    const pre = !options.method && batched.get(url);
+    if (pre && pre.status < 400) {
+        batched.delete(url);
+        return { ok: true, status: pre.status, json: async () => pre.body };
+    }
     options.headers = options.headers || {};
     options.headers['Authorization'] = 'Bearer ' + token;
     try {
@@ -847,15 +901,13 @@ async function loadSettings() {
         if (document.getElementById('smtpPass')) document.getElementById('smtpPass').value = data.smtp_pass || '';
         if (document.getElementById('emailTo')) document.getElementById('emailTo').value = data.email_to || '';
     }
-    // Update system info
-    const serverResp = await apiFetch('/api/v1/servers');
-    if (serverResp && serverResp.ok) {
-        const serverData = await serverResp.json();
-        const allServers = serverData.servers || [];
-        const online = allServers.filter(s => s.last_status === 'up').length;
+    // Update system info (counted by the server, not from the full list)
+    const summaryResp = await apiFetch('/api/v1/servers/summary/all');
+    if (summaryResp && summaryResp.ok) {
+        const summary = await summaryResp.json();
         const settingsNodeCount = document.getElementById('settingsNodeCount');
-        if (settingsNodeCount) settingsNodeCount.textContent = allServers.length;
-        if (document.getElementById('settingsOnlineCount')) document.getElementById('settingsOnlineCount').textContent = online;
+        if (settingsNodeCount) settingsNodeCount.textContent = summary.total;
+        if (document.getElementById('settingsOnlineCount')) document.getElementById('settingsOnlineCount').textContent = summary.online;
     }
     // Update uptime
     const settingsUptime = document.getElementById('settingsUptime');
@@ -1157,6 +1209,135 @@ let overviewCharts = {
     service: null
 };
 let expandedChart = null;
+let expandedType = null;
+
+// Same output as toLocaleTimeString(), without building a formatter per call.
+const timeFmt = new Intl.DateTimeFormat(undefined, { hour: 'numeric', minute: 'numeric', second: 'numeric' });
+
+// Chart labels by timestamp. A refresh returns nearly the same window as
+// the last one, so each stamp is parsed and formatted once instead of on
+// every refresh of every chart that shows it.
+const stampLabels = new Map();
+
+function stampLabel(stamp) {
+    let label = stampLabels.get(stamp);
+    if (label === undefined) {
+        if (stampLabels.size >= 20000) stampLabels.clear();
+        label = timeFmt.format(new Date(stamp));
+        stampLabels.set(stamp, label);
+    }
+    return label;
+}
+
+// gradientFill returns a scriptable fill that builds the chart's gradient
+// only when the chart area changes height, not on every draw.
+function gradientFill(color) {
+    let gradient = null, top = -1, bottom = -1;
+    return (context) => {
+        const {ctx, chartArea} = context.chart;
+        if (!chartArea) return color.replace('1)', '0.1)');
+        if (!gradient || chartArea.top !== top || chartArea.bottom !== bottom) {
+            top = chartArea.top;
+            bottom = chartArea.bottom;
+            gradient = ctx.createLinearGradient(0, top, 0, bottom);
+            gradient.addColorStop(0, color.replace('1)', '0.6)'));
+            gradient.addColorStop(0.5, color.replace('1)', '0.2)'));
+            gradient.addColorStop(1, color.replace('1)', '0.0)'));
+        }
+        return gradient;
+    };
+}
+
+// Charts scrolled out of view (or in a background tab) keep their new data
+// but are only redrawn once they are visible again.
+const offscreenCanvases = new WeakSet();
+const pendingCharts = new Set();
+const chartObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+    entries.forEach(e => {
+        if (e.isIntersecting) {
+            offscreenCanvases.delete(e.target);
+            const chart = Chart.getChart(e.target);
+            if (chart && !document.hidden && pendingCharts.delete(chart)) redraw(chart);
+        } else {
+            offscreenCanvases.add(e.target);
+        }
+    });
+}) : null;
+
+// Visible charts are redrawn together in the next animation frame, so a
+// refresh that touches several charts (or several refreshes in a row) costs
+// one layout and paint pass. Browsers pause frames in background tabs.
+const dirtyCharts = new Set();
+let frameRequested = false;
+
+function redraw(chart) {
+    if (document.hidden || offscreenCanvases.has(chart.canvas)) {
+        pendingCharts.add(chart);
+        return;
+    }
+    dirtyCharts.add(chart);
+    if (!frameRequested) {
+        frameRequested = true;
+        requestAnimationFrame(flushCharts);
+    }
+}
+
+function flushCharts() {
+    frameRequested = false;
+    dirtyCharts.forEach(chart => {
+        fitLineDetail(chart);
+        chart.update('none');
+    });
+    dirtyCharts.clear();
+}
+
+// A window with more points than the chart has pixel columns (a 3d range
+// is 4320 minute points) is drawn with straight segments: without tension
+// Chart.js skips the bezier control-point pass and takes its fast line
+// path, which merges points that land in the same pixel column. That is
+// what its decimation plugin would do, but the plugin needs a linear x
+// axis and unparsed data, and these charts use category labels.
+function fitLineDetail(chart) {
+    const dense = chart.data.labels.length > chart.width;
+    chart.data.datasets.forEach(ds => {
+        if (ds.curveTension === undefined) ds.curveTension = ds.tension || 0;
+        ds.tension = dense ? 0 : ds.curveTension;
+    });
+}
+
+// applySeries moves a chart to a new window of the same series in place:
+// points that scrolled out are spliced off the front, overlapping points
+// are replaced only where their value changed, and new points are pushed.
+// Chart.js hooks those array methods and re-parses just the touched range,
+// where assigning fresh arrays makes it re-parse every point. A window that
+// does not continue the previous one (range or server switch) is swapped in
+// whole.
+function applySeries(chart, stamps, labels, data) {
+    const ds = chart.data.datasets[0];
+    const old = chart._stamps || [];
+    const k = stamps.length ? old.indexOf(stamps[0]) : -1;
+    const m = old.length - k;
+    if (k < 0 || m > stamps.length || stamps[m - 1] !== old[old.length - 1] ||
+        chart.data.labels.length !== old.length || ds.data.length !== old.length) {
+        // Charts mutate their labels in place later, so never share one array.
+        chart.data.labels = labels.slice();
+        ds.data = data.slice();
+        chart._stamps = stamps;
+        return;
+    }
+    if (k > 0) {
+        chart.data.labels.splice(0, k);
+        ds.data.splice(0, k);
+    }
+    for (let i = 0; i < m; i++) {
+        if (ds.data[i] !== data[i]) ds.data.splice(i, 1, data[i]);
+    }
+    if (m < stamps.length) {
+        chart.data.labels.push(...labels.slice(m));
+        ds.data.push(...data.slice(m));
+    }
+    chart._stamps = stamps;
+}
 
 function initOverviewCharts() {
     const chartConfig = (label, color) => ({
@@ -1167,16 +1348,7 @@ function initOverviewCharts() {
                 label: label,
                 data: [],
                 borderColor: color,
-                backgroundColor: function(context) {
-                    const chart = context.chart;
-                    const {ctx, chartArea} = chart;
-                    if (!chartArea) return color.replace('1)', '0.1)');
-                    const gradient = ctx.createLinearGradient(0, chartArea.top, 0, chartArea.bottom);
-                    gradient.addColorStop(0, color.replace('1)', '0.6)'));
-                    gradient.addColorStop(0.5, color.replace('1)', '0.2)'));
-                    gradient.addColorStop(1, color.replace('1)', '0.0)'));
-                    return gradient;
-                },
+                backgroundColor: gradientFill(color),
                 borderWidth: 4,
                 fill: true,
                 tension: 0.4,
@@ -1190,6 +1362,10 @@ function initOverviewCharts() {
         options: {
             responsive: true,
             maintainAspectRatio: false,
+            // Every refresh replaces the whole series; skip the tweening
+            // and the per-update data sanity pass.
+            animation: false,
+            normalized: true,
             plugins: { legend: { display: false } },
             scales: {
                 x: { display: false },
@@ -1219,6 +1395,38 @@ function initOverviewCharts() {
         netCfg.options.scales.y.max = undefined; // Auto-scale for net
         overviewCharts.net = new Chart(ctxNet, netCfg);
     }
+    if (chartObserver) {
+        Object.values(overviewCharts).forEach(c => c && chartObserver.observe(c.canvas));
+    }
+}
+
+// fetchHistory returns a history window's points, or null when the request
+// was redirected away. Per-server history is requested as NDJSON and parsed
+// chunk by chunk as it arrives, instead of in one JSON.parse over the whole
+// window; prefetched and aggregate responses arrive as plain JSON.
+async function fetchHistory(url) {
+    const streaming = typeof TextDecoderStream !== 'undefined';
+    const resp = await apiFetch(url, streaming ? { headers: { 'Accept': 'application/x-ndjson' } } : {});
+    if (!resp) return null;
+    const type = (resp.headers && resp.headers.get('Content-Type')) || '';
+    if (!streaming || !resp.body || !type.startsWith('application/x-ndjson')) {
+        const data = await resp.json();
+        return data.history || [];
+    }
+    const reader = resp.body.pipeThrough(new TextDecoderStream()).getReader();
+    const points = [];
+    let rest = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        const lines = (rest + value).split('\n');
+        rest = lines.pop();
+        for (const line of lines) {
+            if (line) points.push(JSON.parse(line));
+        }
+    }
+    if (rest.trim()) points.push(JSON.parse(rest));
+    return points;
 }
 
 async function updateOverviewCharts() {
@@ -1252,41 +1460,42 @@ async function updateOverviewCharts() {
     }
 
     try {
-        const resp = await apiFetch(url);
-        if (!resp) return;
-        const data = await resp.json();
-        const history = data.history || [];
+        const history = await fetchHistory(url);
+        if (!history) return;
         lastFetchedHistory = history; // Save for expandChart
 
-        const labels = history.map(h => new Date(h.timestamp).toLocaleTimeString());
-        const cpuData = history.map(h => h.cpu_avg !== undefined ? h.cpu_avg : h.cpu);
-        const ramData = history.map(h => h.mem_avg !== undefined ? h.mem_avg : h.mem);
-        const diskData = history.map(h => h.disk_avg !== undefined ? h.disk_avg : h.disk);
-        const netData = history.map(h => (h.net_rx_avg || 0) + (h.net_tx_avg || 0) || (h.net_rx || 0) + (h.net_tx || 0));
+        const n = history.length;
+        const stamps = new Array(n), labels = new Array(n), cpuData = new Array(n), ramData = new Array(n),
+            diskData = new Array(n), netData = new Array(n);
+        for (let i = 0; i < n; i++) {
+            const h = history[i];
+            stamps[i] = h.timestamp;
+            labels[i] = stampLabel(h.timestamp);
+            cpuData[i] = h.cpu_avg !== undefined ? h.cpu_avg : h.cpu;
+            ramData[i] = h.mem_avg !== undefined ? h.mem_avg : h.mem;
+            diskData[i] = h.disk_avg !== undefined ? h.disk_avg : h.disk;
+            netData[i] = (h.net_rx_avg || 0) + (h.net_tx_avg || 0) || (h.net_rx || 0) + (h.net_tx || 0);
+        }
 
         if (overviewCharts.cpu) {
-            overviewCharts.cpu.data.labels = labels;
-            overviewCharts.cpu.data.datasets[0].data = cpuData;
-            overviewCharts.cpu.update('none');
+            applySeries(overviewCharts.cpu, stamps, labels, cpuData);
+            redraw(overviewCharts.cpu);
         }
         if (overviewCharts.ram) {
-            overviewCharts.ram.data.labels = labels;
-            overviewCharts.ram.data.datasets[0].data = ramData;
-            overviewCharts.ram.update('none');
+            applySeries(overviewCharts.ram, stamps, labels, ramData);
+            redraw(overviewCharts.ram);
         }
         if (overviewCharts.disk) {
-            overviewCharts.disk.data.labels = labels;
-            overviewCharts.disk.data.datasets[0].data = diskData;
-            overviewCharts.disk.update('none');
+            applySeries(overviewCharts.disk, stamps, labels, diskData);
+            redraw(overviewCharts.disk);
         }
         if (overviewCharts.net) {
-            overviewCharts.net.data.labels = labels;
-            overviewCharts.net.data.datasets[0].data = netData;
-            overviewCharts.net.update('none');
+            applySeries(overviewCharts.net, stamps, labels, netData);
+            redraw(overviewCharts.net);
         }
 
         if (expandedChart) {
-            const type = expandedChart.canvas.id.replace('expandedChartCanvas-', '');
+            const type = expandedType;
             let newData = [];
             if (type === 'cpu') newData = cpuData;
             else if (type === 'ram') newData = ramData;
@@ -1295,7 +1504,7 @@ async function updateOverviewCharts() {
             
             expandedChart.data.labels = labels;
             expandedChart.data.datasets[0].data = newData;
-            expandedChart.update('none');
+            redraw(expandedChart);
         }
     } catch (e) {
         console.error("Failed to update overview charts:", e);
@@ -1307,28 +1516,28 @@ async function updateOverviewCharts() {
         if (sResp && sResp.ok) {
             const sData = await sResp.json();
             if (!Array.isArray(sData)) return;
-            const sLabels = sData.map(h => new Date(h.timestamp).toLocaleTimeString());
-            const sLatency = sData.map(h => h.latency_ms);
-            
+            // One pass into preallocated arrays, as for the server series.
+            const n = sData.length;
+            const sStamps = new Array(n), sLabels = new Array(n), sLatency = new Array(n);
+            for (let i = 0; i < n; i++) {
+                const h = sData[i];
+                sStamps[i] = h.timestamp;
+                sLabels[i] = stampLabel(h.timestamp);
+                sLatency[i] = h.latency_ms;
+            }
+
             if (overviewCharts.service) {
-                overviewCharts.service.data.labels = sLabels;
-                overviewCharts.service.data.datasets[0].data = sLatency;
-                overviewCharts.service.update('none');
+                applySeries(overviewCharts.service, sStamps, sLabels, sLatency);
+                redraw(overviewCharts.service);
             }
         }
     } catch(e) { console.error("Service chart update failed:", e); }
 }
 
 function expandChart(type) {
-    const container = document.getElementById('expandedChartContainer');
-    container.innerHTML = `<canvas id="expandedChartCanvas-${type}"></canvas>`;
-    
     const sourceChart = overviewCharts[type];
     if (!sourceChart) return;
-
-    const ctx = document.getElementById(`expandedChartCanvas-${type}`).getContext('2d');
-    
-    if (expandedChart) expandedChart.destroy();
+    expandedType = type;
 
     let datasets = [];
     
@@ -1383,49 +1592,62 @@ function expandChart(type) {
         if (datasets.length > 0) datasets[0].label = type.toUpperCase();
     }
 
-    expandedChart = new Chart(ctx, {
-        type: 'line',
-        data: {
-            labels: JSON.parse(JSON.stringify(sourceChart.data.labels)),
-            datasets: datasets
-        },
-        options: {
-            responsive: true,
-            maintainAspectRatio: false,
-            interaction: { mode: 'index', intersect: false },
-            plugins: { 
-                legend: { 
-                    display: true, 
-                    position: 'top',
-                    labels: { color: '#fff', usePointStyle: true, padding: 20 } 
+    const labels = sourceChart.data.labels.slice();
+    toggleModal('chartExpandModal', true);
+    if (expandedChart) {
+        // One chart serves every expanded view: swap its data and scale
+        // instead of tearing down and rebuilding the whole Chart.
+        expandedChart.data.labels = labels;
+        expandedChart.data.datasets = datasets;
+        expandedChart.options.scales.y.max = (type === 'net') ? undefined : 100;
+        fitLineDetail(expandedChart);
+        expandedChart.update('none');
+    } else {
+        const container = document.getElementById('expandedChartContainer');
+        container.innerHTML = '<canvas id="expandedChartCanvas"></canvas>';
+        expandedChart = new Chart(document.getElementById('expandedChartCanvas').getContext('2d'), {
+            type: 'line',
+            data: { labels: labels, datasets: datasets },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                animation: false,
+                interaction: { mode: 'index', intersect: false },
+                plugins: { 
+                    legend: { 
+                        display: true, 
+                        position: 'top',
+                        labels: { color: '#fff', usePointStyle: true, padding: 20 } 
+                    },
+                    tooltip: {
+                        backgroundColor: 'rgba(15, 23, 42, 0.9)',
+                        titleColor: '#94a3b8',
+                        bodyColor: '#fff',
+                        borderColor: 'rgba(255,255,255,0.1)',
+                        borderWidth: 1,
+                        padding: 12,
+                        displayColors: true
+                    }
                 },
-                tooltip: {
-                    backgroundColor: 'rgba(15, 23, 42, 0.9)',
-                    titleColor: '#94a3b8',
-                    bodyColor: '#fff',
-                    borderColor: 'rgba(255,255,255,0.1)',
-                    borderWidth: 1,
-                    padding: 12,
-                    displayColors: true
-                }
-            },
-            scales: {
-                x: { grid: { color: 'rgba(255,255,255,0.05)' }, ticks: { color: '#94a3b8', maxRotation: 0 } },
-                y: { 
-                    beginAtZero: true, 
-                    max: (type === 'net') ? undefined : 100,
-                    grid: { color: 'rgba(255,255,255,0.1)' },
-                    ticks: { 
-                        color: '#94a3b8',
-                        callback: function(value) { return value + (type === 'net' ? ' MB' : '%'); }
+                scales: {
+                    x: { grid: { color: 'rgba(255,255,255,0.05)' }, ticks: { color: '#94a3b8', maxRotation: 0 } },
+                    y: { 
+                        beginAtZero: true, 
+                        max: (expandedType === 'net') ? undefined : 100,
+                        grid: { color: 'rgba(255,255,255,0.1)' },
+                        ticks: { 
+                            color: '#94a3b8',
+                            callback: function(value) { return value + (expandedType === 'net' ? ' MB' : '%'); }
+                        }
                     }
                 }
             }
-        }
-    });
-
+        });
+        if (chartObserver) chartObserver.observe(expandedChart.canvas);
+        // Its width is only known now; a dense window is redrawn straight.
+        if (labels.length > expandedChart.width) redraw(expandedChart);
+    }
     document.getElementById('expandedChartTitle').textContent = type.toUpperCase() + ' Detailed Analysis';
-    toggleModal('chartExpandModal', true);
 }
 
 let seenAlertIds = new Set();
@@ -1442,7 +1664,11 @@ async function loadRecentAlerts() {
         const logs = data.logs || [];
 
         if (Date.now() - lastSeenCleanup > 300000) {
-            const maxSeen = Math.max(...seenAlertIds, 0);
+            // A loop, not Math.max(...set): no argument list sized to the set.
+            let maxSeen = 0;
+            for (const id of seenAlertIds) {
+                if (id > maxSeen) maxSeen = id;
+            }
             seenAlertIds = new Set([maxSeen]);
             lastSeenCleanup = Date.now();
         }
@@ -1508,6 +1734,23 @@ function populateServerSelect() {
 
 // WebSocket Connection
 let ws = null;
+// A scrape round sends one metrics_updated per server within a second or
+// so; answer the whole burst with a single refresh.
+let liveRefreshTimer = null;
+let liveRefreshCharts = false;
+
+function queueLiveRefresh(withCharts) {
+    liveRefreshCharts = liveRefreshCharts || withCharts;
+    if (liveRefreshTimer) return;
+    liveRefreshTimer = setTimeout(() => {
+        const charts = liveRefreshCharts;
+        liveRefreshTimer = null;
+        liveRefreshCharts = false;
+        refreshData();
+        if (charts) updateOverviewCharts();
+    }, 1000);
+}
+
 function connectWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const wsUrl = `${protocol}//${window.location.host}/api/v1/ws/metrics`;
@@ -1525,13 +1768,12 @@ function connectWebSocket() {
         try {
             const data = JSON.parse(event.data);
             console.log('WS Message received:', data);
-            if (data.type === 'metrics_updated') {
+            if (data.type === 'metrics_updated' && !skipWhileHidden()) {
                 const select = document.getElementById('overviewNodeSelect');
                 if (select && (select.value === 'agg' || select.value == data.server_id)) {
-                    refreshData();
-                    updateOverviewCharts();
+                    queueLiveRefresh(true);
                 } else if (!select) {
-                    refreshData();
+                    queueLiveRefresh(false);
                 }
             }
         } catch (e) {
@@ -1648,18 +1890,65 @@ const urlSection = urlParams.get('section') || 'overview';
 handleMustChangePassword();
 showSection(urlSection);
 
-refreshData();
 initOverviewCharts();
 connectWebSocket();
 initTheme();
 initAudioNotifications();
 
-setInterval(refreshData, 60000);
-setInterval(() => {
-    updateOverviewCharts();
-    loadRecentAlerts();
+// The GET paths one refresh tick reads, mirroring refreshData,
+// updateOverviewCharts and loadRecentAlerts.
+function pollPaths() {
+    const paths = ['/api/v1/servers', '/api/v1/services'];
+    const select = document.getElementById('overviewNodeSelect');
+    if (select) {
+        paths.push(select.value === 'agg'
+            ? `/api/v1/metrics/trend?range=${currentRange}`
+            : `/api/v1/metrics/history/${select.value}?range=${currentRange}`);
+        paths.push(`/api/v1/services/history?range=${currentRange}`);
+    }
+    if (document.getElementById('recentAlertsFeed')) paths.push('/api/v1/audit-log?limit=10');
+    return paths;
+}
+
+// A background tab skips refreshes entirely and catches up with one tick
+// when it is shown again.
+let refreshStale = false;
+
+function skipWhileHidden() {
+    if (!document.hidden) return false;
+    refreshStale = true;
+    return true;
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.hidden) return;
+    pendingCharts.forEach(chart => {
+        if (!offscreenCanvases.has(chart.canvas)) {
+            pendingCharts.delete(chart);
+            redraw(chart);
+        }
+    });
+    if (refreshStale) {
+        refreshStale = false;
+        pollTick();
+    }
+});
+
+async function pollTick() {
+    if (skipWhileHidden()) return;
+    await prefetchBatch(pollPaths());
+    try {
+        await Promise.all([refreshData(), updateOverviewCharts(), loadRecentAlerts()]);
+    } finally {
+        batched.clear();
+    }
     populateServerSelect();
-}, 60000);
+}
+
+// The first load is one batched request too: tables, charts and the alert
+// feed in a single round trip instead of one per widget.
+pollTick();
+setInterval(pollTick, 60000);
 
 // --- NEW FEATURES ---
 
@@ -3,7 +3,6 @@ package api
 import (
 	"encoding/json"
 	"log"
-	"net"
 	"net/http"
 	"sync"
 	"time"
@@ -11,41 +10,95 @@ import (
 	"github.com/gorilla/websocket"
 )
 
+// wsSendQueue is how many messages a client may fall behind by before it
+// is dropped; wsWriteTimeout bounds a single write to a stalled peer.
+// wsKeepalive is how often an empty message tests that the peer is alive.
+const (
+	wsSendQueue    = 32
+	wsWriteTimeout = 10 * time.Second
+	wsKeepalive    = 60 * time.Second
+)
+
+// wsClient is one authenticated connection. Its writeLoop is the only
+// writer, so Broadcast (called from the scrape loop) never waits on a
+// client's socket: it only queues.
+type wsClient struct {
+	conn *websocket.Conn
+	send chan []byte // closed by WSManager.remove
+}
+
+func (c *wsClient) writeLoop() {
+	keepalive := time.NewTicker(wsKeepalive)
+	defer keepalive.Stop()
+	failed := false
+	for {
+		var b []byte
+		select {
+		case msg, ok := <-c.send:
+			if !ok {
+				return
+			}
+			b = msg
+		case <-keepalive.C:
+			b = []byte("")
+		}
+		if failed {
+			continue
+		}
+		_ = c.conn.SetWriteDeadline(time.Now().Add(wsWriteTimeout))
+		if err := c.conn.WriteMessage(websocket.TextMessage, b); err != nil {
+			// Closing fails the read in handleWS, which removes the client.
+			failed = true
+			_ = c.conn.Close()
+		}
+	}
+}
+
 type WSManager struct {
-	mu          sync.Mutex
-	connections map[*websocket.Conn]struct{}
+	mu      sync.Mutex
+	clients map[*wsClient]struct{}
 }
 
 func NewWSManager() *WSManager {
-	return &WSManager{connections: map[*websocket.Conn]struct{}{}}
+	return &WSManager{clients: map[*wsClient]struct{}{}}
 }
 
-func (m *WSManager) add(c *websocket.Conn) {
+func (m *WSManager) add(conn *websocket.Conn) *wsClient {
+	c := &wsClient{conn: conn, send: make(chan []byte, wsSendQueue)}
 	m.mu.Lock()
-	defer m.mu.Unlock()
-	m.connections[c] = struct{}{}
+	m.clients[c] = struct{}{}
+	m.mu.Unlock()
+	go c.writeLoop()
+	return c
 }
 
-func (m *WSManager) remove(c *websocket.Conn) {
+func (m *WSManager) remove(c *wsClient) {
 	m.mu.Lock()
 	defer m.mu.Unlock()
-	delete(m.connections, c)
+	if _, ok := m.clients[c]; ok {
+		delete(m.clients, c)
+		close(c.send)
+	}
+}
+
+// queue hands b to c's writer without blocking. The caller holds m.mu, so
+// c.send cannot be closed under it; a client whose queue is full is too
+// far behind to catch up and is disconnected.
+func (m *WSManager) queue(c *wsClient, b []byte) {
+	select {
+	case c.send <- b:
+	default:
+		_ = c.conn.Close()
+	}
 }
 
 // Broadcast sends a JSON event to all live connections.
 func (m *WSManager) Broadcast(event map[string]any) {
-	m.mu.Lock()
-	conns := make([]*websocket.Conn, 0, len(m.connections))
-	for c := range m.connections {
-		conns = append(conns, c)
-	}
-	m.mu.Unlock()
 	b, _ := json.Marshal(event)
-	for _, c := range conns {
-		if err := c.WriteMessage(websocket.TextMessage, b); err != nil {
-			m.remove(c)
-			_ = c.Close()
-		}
+	m.mu.Lock()
+	defer m.mu.Unlock()
+	for c := range m.clients {
+		m.queue(c, b)
 	}
 }
 
@@ -87,24 +140,18 @@ func (a *App) handleWS(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 
-	a.WS.add(conn)
-	defer a.WS.remove(conn)
+	client := a.WS.add(conn)
+	defer a.WS.remove(client)
 
-	// keepalive: on 60s of no inbound traffic, send an empty message to test
-	// liveness (mirrors the original protocol).
+	// Inbound messages are ignored; the read only ends when the peer goes
+	// away or the writer closes a dead connection. Liveness is tested by
+	// the writer's keepalive (a read deadline cannot be used for that: a
+	// timed-out read leaves the connection unusable).
+	_ = conn.SetReadDeadline(time.Time{})
 	for {
-		_ = conn.SetReadDeadline(time.Now().Add(60 * time.Second))
-		_, _, err := conn.ReadMessage()
-		if err == nil {
-			continue
-		}
-		if netErr, ok := err.(net.Error); ok && netErr.Timeout() {
-			if werr := conn.WriteMessage(websocket.TextMessage, []byte("")); werr != nil {
-				return
-			}
-			continue
+		if _, _, err := conn.ReadMessage(); err != nil {
+			return
 		}
-		return
 	}
 }
 
@@ -0,0 +1,21 @@
+package jsonenc
+
+import (
+	"encoding/json"
+	"testing"
+)
+
+func TestAppendMatchesEncodingJSON(t *testing.T) {
+	for _, f := range []float64{0, 1, -0.25, 12.5, 1e-6, 1e-7, 1e-9, 1e20, 1e21, 3e21, 123456789.125} {
+		want, _ := json.Marshal(f)
+		if got := AppendFloat(nil, f); string(got) != string(want) {
+			t.Errorf("AppendFloat(%v) = %s, want %s", f, got, want)
+		}
+	}
+	for _, s := range []string{"", "plain", `q"b\s`, "<&>", "\u2028\u2029", "\xff\t\x01\n\r", "\b\f", "кириллица"} {
+		want, _ := json.Marshal(s)
+		if got := AppendString(nil, s); string(got) != string(want) {
+			t.Errorf("AppendString(%q) = %s, want %s", s, got, want)
+		}
+	}
+}
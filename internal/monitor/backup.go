@@ -9,8 +9,8 @@ import (
 
 // backupIfDue runs the scheduled backup at most once per hour.
 func (m *Manager) backupIfDue() {
-	m.mu.Lock()
-	defer m.mu.Unlock()
+	m.maintMu.Lock()
+	defer m.maintMu.Unlock()
 	if time.Since(m.lastBackup) < time.Hour {
 		return
 	}
@@ -8,7 +8,6 @@ import (
 	"net"
 	"net/http"
 	"os/exec"
-	"regexp"
 	"runtime"
 	"strings"
 	"sync"
@@ -17,17 +16,31 @@ import (
 	"github.com/ajjs1ajjs/Monitoring/internal/storage"
 )
 
-var pingTargetRe = regexp.MustCompile(`^[A-Za-z0-9._:\-\[\]]+$`)
+// validPingTarget reports whether host only uses hostname/IP characters
+// (letters, digits, . _ : - [ ]), so it is safe to hand to ping.
+func validPingTarget(host string) bool {
+	if host == "" {
+		return false
+	}
+	for i := 0; i < len(host); i++ {
+		c := host[i]
+		if !((c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') || (c >= '0' && c <= '9') ||
+			c == '.' || c == '_' || c == ':' || c == '-' || c == '[' || c == ']') {
+			return false
+		}
+	}
+	return true
+}
 
 // checkLoop runs every 5s and checks enabled services that are due.
 func (m *Manager) checkLoop(ctx context.Context) {
 	time.Sleep(10 * time.Second)
 	lastChecked := map[int64]time.Time{}
+	ticker := time.NewTicker(5 * time.Second)
+	defer ticker.Stop()
 	for {
-		select {
-		case <-ctx.Done():
+		if ctx.Err() != nil {
 			return
-		default:
 		}
 		if err := m.checkAll(lastChecked); err != nil {
 			log.Printf("[ServiceChecker] error: %v", err)
@@ -35,7 +48,7 @@ func (m *Manager) checkLoop(ctx context.Context) {
 		select {
 		case <-ctx.Done():
 			return
-		case <-time.After(5 * time.Second):
+		case <-ticker.C:
 		}
 	}
 }
@@ -46,7 +59,10 @@ func (m *Manager) checkAll(lastChecked map[int64]time.Time) error {
 		return err
 	}
 	now := time.Now()
+	stamp := storage.Stamp(now)
 	var wg sync.WaitGroup
+	var batchMu sync.Mutex
+	var batch []storage.CheckWrite
 	sem := make(chan struct{}, 10)
 	for i := range services {
 		s := &services[i]
@@ -63,11 +79,27 @@ func (m *Manager) checkAll(lastChecked map[int64]time.Time) error {
 			defer wg.Done()
 			sem <- struct{}{}
 			defer func() { <-sem }()
-			m.checkOne(svc)
+			c := m.checkOne(svc, stamp)
+			batchMu.Lock()
+			batch = append(batch, c)
+			batchMu.Unlock()
 		}(s)
 	}
 	wg.Wait()
-	return nil
+	return m.writeChecks(batch)
+}
+
+// writeChecks persists a round of check results in one transaction,
+// retrying briefly if the database is busy.
+func (m *Manager) writeChecks(batch []storage.CheckWrite) error {
+	var err error
+	for attempt := 0; attempt < 3; attempt++ {
+		if err = m.Store.WriteChecks(batch); err == nil {
+			return nil
+		}
+		time.Sleep(200 * time.Millisecond)
+	}
+	return fmt.Errorf("write %d check results: %w", len(batch), err)
 }
 
 func extractHostPort(url string, defaultPort int) (string, int) {
@@ -113,7 +145,9 @@ func parsePort(s string) (int, error) {
 	return p, nil
 }
 
-func (m *Manager) checkOne(s *storage.Service) {
+// checkOne probes a service and fires transition alerts; the result is
+// returned, stamped with the round's time, for the batched write in checkAll.
+func (m *Manager) checkOne(s *storage.Service, stamp string) storage.CheckWrite {
 	timeout := time.Duration(s.Timeout) * time.Second
 	if s.Timeout <= 0 {
 		timeout = 10 * time.Second
@@ -153,28 +187,18 @@ func (m *Manager) checkOne(s *storage.Service) {
 			fmt.Sprintf("Service %s (%s) is back online.", s.Name, s.TargetURL))
 	}
 
-	now := storage.Now()
-	for attempt := 0; attempt < 3; attempt++ {
-		err1 := m.Store.UpdateService(s.ID, map[string]any{
-			"status": status, "last_check": now, "response_time_ms": latency,
-		})
-		err2 := m.Store.InsertServiceHistory(s.ID, status, latency)
-		if err1 == nil && err2 == nil {
-			return
-		}
-		time.Sleep(200 * time.Millisecond)
-	}
-	log.Printf("[ServiceChecker] DB error for %s (%s)", s.Name, s.TargetURL)
+	return storage.CheckWrite{ServiceID: s.ID, Status: status, LatencyMS: latency, Timestamp: stamp}
 }
 
 func (m *Manager) httpCheck(url string, timeout time.Duration, expected int, start time.Time) (string, float64) {
-	client := &http.Client{Timeout: timeout}
+	// Reuse the scraper's pooled transport; only the timeout is per service.
+	client := &http.Client{Timeout: timeout, Transport: m.client.Transport}
 	resp, err := client.Get(url)
 	latency := float64(time.Since(start).Milliseconds())
 	if err != nil {
 		return "down", latency
 	}
-	defer resp.Body.Close()
+	defer drainAndClose(resp.Body)
 	if resp.StatusCode == expected {
 		return "up", latency
 	}
@@ -183,7 +207,7 @@ func (m *Manager) httpCheck(url string, timeout time.Duration, expected int, sta
 
 func (m *Manager) pingCheck(url string, timeout time.Duration, start time.Time) (string, float64) {
 	host, _ := extractHostPort(url, 0)
-	if !pingTargetRe.MatchString(host) || strings.HasPrefix(host, "-") {
+	if !validPingTarget(host) || strings.HasPrefix(host, "-") {
 		return "down", float64(time.Since(start).Milliseconds())
 	}
 	// Windows: -n 1 -w <ms>; Unix: -c 1 -W <sec>
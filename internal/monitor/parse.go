@@ -1,17 +1,15 @@
 package monitor
 
 import (
-	"log"
 	"strings"
 )
 
 // parseMetrics computes CPU/memory/disk/network + volume breakdown from an
 // exporter text dump, mirroring the Python implementation.
-func parseMetrics(text, name string) (*scrapeResult, error) {
+func parseMetrics(body []byte, name string) (*scrapeResult, error) {
 	result := &scrapeResult{}
-	samples, err := ParsePrometheusText(text)
+	samples, err := scanExposition(filterExposition(body, wantedMetrics), wantedLabels)
 	if err != nil {
-		log.Printf("[ScrapeManager] metric parse error for %s: %v", name, err)
 		return result, err
 	}
 	isLinux := false
@@ -29,6 +27,93 @@ func parseMetrics(text, name string) (*scrapeResult, error) {
 	return result, nil
 }
 
+// metricAliases lists, per logical field, the exporter metric names that
+// carry it in priority order (newer exporter releases renamed a few).
+// Lookups are exact and the first present name wins.
+var metricAliases = map[string][]string{
+	"linux_cpu":       {"node_cpu_seconds_total"},
+	"linux_mem_total": {"node_memory_MemTotal_bytes"},
+	"linux_mem_avail": {"node_memory_MemAvailable_bytes"},
+	"linux_fs_size":   {"node_filesystem_size_bytes"},
+	"linux_fs_avail":  {"node_filesystem_avail_bytes"},
+	"linux_net_rx":    {"node_network_receive_bytes_total"},
+	"linux_net_tx":    {"node_network_transmit_bytes_total"},
+
+	"windows_cpu":         {"windows_cpu_time_total"},
+	"windows_cpu_percent": {"windows_cpu_processor_time_percent", "windows_cpu_percent"},
+	"windows_mem_total":   {"windows_cs_physical_memory_bytes", "windows_memory_physical_total_bytes"},
+	"windows_mem_avail":   {"windows_memory_available_bytes"},
+	"windows_disk_free":   {"windows_logical_disk_free_bytes"},
+	"windows_disk_size":   {"windows_logical_disk_size_bytes"},
+	"windows_net_rx":      {"windows_net_bytes_received_total"},
+	"windows_net_tx":      {"windows_net_bytes_sent_total"},
+}
+
+// wantedMetrics is every family name referenced by metricAliases; nothing
+// else in an exporter payload is parsed.
+var wantedMetrics = func() map[string]bool {
+	out := map[string]bool{}
+	for _, names := range metricAliases {
+		for _, n := range names {
+			out[n] = true
+		}
+	}
+	return out
+}()
+
+// metricLabels lists, per logical field, the label names the parsers below
+// read. Fields not listed are used label-free (totals and sums), so their
+// label sets are skipped without being parsed.
+var metricLabels = map[string][]string{
+	"linux_cpu":      {"cpu", "mode"},
+	"linux_fs_size":  {"fstype", "mountpoint", "device"},
+	"linux_fs_avail": {"fstype", "mountpoint", "device"},
+	"linux_net_rx":   {"device"},
+	"linux_net_tx":   {"device"},
+
+	"windows_cpu":       {"mode"},
+	"windows_disk_free": {"volume"},
+	"windows_disk_size": {"volume"},
+}
+
+// wantedLabels maps each family of wantedMetrics that needs labels to the
+// label names kept from it; see scanExposition.
+var wantedLabels = func() map[string]map[string]bool {
+	out := map[string]map[string]bool{}
+	for field, labels := range metricLabels {
+		for _, n := range metricAliases[field] {
+			if out[n] == nil {
+				out[n] = map[string]bool{}
+			}
+			for _, l := range labels {
+				out[n][l] = true
+			}
+		}
+	}
+	return out
+}()
+
+// skipFSType lists pseudo filesystems left out of disk usage.
+var skipFSType = map[string]bool{"tmpfs": true, "devtmpfs": true, "squashfs": true, "overlay": true, "nsfs": true}
+
+// lookup returns the samples of the first alias of field present in m.
+func lookup(m map[string][]Sample, field string) []Sample {
+	for _, name := range metricAliases[field] {
+		if items, ok := m[name]; ok && len(items) > 0 {
+			return items
+		}
+	}
+	return nil
+}
+
+// first returns the value of the first sample of field, if any.
+func first(m map[string][]Sample, field string) (float64, bool) {
+	if items := lookup(m, field); len(items) > 0 {
+		return items[0].Value, true
+	}
+	return 0, false
+}
+
 func shouldIncludeVolume(vol string) bool {
 	vl := strings.ToLower(vol)
 	if strings.Contains(vl, "harddiskvolume") {
@@ -52,73 +137,46 @@ func shouldIncludeVolume(vol string) bool {
 
 func parseLinux(m map[string][]Sample, r *scrapeResult) {
 	var cpuTotal, cpuIdle float64
-	for k, items := range m {
-		if strings.Contains(k, "node_cpu_seconds_total") {
-			for _, it := range items {
-				if it.Labels["cpu"] == "cpu" {
-					continue
-				}
-				cpuTotal += it.Value
-				if it.Labels["mode"] == "idle" {
-					cpuIdle += it.Value
-				}
-			}
+	for _, it := range lookup(m, "linux_cpu") {
+		if it.Labels["cpu"] == "cpu" {
+			continue
+		}
+		cpuTotal += it.Value
+		if it.Labels["mode"] == "idle" {
+			cpuIdle += it.Value
 		}
 	}
 	if cpuTotal > 0 {
 		r.cpu = round1((1 - cpuIdle/cpuTotal) * 100)
 	}
 
-	var memTotal, memAvailable float64
-	for k, items := range m {
-		if strings.Contains(k, "node_memory_MemTotal_bytes") && len(items) > 0 {
-			memTotal = items[0].Value
-		} else if strings.Contains(k, "node_memory_MemAvailable_bytes") && len(items) > 0 {
-			memAvailable = items[0].Value
-		}
-	}
+	memTotal, _ := first(m, "linux_mem_total")
+	memAvailable, _ := first(m, "linux_mem_avail")
 	if memTotal > 0 {
 		r.memory = round1(((memTotal - memAvailable) / memTotal) * 100)
 	}
 
-	skipFSType := map[string]bool{"tmpfs": true, "devtmpfs": true, "squashfs": true, "overlay": true, "nsfs": true}
-	diskSize := map[string]float64{}
-	diskFree := map[string]float64{}
-	for k, items := range m {
-		if strings.Contains(k, "node_filesystem_size_bytes") {
-			for _, it := range items {
-				if skipFSType[it.Labels["fstype"]] {
-					continue
-				}
-				mp := it.Labels["mountpoint"]
-				if mp == "" {
-					mp = it.Labels["device"]
-				}
-				if mp == "" {
-					continue
-				}
-				if cur, ok := diskSize[mp]; !ok || it.Value > cur {
-					diskSize[mp] = it.Value
-				}
+	collect := func(items []Sample) map[string]float64 {
+		out := map[string]float64{}
+		for _, it := range items {
+			if skipFSType[it.Labels["fstype"]] {
+				continue
 			}
-		} else if strings.Contains(k, "node_filesystem_avail_bytes") {
-			for _, it := range items {
-				if skipFSType[it.Labels["fstype"]] {
-					continue
-				}
-				mp := it.Labels["mountpoint"]
-				if mp == "" {
-					mp = it.Labels["device"]
-				}
-				if mp == "" {
-					continue
-				}
-				if cur, ok := diskFree[mp]; !ok || it.Value > cur {
-					diskFree[mp] = it.Value
-				}
+			mp := it.Labels["mountpoint"]
+			if mp == "" {
+				mp = it.Labels["device"]
+			}
+			if mp == "" {
+				continue
+			}
+			if cur, ok := out[mp]; !ok || it.Value > cur {
+				out[mp] = it.Value
 			}
 		}
+		return out
 	}
+	diskSize := collect(lookup(m, "linux_fs_size"))
+	diskFree := collect(lookup(m, "linux_fs_avail"))
 	var totalFree, totalSize float64
 	for key, size := range diskSize {
 		if !shouldIncludeVolume(key) {
@@ -130,8 +188,8 @@ func parseLinux(m map[string][]Sample, r *scrapeResult) {
 		}
 		if size > 0 {
 			usedPct := round1(((size - freeVal) / size) * 100)
-			r.volumes = append(r.volumes, map[string]any{
-				"volume": key, "size_bytes": size, "free_bytes": freeVal, "used_percent": usedPct,
+			r.volumes = append(r.volumes, scrapedVolume{
+				Volume: key, SizeBytes: size, FreeBytes: freeVal, UsedPercent: usedPct,
 			})
 			totalFree += freeVal
 			totalSize += size
@@ -142,21 +200,14 @@ func parseLinux(m map[string][]Sample, r *scrapeResult) {
 	}
 
 	var netRx, netTx float64
-	for k, items := range m {
-		if strings.Contains(k, "node_network_receive_bytes_total") {
-			for _, it := range items {
-				if it.Labels["device"] == "lo" {
-					continue
-				}
-				netRx += it.Value
-			}
-		} else if strings.Contains(k, "node_network_transmit_bytes_total") {
-			for _, it := range items {
-				if it.Labels["device"] == "lo" {
-					continue
-				}
-				netTx += it.Value
-			}
+	for _, it := range lookup(m, "linux_net_rx") {
+		if it.Labels["device"] != "lo" {
+			netRx += it.Value
+		}
+	}
+	for _, it := range lookup(m, "linux_net_tx") {
+		if it.Labels["device"] != "lo" {
+			netTx += it.Value
 		}
 	}
 	if netRx > 0 || netTx > 0 {
@@ -167,43 +218,27 @@ func parseLinux(m map[string][]Sample, r *scrapeResult) {
 
 func parseWindows(m map[string][]Sample, r *scrapeResult) {
 	var cpuTotal, cpuIdle float64
-	for k, items := range m {
-		if strings.Contains(k, "windows_cpu_time_total") {
-			for _, it := range items {
-				cpuTotal += it.Value
-				if it.Labels["mode"] == "idle" {
-					cpuIdle += it.Value
-				}
-			}
+	for _, it := range lookup(m, "windows_cpu") {
+		cpuTotal += it.Value
+		if it.Labels["mode"] == "idle" {
+			cpuIdle += it.Value
 		}
 	}
 	if cpuTotal > 0 {
 		r.cpu = round1((1 - cpuIdle/cpuTotal) * 100)
-	}
-	if r.cpu == 0 {
-		for k, items := range m {
-			if strings.Contains(k, "windows_cpu_percent") || strings.Contains(k, "windows_cpu_processor_time_percent") {
-				if len(items) > 0 {
-					var sum float64
-					for _, it := range items {
-						sum += it.Value
-					}
-					avg := sum / float64(len(items))
-					r.cpu = round1(min(max(avg, 0), 100))
-					break
-				}
-			}
+	} else if items := lookup(m, "windows_cpu_percent"); len(items) > 0 {
+		// Only fall back when the counters are missing; an idle host that
+		// legitimately reports 0% must not be overridden.
+		var sum float64
+		for _, it := range items {
+			sum += it.Value
 		}
+		avg := sum / float64(len(items))
+		r.cpu = round1(min(max(avg, 0), 100))
 	}
 
-	var memTotal, memAvailable float64
-	for k, items := range m {
-		if strings.Contains(k, "windows_cs_physical_memory_bytes") && len(items) > 0 {
-			memTotal = items[0].Value
-		} else if strings.Contains(k, "windows_memory_available_bytes") && len(items) > 0 {
-			memAvailable = items[0].Value
-		}
-	}
+	memTotal, _ := first(m, "windows_mem_total")
+	memAvailable, _ := first(m, "windows_mem_avail")
 	if memTotal > 0 {
 		r.memory = round1(((memTotal - memAvailable) / memTotal) * 100)
 	}
@@ -213,44 +248,33 @@ func parseWindows(m map[string][]Sample, r *scrapeResult) {
 		size float64
 	}
 	volData := map[string]*diskData{}
-	for k, items := range m {
-		if strings.Contains(k, "windows_logical_disk_free_bytes") {
-			for _, it := range items {
-				vol := it.Labels["volume"]
-				if vol == "" {
-					vol = "ALL"
-				}
-				d, ok := volData[vol]
-				if !ok {
-					d = &diskData{}
-					volData[vol] = d
-				}
-				d.free = it.Value
-			}
-		} else if strings.Contains(k, "windows_logical_disk_size_bytes") {
-			for _, it := range items {
-				vol := it.Labels["volume"]
-				if vol == "" {
-					vol = "ALL"
-				}
-				d, ok := volData[vol]
-				if !ok {
-					d = &diskData{}
-					volData[vol] = d
-				}
-				d.size = it.Value
-			}
+	vol := func(it Sample) *diskData {
+		name := it.Labels["volume"]
+		if name == "" {
+			name = "ALL"
+		}
+		d, ok := volData[name]
+		if !ok {
+			d = &diskData{}
+			volData[name] = d
 		}
+		return d
+	}
+	for _, it := range lookup(m, "windows_disk_free") {
+		vol(it).free = it.Value
+	}
+	for _, it := range lookup(m, "windows_disk_size") {
+		vol(it).size = it.Value
 	}
 	var totalFree, totalSize float64
-	for vol, d := range volData {
-		if !shouldIncludeVolume(vol) {
+	for name, d := range volData {
+		if !shouldIncludeVolume(name) {
 			continue
 		}
 		if d.size > 0 {
 			usedPct := round1(((d.size - d.free) / d.size) * 100)
-			r.volumes = append(r.volumes, map[string]any{
-				"volume": vol, "size_bytes": d.size, "free_bytes": d.free, "used_percent": usedPct,
+			r.volumes = append(r.volumes, scrapedVolume{
+				Volume: name, SizeBytes: d.size, FreeBytes: d.free, UsedPercent: usedPct,
 			})
 			totalFree += d.free
 			totalSize += d.size
@@ -261,16 +285,11 @@ func parseWindows(m map[string][]Sample, r *scrapeResult) {
 	}
 
 	var netRx, netTx float64
-	for k, items := range m {
-		if strings.Contains(k, "windows_net_bytes_received_total") {
-			for _, it := range items {
-				netRx += it.Value
-			}
-		} else if strings.Contains(k, "windows_net_bytes_sent_total") {
-			for _, it := range items {
-				netTx += it.Value
-			}
-		}
+	for _, it := range lookup(m, "windows_net_rx") {
+		netRx += it.Value
+	}
+	for _, it := range lookup(m, "windows_net_tx") {
+		netTx += it.Value
 	}
 	if netRx > 0 || netTx > 0 {
 		r.netRx = netRx
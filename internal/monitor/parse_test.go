@@ -1,7 +1,15 @@
 package monitor
 
 import (
+	"encoding/json"
+	"math"
+	"strings"
 	"testing"
+	"testing/iotest"
+	"time"
+
+	"github.com/ajjs1ajjs/Monitoring/internal/config"
+	"github.com/ajjs1ajjs/Monitoring/internal/storage"
 )
 
 const linuxMetrics = `# HELP node_cpu_seconds_total Seconds the cpus spent in each mode.
@@ -32,7 +40,7 @@ node_exporter_build_info{version="1.8.2"} 1
 `
 
 func TestParseLinuxMetrics(t *testing.T) {
-	res, err := parseMetrics(linuxMetrics, "test")
+	res, err := parseMetrics([]byte(linuxMetrics), "test")
 	if err != nil {
 		t.Fatalf("parse error: %v", err)
 	}
@@ -77,7 +85,7 @@ windows_net_bytes_sent_total{nic="Ethernet"} 600
 `
 
 func TestParseWindowsMetrics(t *testing.T) {
-	res, err := parseMetrics(windowsMetrics, "win")
+	res, err := parseMetrics([]byte(windowsMetrics), "win")
 	if err != nil {
 		t.Fatalf("parse error: %v", err)
 	}
@@ -96,6 +104,137 @@ func TestParseWindowsMetrics(t *testing.T) {
 	}
 }
 
+func TestParseWindowsCPUFallback(t *testing.T) {
+	// Percent gauges are only used when the time counters are missing...
+	res, _ := parseMetrics([]byte("windows_cpu_processor_time_percent{core=\"0\"} 30\nwindows_cpu_processor_time_percent{core=\"1\"} 50\n"), "win")
+	if res.cpu != 40 {
+		t.Errorf("fallback cpu = %v, want 40", res.cpu)
+	}
+	// ...and never override a genuine 0% from the counters.
+	res, _ = parseMetrics([]byte("windows_cpu_time_total{mode=\"idle\"} 100\nwindows_cpu_percent 75\n"), "win")
+	if res.cpu != 0 {
+		t.Errorf("cpu = %v, want 0 from counters", res.cpu)
+	}
+}
+
+func TestFilterExposition(t *testing.T) {
+	out := string(filterExposition([]byte(linuxMetrics), map[string]bool{"node_memory_MemTotal_bytes": true}))
+	want := "# HELP node_memory_MemTotal_bytes Memory information field.\n" +
+		"# TYPE node_memory_MemTotal_bytes gauge\n" +
+		"node_memory_MemTotal_bytes 16000000000\n"
+	if out != want {
+		t.Errorf("filterExposition =\n%s\nwant\n%s", out, want)
+	}
+}
+
+func TestReadExposition(t *testing.T) {
+	keep := map[string]bool{"node_memory_MemTotal_bytes": true}
+	long := "node_memory_MemTotal_bytes{pad=\"" + strings.Repeat("x", 70<<10) + "\"} 1\n"
+	in := linuxMetrics + long
+	got := string(readExposition(iotest.OneByteReader(strings.NewReader(in)), keep))
+	want := string(filterExposition([]byte(linuxMetrics), keep)) +
+		"node_exporter_build_info{version=\"1.8.2\"} 1\n" + long
+	if got != want {
+		t.Errorf("readExposition kept %d bytes, want %d", len(got), len(want))
+	}
+	if v := exporterVersion([]byte(got)); v != "1.8.2" {
+		t.Errorf("version = %q", v)
+	}
+}
+
+func TestScanExposition(t *testing.T) {
+	in := "# TYPE a gauge\n" +
+		"a 1.5\n" +
+		"a{mode=\"idle\",path=\"C:\\\\\"} 2 1700000000000\r\n" +
+		"\n" +
+		"b{x=\"y\",} +Inf\n"
+	got, err := scanExposition([]byte(in), nil)
+	if err != nil {
+		t.Fatalf("scan: %v", err)
+	}
+	if len(got["a"]) != 2 || got["a"][0].Value != 1.5 || got["a"][1].Value != 2 {
+		t.Fatalf("a = %+v", got["a"])
+	}
+	if l := got["a"][1].Labels; l["mode"] != "idle" || l["path"] != `C:\` {
+		t.Errorf("labels = %v", l)
+	}
+	if len(got["b"]) != 1 || !math.IsInf(got["b"][0].Value, 1) {
+		t.Errorf("b = %+v", got["b"])
+	}
+	for _, bad := range []string{"a{x=\"1\" 2\n", "a{x=1} 2\n", "a nope\n"} {
+		if _, err := scanExposition([]byte(bad), nil); err == nil {
+			t.Errorf("scanExposition(%q) accepted malformed input", bad)
+		}
+	}
+}
+
+func TestScanExpositionKeepsOnlyUsedLabels(t *testing.T) {
+	in := "a{mode=\"idle\",cpu=\"0\"} 1\nb{x=\"1\"} 2\n"
+	got, err := scanExposition([]byte(in), map[string]map[string]bool{"a": {"mode": true}})
+	if err != nil {
+		t.Fatalf("scan: %v", err)
+	}
+	if l := got["a"][0].Labels; len(l) != 1 || l["mode"] != "idle" {
+		t.Errorf("a labels = %v, want only mode", l)
+	}
+	if b := got["b"]; len(b) != 1 || b[0].Labels != nil || b[0].Value != 2 {
+		t.Errorf("b = %+v, want value without labels", b)
+	}
+	if _, err := scanExposition([]byte("b{x=\"1\" 2\n"), map[string]map[string]bool{}); err == nil {
+		t.Errorf("skipped label set still has to be well formed")
+	}
+}
+
+func TestExporterVersion(t *testing.T) {
+	cases := map[string]string{
+		linuxMetrics: "1.8.2",
+		`windows_exporter_build_info{branch="",goversion="go1.22",revision="a\"b",version="0.25.1"} 1`: "0.25.1",
+		`x_build_info{version=""} 1` + "\n" + `y_build_info{xversion="1",version="2.0"} 1`:             "2.0",
+		`node_cpu_seconds_total{cpu="0"} 1`: "",
+	}
+	for in, want := range cases {
+		if got := exporterVersion([]byte(in)); got != want {
+			t.Errorf("exporterVersion(%q) = %q, want %q", in, got, want)
+		}
+	}
+}
+
+func TestInternNameReusesString(t *testing.T) {
+	if got := internName([]byte("mountpoint")); got != "mountpoint" {
+		t.Fatalf("internName = %q", got)
+	}
+	if n := testing.AllocsPerRun(100, func() { internName([]byte("mountpoint")) }); n != 0 {
+		t.Errorf("known name allocated %v times per lookup, want 0", n)
+	}
+}
+
+func TestVolumesJSONMatchesEncodingJSON(t *testing.T) {
+	cases := [][]scrapedVolume{
+		nil,
+		{},
+		{{Volume: "/", SizeBytes: 1e9, FreeBytes: 5.5e8, UsedPercent: 45}},
+		{{Volume: "C:", SizeBytes: 2.5e21, FreeBytes: 1e-7, UsedPercent: 99.9}, {Volume: "/mnt/a&b", SizeBytes: 1}},
+		{{Volume: "D:\\data\"x\"", UsedPercent: math.NaN()}},
+	}
+	for _, vols := range cases {
+		want, _ := json.Marshal(vols)
+		if got := volumesJSON(vols, false); got != string(want) {
+			t.Errorf("disk_info = %s, want %s", got, want)
+		}
+		var sum []volumeSummary
+		if vols != nil {
+			sum = make([]volumeSummary, len(vols))
+			for i, v := range vols {
+				sum[i] = volumeSummary(v)
+			}
+		}
+		want, _ = json.Marshal(sum)
+		if got := volumesJSON(vols, true); got != string(want) {
+			t.Errorf("volumes = %s, want %s", got, want)
+		}
+	}
+}
+
 func TestExtractHostPort(t *testing.T) {
 	cases := []struct {
 		in       string
@@ -114,3 +253,95 @@ func TestExtractHostPort(t *testing.T) {
 		}
 	}
 }
+
+func TestValidPingTarget(t *testing.T) {
+	for in, want := range map[string]bool{
+		"192.168.1.1": true, "host-01.example.com": true, "[::1]": true, "fe80::1": true,
+		"": false, "a b": false, "a;rm": false, "$(x)": false, "хост": false,
+	} {
+		if got := validPingTarget(in); got != want {
+			t.Errorf("validPingTarget(%q) = %v, want %v", in, got, want)
+		}
+	}
+}
+
+func TestBuildScrapeTarget(t *testing.T) {
+	cases := []struct {
+		host string
+		port int
+		url  string
+	}{
+		{"10.0.0.1", 0, "http://10.0.0.1:9100/metrics"},
+		{" https://node.example.com/path?x=1 ", 9182, "https://node.example.com:9182/metrics"},
+		{"http://srv", 9100, "http://srv:9100/metrics"},
+	}
+	for _, c := range cases {
+		if got := buildScrapeTarget(c.host, c.port).url; got != c.url {
+			t.Errorf("buildScrapeTarget(%q, %d) = %q, want %q", c.host, c.port, got, c.url)
+		}
+	}
+}
+
+func TestManagerTargetRebuildsOnHostChange(t *testing.T) {
+	m := &Manager{}
+	s := &storage.Server{ID: 1, Host: "a", AgentPort: 9100}
+	if got := m.target(s).url; got != "http://a:9100/metrics" {
+		t.Fatalf("url = %q", got)
+	}
+	s.Host = "b"
+	if got := m.target(s).url; got != "http://b:9100/metrics" {
+		t.Fatalf("url after edit = %q", got)
+	}
+	m.pruneTargets(nil)
+	if len(m.targets) != 0 {
+		t.Errorf("targets not pruned: %v", m.targets)
+	}
+	// one server deleted and another added between rounds: same count
+	m.target(s)
+	m.pruneTargets([]storage.Server{{ID: 2}})
+	if _, ok := m.targets[1]; ok {
+		t.Errorf("target of a removed server kept: %v", m.targets)
+	}
+}
+
+func TestLogFailureRateLimited(t *testing.T) {
+	m := &Manager{}
+	m.logFailure(1, "down %d", 1)
+	m.logFailure(1, "down %d", 1)
+	m.logFailure(1, "down %d", 1)
+	if got := m.failLogs[1].suppressed; got != 2 {
+		t.Errorf("suppressed = %d, want 2", got)
+	}
+	m.clearFailure(1)
+	if _, ok := m.failLogs[1]; ok {
+		t.Errorf("limiter not reset after success")
+	}
+	m.logFailure(2, "down %d", 2)
+	m.pruneTargets(nil)
+	if _, ok := m.failLogs[2]; ok {
+		t.Errorf("limiter of a removed server not pruned")
+	}
+}
+
+type countingSink struct{ n int }
+
+func (c *countingSink) Dispatch(title, message string) { c.n++ }
+
+func TestEvaluateRulesFiresOncePerEpisode(t *testing.T) {
+	sink := &countingSink{}
+	cfg := &config.Config{}
+	cfg.Alerting.Enabled = true
+	cfg.Alerting.Rules = []config.AlertRule{{Name: "HighCPU", Expr: "cpu", Threshold: 80}}
+	m := New(cfg, nil, nil, sink)
+	now := time.Now()
+	m.evaluateRules("web", 95, 0, 0, now)
+	m.evaluateRules("web", 96, 0, 0, now.Add(time.Second))
+	if sink.n != 1 {
+		t.Fatalf("alerts = %d, want 1 while the episode lasts", sink.n)
+	}
+	m.evaluateRules("web", 10, 0, 0, now.Add(2*time.Second))
+	m.evaluateRules("web", 95, 0, 0, now.Add(3*time.Second))
+	if sink.n != 2 {
+		t.Errorf("alerts = %d, want a new alert after recovery", sink.n)
+	}
+}
@@ -1,11 +1,14 @@
 package monitor
 
 import (
-	"strings"
-
-	dto "github.com/prometheus/client_model/go"
-	"github.com/prometheus/common/expfmt"
-	"github.com/prometheus/common/model"
+	"bufio"
+	"bytes"
+	"errors"
+	"fmt"
+	"io"
+	"strconv"
+	"sync"
+	"sync/atomic"
 )
 
 type Sample struct {
@@ -13,42 +16,329 @@ type Sample struct {
 	Value  float64
 }
 
-// ParsePrometheusText parses a Prometheus text exposition into a map of
-// metric name -> samples (using the official expfmt parser).
-func ParsePrometheusText(text string) (map[string][]Sample, error) {
-	parser := expfmt.NewTextParser(model.UTF8Validation)
-	families, err := parser.TextToMetricFamilies(strings.NewReader(text))
-	if err != nil {
-		return nil, err
+// filterExposition keeps only the sample and # TYPE/# HELP lines of the
+// metric families in keep. node_exporter and windows_exporter expose
+// thousands of series while the scraper reads a dozen families, so
+// dropping the rest up front spares scanExposition the label parsing for
+// them.
+//
+// Lines are classified with plain byte loops, and since a family's lines are
+// contiguous the keep decision is reused until the name changes and kept
+// lines are copied out as whole runs. That keeps the per-line cost low for
+// very large (100k+ line) payloads.
+func filterExposition(body []byte, keep map[string]bool) []byte {
+	var out, last []byte
+	lastKept := false
+	runStart := -1
+	for pos := 0; pos < len(body); {
+		end := len(body)
+		if i := bytes.IndexByte(body[pos:], '\n'); i >= 0 {
+			end = pos + i + 1
+		}
+		name := familyName(body[pos:end])
+		if !bytes.Equal(name, last) {
+			last, lastKept = name, keep[string(name)]
+		}
+		if lastKept {
+			if runStart < 0 {
+				runStart = pos
+			}
+		} else if runStart >= 0 {
+			out = append(out, body[runStart:pos]...)
+			runStart = -1
+		}
+		pos = end
+	}
+	if runStart >= 0 {
+		out = append(out, body[runStart:]...)
+	}
+	return out
+}
+
+var buildInfoSuffix = []byte("_build_info")
+
+// readExposition streams a scrape response and keeps the same lines
+// filterExposition would for keep, plus the *_build_info series that carry
+// the exporter version. Only the kept lines are buffered, so peak memory is
+// bounded by what the scraper uses rather than by the exporter's payload.
+// A read error ends the body early, like a short read did before.
+func readExposition(r io.Reader, keep map[string]bool) []byte {
+	br := bufio.NewReaderSize(r, 64<<10)
+	var out, last []byte
+	lastKept := false
+	for {
+		line, err := br.ReadSlice('\n')
+		if err == bufio.ErrBufferFull {
+			// A line longer than the buffer: gather the rest of it.
+			long := append([]byte(nil), line...)
+			for err == bufio.ErrBufferFull {
+				line, err = br.ReadSlice('\n')
+				long = append(long, line...)
+			}
+			line = long
+		}
+		if len(line) > 0 {
+			name := familyName(line)
+			if !bytes.Equal(name, last) {
+				// line points into the reader's buffer; keep a copy.
+				last = append(last[:0], name...)
+				lastKept = keep[string(name)] || bytes.HasSuffix(name, buildInfoSuffix)
+			}
+			if lastKept {
+				out = append(out, line...)
+			}
+		}
+		if err != nil {
+			return out
+		}
 	}
+}
+
+// familyName returns the metric family a line of the text format belongs
+// to, or nil for blank lines and free-form comments.
+func familyName(line []byte) []byte {
+	if len(line) > 0 && line[0] == '#' {
+		rest := bytes.TrimLeft(line[1:], " \t")
+		if !bytes.HasPrefix(rest, []byte("TYPE ")) && !bytes.HasPrefix(rest, []byte("HELP ")) {
+			return nil
+		}
+		line = bytes.TrimLeft(rest[5:], " \t")
+	}
+	for i, c := range line {
+		switch c {
+		case '{', ' ', '\t', '\r', '\n':
+			return line[:i]
+		}
+	}
+	return line
+}
+
+var buildInfoMarker = []byte("_build_info{")
+
+// exporterVersion returns the version label of the first *_build_info
+// series that has a non-empty one.
+func exporterVersion(body []byte) string {
+	for {
+		i := bytes.Index(body, buildInfoMarker)
+		if i < 0 {
+			return ""
+		}
+		body = body[i+len(buildInfoMarker):]
+		if v, ok := labelValue(body, "version"); ok && v != "" {
+			return v
+		}
+	}
+}
+
+// labelValue scans a label set (the text after '{') in one forward pass and
+// returns the unescaped value of name. It stops at the closing '}'.
+func labelValue(blob []byte, name string) (string, bool) {
+	var val string
+	found := false
+	_, err := scanLabels(blob, func(k, v []byte, escaped bool) bool {
+		if string(k) != name {
+			return true
+		}
+		val, found = labelString(v, escaped), true
+		return false
+	})
+	if err != nil && !found {
+		return "", false
+	}
+	return val, found
+}
+
+// scanLabels walks a label set starting just after '{', calling fn with the
+// raw name and value of each pair (escaped reports whether the value holds
+// backslash escapes) until fn returns false. It returns the offset just
+// past the closing '}'. Values are located with IndexByte-style scanning,
+// without splitting the blob.
+func scanLabels(blob []byte, fn func(name, value []byte, escaped bool) bool) (int, error) {
+	i := 0
+	for {
+		for i < len(blob) && (blob[i] == ',' || blob[i] == ' ' || blob[i] == '\t') {
+			i++
+		}
+		if i >= len(blob) {
+			return i, errUnterminatedLabels
+		}
+		if blob[i] == '}' {
+			return i + 1, nil
+		}
+		eq := bytes.IndexByte(blob[i:], '=')
+		if eq < 0 {
+			return i, errUnterminatedLabels
+		}
+		key := bytes.TrimSpace(blob[i : i+eq])
+		j := i + eq + 1
+		for j < len(blob) && blob[j] == ' ' {
+			j++
+		}
+		if j >= len(blob) || blob[j] != '"' {
+			return j, fmt.Errorf("label %q: value is not quoted", key)
+		}
+		j++
+		start, escaped := j, false
+		for j < len(blob) && blob[j] != '"' {
+			if blob[j] == '\\' {
+				escaped = true
+				j++
+			}
+			j++
+		}
+		if j >= len(blob) {
+			return j, errUnterminatedLabels
+		}
+		if !fn(key, blob[start:j], escaped) {
+			return j + 1, nil
+		}
+		i = j + 1
+	}
+}
+
+var errUnterminatedLabels = errors.New("unterminated label set")
+
+func labelString(v []byte, escaped bool) string {
+	if escaped {
+		return unescapeLabel(v)
+	}
+	return string(v)
+}
+
+// scanExposition parses the sample lines of a text exposition with a single
+// forward scan per line: name up to '{' or space, labels via scanLabels,
+// then the value (an optional trailing timestamp is ignored). Comments and
+// blank lines are skipped. On the scrape path the input has already been
+// cut down by filterExposition.
+//
+// With a non-nil keep, only the label names keep[family] lists are stored,
+// and the label sets of families with none are stepped over without
+// building a map at all. A nil keep stores every label.
+func scanExposition(body []byte, keep map[string]map[string]bool) (map[string][]Sample, error) {
 	out := map[string][]Sample{}
-	for name, fam := range families {
-		for _, m := range fam.GetMetric() {
-			labels := map[string]string{}
-			for _, lp := range m.GetLabel() {
-				labels[lp.GetName()] = lp.GetValue()
+	// Label values repeat on almost every line. Looking them up by string(b)
+	// does not allocate, so each distinct value is copied out of the body
+	// exactly once per scrape; names go through the process-wide internName.
+	intern := map[string]string{}
+	str := func(b []byte) string {
+		if s, ok := intern[string(b)]; ok {
+			return s
+		}
+		s := string(b)
+		intern[s] = s
+		return s
+	}
+	for lineNo := 1; len(body) > 0; lineNo++ {
+		line := body
+		if i := bytes.IndexByte(body, '\n'); i >= 0 {
+			line, body = body[:i], body[i+1:]
+		} else {
+			body = nil
+		}
+		line = bytes.TrimRight(line, "\r")
+		if len(line) == 0 || line[0] == '#' {
+			continue
+		}
+		end := 0
+		for end < len(line) && line[end] != '{' && line[end] != ' ' && line[end] != '\t' {
+			end++
+		}
+		name, rest := internName(line[:end]), line[end:]
+		var labels map[string]string
+		if len(rest) > 0 && rest[0] == '{' {
+			fn := skipLabel
+			if want := keep[name]; keep == nil || len(want) > 0 {
+				size := len(want)
+				if keep == nil {
+					size = bytes.Count(rest, []byte{'='})
+				}
+				labels = make(map[string]string, size)
+				fn = func(k, v []byte, escaped bool) bool {
+					if keep != nil && !want[string(k)] {
+						return true
+					}
+					if escaped {
+						labels[internName(k)] = unescapeLabel(v)
+					} else {
+						labels[internName(k)] = str(v)
+					}
+					return true
+				}
+			}
+			n, err := scanLabels(rest[1:], fn)
+			if err != nil {
+				return nil, fmt.Errorf("line %d: %w", lineNo, err)
 			}
-			out[name] = append(out[name], Sample{Labels: labels, Value: sampleValue(m)})
+			rest = rest[1+n:]
 		}
+		rest = bytes.TrimLeft(rest, " \t")
+		if i := bytes.IndexAny(rest, " \t"); i >= 0 {
+			rest = rest[:i]
+		}
+		v, err := strconv.ParseFloat(string(rest), 64)
+		if err != nil {
+			return nil, fmt.Errorf("line %d: invalid value %q", lineNo, rest)
+		}
+		out[name] = append(out[name], Sample{Labels: labels, Value: v})
 	}
 	return out, nil
 }
 
-func sampleValue(m *dto.Metric) float64 {
-	if g := m.GetGauge(); g != nil {
-		return g.GetValue()
+func skipLabel(k, v []byte, escaped bool) bool { return true }
+
+// maxInternedNames bounds the shared name table; names beyond it are simply
+// allocated per use.
+const maxInternedNames = 4096
+
+// names holds metric and label names shared by every scrape. The set is
+// small and settles after the first rounds, so it is copy-on-write: lookups
+// are a lock-free map read, and only a new name takes the mutex.
+var names struct {
+	mu sync.Mutex
+	m  atomic.Pointer[map[string]string]
+}
+
+// internName returns the shared string for a metric or label name, so the
+// same few dozen names are not re-allocated on every line of every scrape.
+func internName(b []byte) string {
+	if m := names.m.Load(); m != nil {
+		if s, ok := (*m)[string(b)]; ok {
+			return s
+		}
+	}
+	names.mu.Lock()
+	defer names.mu.Unlock()
+	var cur map[string]string
+	if m := names.m.Load(); m != nil {
+		cur = *m
 	}
-	if c := m.GetCounter(); c != nil {
-		return c.GetValue()
+	if s, ok := cur[string(b)]; ok {
+		return s
 	}
-	if u := m.GetUntyped(); u != nil {
-		return u.GetValue()
+	s := string(b)
+	if len(cur) >= maxInternedNames {
+		return s
 	}
-	if s := m.GetSummary(); s != nil {
-		return s.GetSampleSum()
+	next := make(map[string]string, len(cur)+1)
+	for k, v := range cur {
+		next[k] = v
 	}
-	if h := m.GetHistogram(); h != nil {
-		return h.GetSampleSum()
+	next[s] = s
+	names.m.Store(&next)
+	return s
+}
+
+func unescapeLabel(v []byte) string {
+	out := make([]byte, 0, len(v))
+	for i := 0; i < len(v); i++ {
+		if v[i] == '\\' && i+1 < len(v) {
+			i++
+			if v[i] == 'n' {
+				out = append(out, '\n')
+				continue
+			}
+		}
+		out = append(out, v[i])
 	}
-	return 0
+	return string(out)
 }
@@ -7,13 +7,14 @@ import (
 	"io"
 	"log"
 	"math"
+	"net"
 	"net/http"
-	"regexp"
 	"strings"
 	"sync"
 	"time"
 
 	"github.com/ajjs1ajjs/Monitoring/internal/config"
+	"github.com/ajjs1ajjs/Monitoring/internal/jsonenc"
 	"github.com/ajjs1ajjs/Monitoring/internal/storage"
 )
 
@@ -33,8 +34,20 @@ type Manager struct {
 
 	client *http.Client
 
-	mu           sync.Mutex
-	ruleState    map[[2]string]*ruleEpisode
+	targetsMu sync.Mutex
+	targets   map[int64]scrapeTarget
+
+	logMu    sync.Mutex
+	failLogs map[int64]*failLog
+
+	// ruleMu guards ruleState, which every scrape touches. Hourly
+	// maintenance has its own lock so a long cleanup, VACUUM or backup never
+	// stalls rule evaluation.
+	rules     []compiledRule // from Cfg.Alerting, see compileRules
+	ruleMu    sync.Mutex
+	ruleState map[[2]string]*ruleEpisode
+
+	maintMu      sync.Mutex
 	lastCleanup  time.Time
 	vacuumedDate string
 	lastBackup   time.Time
@@ -45,10 +58,36 @@ type ruleEpisode struct {
 	alerted bool
 }
 
+// newTransport returns the connection pool shared by exporter scrapes and
+// HTTP service checks, so repeated polls of the same host reuse keep-alive
+// (and, for TLS targets, HTTP/2) connections instead of re-handshaking.
+func newTransport() *http.Transport {
+	t := http.DefaultTransport.(*http.Transport).Clone()
+	// Fail fast on unreachable hosts (the default dialer waits 30s, longer
+	// than the whole request timeout) and probe idle sockets so dead peers
+	// are noticed before a scrape picks them up.
+	dialer := &net.Dialer{Timeout: 3 * time.Second, KeepAlive: 30 * time.Second}
+	t.DialContext = dialer.DialContext
+	t.TLSHandshakeTimeout = 5 * time.Second
+	t.MaxIdleConns = 512
+	t.MaxIdleConnsPerHost = 16
+	// Cap in-flight requests per host so a burst of scrapes/checks aimed at
+	// one machine queues on its pool instead of opening dozens of sockets.
+	t.MaxConnsPerHost = 16
+	// Keep idle connections across scrape and check intervals (up to a few
+	// minutes) so each poll reuses its TCP/TLS session instead of
+	// handshaking again.
+	t.IdleConnTimeout = 5 * time.Minute
+	t.ForceAttemptHTTP2 = true
+	return t
+}
+
 func New(cfg *config.Config, store *storage.Store, ws Broadcaster, alerts AlertSink) *Manager {
 	return &Manager{
 		Cfg: cfg, Store: store, WS: ws, Alerts: alerts,
-		client:    &http.Client{Timeout: 10 * time.Second},
+		client:    &http.Client{Timeout: 10 * time.Second, Transport: newTransport()},
+		targets:   map[int64]scrapeTarget{},
+		rules:     compileRules(cfg),
 		ruleState: map[[2]string]*ruleEpisode{},
 	}
 }
@@ -67,14 +106,17 @@ func (m *Manager) Run(ctx context.Context) {
 	go m.checkLoop(ctx)
 }
 
+// scrapeLoop runs a scrape round on a fixed ticker, so rounds start every
+// interval regardless of how long the previous one took (no drift), and a
+// round that overruns simply absorbs the missed ticks instead of queueing
+// them.
 func (m *Manager) scrapeLoop(ctx context.Context) {
 	time.Sleep(5 * time.Second)
-	interval := m.ScrapeInterval()
+	ticker := time.NewTicker(m.ScrapeInterval())
+	defer ticker.Stop()
 	for {
-		select {
-		case <-ctx.Done():
+		if ctx.Err() != nil {
 			return
-		default:
 		}
 		if err := m.ScrapeAll(); err != nil {
 			log.Printf("[ScrapeManager] error: %v", err)
@@ -84,14 +126,14 @@ func (m *Manager) scrapeLoop(ctx context.Context) {
 		select {
 		case <-ctx.Done():
 			return
-		case <-time.After(interval):
+		case <-ticker.C:
 		}
 	}
 }
 
 func (m *Manager) cleanup() {
-	m.mu.Lock()
-	defer m.mu.Unlock()
+	m.maintMu.Lock()
+	defer m.maintMu.Unlock()
 	if time.Since(m.lastCleanup) < time.Hour {
 		return
 	}
@@ -110,27 +152,58 @@ func (m *Manager) cleanup() {
 	}
 }
 
-// ScrapeAll scrapes all enabled servers concurrently (semaphore 10).
+// scrapeConcurrency bounds in-flight scrapes per round. Scrapes only do
+// network I/O and parsing (the database write happens once, after the
+// round), so this can be much wider than the database pool.
+const scrapeConcurrency = 64
+
+// ScrapeAll scrapes all enabled servers concurrently (up to
+// scrapeConcurrency at a time) and persists the whole round in one
+// transaction.
 func (m *Manager) ScrapeAll() error {
 	servers, err := m.Store.EnabledServers()
 	if err != nil {
 		return err
 	}
+	m.pruneTargets(servers)
 	if len(servers) == 0 {
 		return nil
 	}
-	sem := make(chan struct{}, 10)
+	sem := make(chan struct{}, scrapeConcurrency)
 	var wg sync.WaitGroup
+	var batchMu sync.Mutex
+	batch := make([]storage.ScrapeWrite, 0, len(servers))
+	// One clock reading stamps the whole round.
+	at := time.Now()
 	for i := range servers {
 		wg.Add(1)
 		go func(s *storage.Server) {
 			defer wg.Done()
 			sem <- struct{}{}
 			defer func() { <-sem }()
-			m.scrapeOne(s)
+			w := m.scrape(s, at)
+			batchMu.Lock()
+			batch = append(batch, w)
+			batchMu.Unlock()
 		}(&servers[i])
 	}
 	wg.Wait()
+	return m.flush(batch)
+}
+
+// flush writes a batch of scrape results in a single transaction and only
+// then notifies dashboards, so clients never refetch before the commit.
+func (m *Manager) flush(batch []storage.ScrapeWrite) error {
+	if err := m.Store.WriteScrapes(batch); err != nil {
+		return fmt.Errorf("write scrape results: %w", err)
+	}
+	if m.WS != nil {
+		for _, w := range batch {
+			if w.Up {
+				m.WS.Broadcast(map[string]any{"type": "metrics_updated", "server_id": w.ServerID})
+			}
+		}
+	}
 	return nil
 }
 
@@ -139,50 +212,110 @@ func (m *Manager) ForceScrape(serverID int64) error {
 	if err != nil || s == nil {
 		return fmt.Errorf("server not found")
 	}
-	up := m.scrapeOne(s)
-	if !up {
+	w := m.scrape(s, time.Now())
+	if err := m.flush([]storage.ScrapeWrite{w}); err != nil {
+		return err
+	}
+	if !w.Up {
 		return fmt.Errorf("scrape failed (server down or unreachable)")
 	}
 	return nil
 }
 
-func (m *Manager) scrapeOne(s *storage.Server) bool {
-	host := strings.TrimSpace(s.Host)
+// scrapeTarget is the scrape URL derived from a server's host/port, cached
+// so the string munging runs once per server instead of once per interval.
+type scrapeTarget struct {
+	host string
+	port int
+	addr string // host without scheme/path, used for the SSRF check
+	url  string
+}
+
+func buildScrapeTarget(host string, agentPort int) scrapeTarget {
+	h := strings.TrimSpace(host)
 	scheme := "http"
-	if strings.HasPrefix(host, "https://") {
+	if strings.HasPrefix(h, "https://") {
 		scheme = "https"
 	}
-	clean := host
+	clean := h
 	for _, p := range []string{"http://", "https://"} {
 		clean = strings.TrimPrefix(clean, p)
 	}
 	clean = strings.SplitN(clean, "/", 2)[0]
 	clean = strings.SplitN(clean, "?", 2)[0]
-	port := s.AgentPort
+	port := agentPort
 	if port == 0 {
 		port = 9100
 	}
-	url := fmt.Sprintf("%s://%s:%d/metrics", scheme, clean, port)
+	return scrapeTarget{
+		host: host, port: agentPort, addr: clean,
+		url: fmt.Sprintf("%s://%s:%d/metrics", scheme, clean, port),
+	}
+}
+
+// target returns the cached scrape target for s, rebuilding it when the
+// server's host or port was edited since the last scrape.
+func (m *Manager) target(s *storage.Server) scrapeTarget {
+	m.targetsMu.Lock()
+	defer m.targetsMu.Unlock()
+	if t, ok := m.targets[s.ID]; ok && t.host == s.Host && t.port == s.AgentPort {
+		return t
+	}
+	if m.targets == nil {
+		m.targets = map[int64]scrapeTarget{}
+	}
+	t := buildScrapeTarget(s.Host, s.AgentPort)
+	m.targets[s.ID] = t
+	return t
+}
+
+// pruneTargets drops cached targets and failure-log limiters for servers
+// that were deleted or disabled.
+func (m *Manager) pruneTargets(servers []storage.Server) {
+	live := make(map[int64]bool, len(servers))
+	for i := range servers {
+		live[servers[i].ID] = true
+	}
+	m.targetsMu.Lock()
+	defer m.targetsMu.Unlock()
+	m.logMu.Lock()
+	defer m.logMu.Unlock()
+	for id := range m.targets {
+		if !live[id] {
+			delete(m.targets, id)
+		}
+	}
+	for id := range m.failLogs {
+		if !live[id] {
+			delete(m.failLogs, id)
+		}
+	}
+}
+
+// scrape polls one exporter and returns the rows to persist; alerts fire
+// immediately, the database write is left to flush.
+func (m *Manager) scrape(s *storage.Server, at time.Time) storage.ScrapeWrite {
+	t := m.target(s)
+	clean, url := t.addr, t.url
 
-	now := storage.Now()
-	text := ""
+	now := storage.Stamp(at)
+	var body []byte
 	up := false
 
 	if IsBlockedOutboundHost(clean) {
-		log.Printf("[ScrapeManager] refusing blocked metadata target %s for %s", clean, s.Name)
+		m.logFailure(s.ID, "[ScrapeManager] refusing blocked metadata target %s for %s", clean, s.Name)
 	} else {
 		req, err := http.NewRequest(http.MethodGet, url, nil)
 		if err == nil {
 			resp, err := m.client.Do(req)
 			if err == nil {
-				defer resp.Body.Close()
 				if resp.StatusCode == http.StatusOK {
-					body, _ := io.ReadAll(io.LimitReader(resp.Body, 8<<20))
-					text = string(body)
+					body = readExposition(io.LimitReader(resp.Body, 8<<20), wantedMetrics)
 					up = true
 				}
+				drainAndClose(resp.Body)
 			} else {
-				log.Printf("scrape HTTP error for %s (%s): %v", s.Name, url, err)
+				m.logFailure(s.ID, "[ScrapeManager] scrape HTTP error for %s (%s): %v", s.Name, url, err)
 			}
 		}
 	}
@@ -191,12 +324,62 @@ func (m *Manager) scrapeOne(s *storage.Server) bool {
 	if !up {
 		return m.recordDowntime(s, now, lastStatus)
 	}
-	data, err := parseMetrics(text, s.Name)
+	data, err := parseMetrics(body, s.Name)
 	if err != nil {
-		log.Printf("[ScrapeManager] parse error for %s: %v", s.Name, err)
+		m.logFailure(s.ID, "[ScrapeManager] parse error for %s: %v", s.Name, err)
 		return m.recordDowntime(s, now, lastStatus)
 	}
-	return m.persistMetrics(s, data, text, lastStatus, now)
+	m.clearFailure(s.ID)
+	return m.persistMetrics(s, data, body, lastStatus, at)
+}
+
+// failLogEvery bounds how often a persistently failing server is logged;
+// without it a dead exporter writes a line every scrape interval.
+const failLogEvery = 5 * time.Minute
+
+type failLog struct {
+	at         time.Time
+	suppressed int
+}
+
+// logFailure logs a scrape failure for serverID unless one was logged
+// within failLogEvery, in which case it is only counted.
+func (m *Manager) logFailure(serverID int64, format string, args ...any) {
+	m.logMu.Lock()
+	st := m.failLogs[serverID]
+	if st != nil && time.Since(st.at) < failLogEvery {
+		st.suppressed++
+		m.logMu.Unlock()
+		return
+	}
+	suppressed := 0
+	if st != nil {
+		suppressed = st.suppressed
+	}
+	if m.failLogs == nil {
+		m.failLogs = map[int64]*failLog{}
+	}
+	m.failLogs[serverID] = &failLog{at: time.Now()}
+	m.logMu.Unlock()
+	if suppressed > 0 {
+		format += fmt.Sprintf(" (%d repeats suppressed)", suppressed)
+	}
+	log.Printf(format, args...)
+}
+
+// clearFailure resets the limiter after a successful scrape so the next
+// failure is reported immediately.
+func (m *Manager) clearFailure(serverID int64) {
+	m.logMu.Lock()
+	delete(m.failLogs, serverID)
+	m.logMu.Unlock()
+}
+
+// drainAndClose discards what is left of a response body so the underlying
+// connection goes back to the keep-alive pool.
+func drainAndClose(body io.ReadCloser) {
+	_, _ = io.CopyN(io.Discard, body, 64<<10)
+	body.Close()
 }
 
 type scrapeResult struct {
@@ -205,36 +388,87 @@ type scrapeResult struct {
 	disk    float64
 	netRx   float64
 	netTx   float64
-	volumes []map[string]any // {volume,size_bytes,free_bytes,used_percent}
+	volumes []scrapedVolume
 }
 
-var buildInfoRe = regexp.MustCompile(`_build_info\{[^}]*version="([^"]+)"`)
+// scrapedVolume is one mounted volume as stored in metrics_history.disk_info.
+type scrapedVolume struct {
+	Volume      string  `json:"volume"`
+	SizeBytes   float64 `json:"size_bytes"`
+	FreeBytes   float64 `json:"free_bytes"`
+	UsedPercent float64 `json:"used_percent"`
+}
 
-func (m *Manager) recordDowntime(s *storage.Server, now, lastStatus string) bool {
-	if lastStatus == "up" && s.IsMaintenance == 0 {
-		m.fireAlert("🔥 Server Down: "+s.Name,
-			fmt.Sprintf("Server %s (%s) is offline or exporter is unreachable.", s.Name, s.Host))
+// volumeSummary is the same data under the shorter keys of servers.volumes;
+// the field layout matches scrapedVolume so one converts to the other.
+type volumeSummary struct {
+	Volume      string  `json:"volume"`
+	SizeBytes   float64 `json:"size"`
+	FreeBytes   float64 `json:"free"`
+	UsedPercent float64 `json:"used_percent"`
+}
+
+// volumesJSON encodes vols exactly as json.Marshal would encode them as
+// []scrapedVolume (or, with short, as []volumeSummary). It runs for every
+// server on every scrape, so the common case is appended by hand without
+// reflection; values that are not finite fall back to encoding/json.
+func volumesJSON(vols []scrapedVolume, short bool) string {
+	if b, ok := appendVolumesJSON(make([]byte, 0, 16+96*len(vols)), vols, short); ok {
+		return string(b)
+	}
+	var b []byte
+	if short {
+		sum := make([]volumeSummary, len(vols))
+		for i, v := range vols {
+			sum[i] = volumeSummary(v)
+		}
+		if vols == nil {
+			sum = nil
+		}
+		b, _ = json.Marshal(sum)
+	} else {
+		b, _ = json.Marshal(vols)
 	}
-	_ = m.Store.InsertMetricPoint(s.ID, nil, nil, nil, nil, nil, "{}")
-	_ = m.Store.UpdateServer(s.ID, map[string]any{"last_status": "down", "last_check": now})
-	return false
+	return string(b)
 }
 
-func (m *Manager) persistMetrics(s *storage.Server, data *scrapeResult, text, lastStatus, now string) bool {
-	exporterVersion := ""
-	if match := buildInfoRe.FindStringSubmatch(text); len(match) > 1 {
-		exporterVersion = match[1]
+func appendVolumesJSON(b []byte, vols []scrapedVolume, short bool) ([]byte, bool) {
+	if vols == nil {
+		return append(b, "null"...), true
 	}
+	sizeKey, freeKey := `,"size_bytes":`, `,"free_bytes":`
+	if short {
+		sizeKey, freeKey = `,"size":`, `,"free":`
+	}
+	b = append(b, '[')
+	for i, v := range vols {
+		if i > 0 {
+			b = append(b, ',')
+		}
+		b = append(b, `{"volume":`...)
+		b = jsonenc.AppendString(b, v.Volume)
+		for j, f := range [3]float64{v.SizeBytes, v.FreeBytes, v.UsedPercent} {
+			if math.IsNaN(f) || math.IsInf(f, 0) {
+				return b, false
+			}
+			b = append(b, [3]string{sizeKey, freeKey, `,"used_percent":`}[j]...)
+			b = jsonenc.AppendFloat(b, f)
+		}
+		b = append(b, '}')
+	}
+	return append(b, ']'), true
+}
 
-	diskInfo, _ := json.Marshal(data.volumes)
-	var volSummary []map[string]any
-	for _, v := range data.volumes {
-		volSummary = append(volSummary, map[string]any{
-			"volume": v["volume"], "size": v["size_bytes"],
-			"free": v["free_bytes"], "used_percent": v["used_percent"],
-		})
+func (m *Manager) recordDowntime(s *storage.Server, now, lastStatus string) storage.ScrapeWrite {
+	if lastStatus == "up" && s.IsMaintenance == 0 {
+		m.fireAlert("🔥 Server Down: "+s.Name,
+			fmt.Sprintf("Server %s (%s) is offline or exporter is unreachable.", s.Name, s.Host))
 	}
-	volSummaryJSON, _ := json.Marshal(volSummary)
+	return storage.ScrapeWrite{ServerID: s.ID, Timestamp: now}
+}
+
+func (m *Manager) persistMetrics(s *storage.Server, data *scrapeResult, body []byte, lastStatus string, at time.Time) storage.ScrapeWrite {
+	version := exporterVersion(body)
 
 	if lastStatus == "down" && s.IsMaintenance == 0 {
 		m.fireAlert("✅ Server Restored: "+s.Name,
@@ -243,24 +477,16 @@ func (m *Manager) persistMetrics(s *storage.Server, data *scrapeResult, text, la
 
 	if s.IsMaintenance == 0 {
 		m.evaluateCPUCondition(s.Name, data.cpu, s.CPUPercent, lastStatus)
-		m.evaluateRules(s.Name, data.cpu, data.memory, data.disk)
-	}
-
-	cpu := data.cpu
-	mem := data.memory
-	disk := data.disk
-	rx := data.netRx
-	tx := data.netTx
-	_ = m.Store.InsertMetricPoint(s.ID, &cpu, &mem, &disk, &rx, &tx, string(diskInfo))
-	_ = m.Store.UpdateServer(s.ID, map[string]any{
-		"last_status": "up", "last_check": now, "cpu_percent": cpu,
-		"memory_percent": mem, "disk_percent": disk,
-		"volumes": string(volSummaryJSON), "exporter_version": exporterVersion,
-	})
-	if m.WS != nil {
-		m.WS.Broadcast(map[string]any{"type": "metrics_updated", "server_id": s.ID})
+		m.evaluateRules(s.Name, data.cpu, data.memory, data.disk, at)
+	}
+
+	return storage.ScrapeWrite{
+		ServerID: s.ID, Up: true, Timestamp: storage.Stamp(at),
+		CPU: data.cpu, Memory: data.memory, Disk: data.disk,
+		NetRx: data.netRx, NetTx: data.netTx,
+		DiskInfo: volumesJSON(data.volumes, false), Volumes: volumesJSON(data.volumes, true),
+		ExporterVersion: version,
 	}
-	return true
 }
 
 func (m *Manager) fireAlert(title, message string) {
@@ -282,54 +508,77 @@ func (m *Manager) evaluateCPUCondition(name string, cpu, lastCPU float64, lastSt
 	}
 }
 
-func (m *Manager) evaluateRules(serverName string, cpu, memory, disk float64) {
-	if m.Cfg == nil || !m.Cfg.Alerting.Enabled {
-		return
+// compiledRule is an alerting rule with its expression, condition and
+// duration resolved once, instead of on every scrape of every server.
+type compiledRule struct {
+	*config.AlertRule
+	metric   int // 0 cpu, 1 memory, 2 disk
+	below    bool
+	duration time.Duration
+}
+
+// compileRules resolves the metric-based alerting rules of cfg. Rules on
+// other expressions (e.g. exporter_available) are not evaluated here.
+func compileRules(cfg *config.Config) []compiledRule {
+	if cfg == nil {
+		return nil
 	}
-	now := time.Now()
-	for i := range m.Cfg.Alerting.Rules {
-		rule := &m.Cfg.Alerting.Rules[i]
+	var out []compiledRule
+	for i := range cfg.Alerting.Rules {
+		rule := &cfg.Alerting.Rules[i]
 		expr := strings.ToLower(rule.Expr)
-		var val float64
+		c := compiledRule{AlertRule: rule, duration: parseRuleDuration(rule.Duration)}
 		switch {
 		case strings.Contains(expr, "cpu"):
-			val = cpu
+			c.metric = 0
 		case strings.Contains(expr, "memory") || strings.Contains(expr, "mem"):
-			val = memory
+			c.metric = 1
 		case strings.Contains(expr, "disk"):
-			val = disk
+			c.metric = 2
 		default:
-			continue // e.g. exporter_available
+			continue
+		}
+		switch strings.ToLower(rule.Condition) {
+		case "less_than", "lt", "lower_than":
+			c.below = true
 		}
-		cond := strings.ToLower(rule.Condition)
+		out = append(out, c)
+	}
+	return out
+}
+
+func (m *Manager) evaluateRules(serverName string, cpu, memory, disk float64, now time.Time) {
+	if m.Cfg == nil || !m.Cfg.Alerting.Enabled {
+		return
+	}
+	vals := [3]float64{cpu, memory, disk}
+	for i := range m.rules {
+		rule := &m.rules[i]
+		val := vals[rule.metric]
 		fired := val > rule.Threshold
-		if cond == "less_than" || cond == "lt" || cond == "lower_than" {
+		if rule.below {
 			fired = val < rule.Threshold
 		}
 
+		// Episode bookkeeping happens under ruleMu only; the alert itself is
+		// dispatched after the lock is released.
 		key := [2]string{serverName, rule.Name}
-		m.mu.Lock()
-		ep, ok := m.ruleState[key]
-		if !ok {
-			ep = &ruleEpisode{}
-			m.ruleState[key] = ep
-		}
-		m.mu.Unlock()
-
+		due := false
+		m.ruleMu.Lock()
 		if !fired {
-			m.mu.Lock()
 			delete(m.ruleState, key)
-			m.mu.Unlock()
-			continue
-		}
-		if ep.started.IsZero() {
-			ep.started = now
-		}
-		if ep.alerted {
-			continue
+		} else {
+			ep, ok := m.ruleState[key]
+			if !ok {
+				ep = &ruleEpisode{started: now}
+				m.ruleState[key] = ep
+			}
+			if !ep.alerted && now.Sub(ep.started) >= rule.duration {
+				ep.alerted, due = true, true
+			}
 		}
-		duration := parseRuleDuration(rule.Duration)
-		if now.Sub(ep.started) >= duration {
+		m.ruleMu.Unlock()
+		if due {
 			msg := rule.Message
 			if msg == "" {
 				msg = fmt.Sprintf("%s: %.1f%% (threshold: %.1f%%)", rule.Name, val, rule.Threshold)
@@ -338,7 +587,6 @@ func (m *Manager) evaluateRules(serverName string, cpu, memory, disk float64) {
 			msg = strings.ReplaceAll(msg, "{{ server }}", serverName)
 			sev := strings.ToUpper(rule.Severity)
 			m.fireAlert(fmt.Sprintf("%s: %s on %s", sev, rule.Name, serverName), msg)
-			ep.alerted = true
 		}
 	}
 }
@@ -1,6 +1,7 @@
 package storage
 
 import (
+	"database/sql"
 	"fmt"
 	"os"
 	"path/filepath"
@@ -48,6 +49,10 @@ func (st *Store) pruneBackups(dir string) {
 
 func (st *Store) SetMaxBackups(n int) { st.maxBackups = n }
 
+// SetReader installs a read-only pool from OpenReader for server lookups
+// and history reads.
+func (st *Store) SetReader(db *sql.DB) { st.readDB = db }
+
 func (st *Store) ListBackups(dir string) ([]map[string]any, error) {
 	entries, err := os.ReadDir(dir)
 	if err != nil {
@@ -88,6 +93,10 @@ func (st *Store) RestoreFrom(dir, filename string) error {
 	}
 	st.mu.Lock()
 	defer st.mu.Unlock()
+	defer st.serversGen.Add(1)
+	if st.readDB != nil {
+		st.readDB.Close()
+	}
 	if err := st.DB.Close(); err != nil {
 		return err
 	}
@@ -108,5 +117,11 @@ func (st *Store) RestoreFrom(dir, filename string) error {
 	}
 	st.DB = newDB
 	st.DBPath = abs
+	if st.readDB != nil {
+		if st.readDB, err = OpenReader(abs); err != nil {
+			st.readDB = nil
+			return fmt.Errorf("reopen reader after restore: %w", err)
+		}
+	}
 	return nil
 }
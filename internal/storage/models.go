@@ -23,6 +23,19 @@ type Server struct {
 	CreatedAt       string  `json:"created_at"`
 }
 
+// FleetTotals aggregates the servers table: row and online counts and the
+// sums of the last scraped usage percentages.
+type FleetTotals struct {
+	Total, Online              int
+	CPUSum, MemorySum, DiskSum float64
+}
+
+// Endpoint identifies a scrape target by host and exporter port.
+type Endpoint struct {
+	Host string
+	Port int
+}
+
 type Service struct {
 	ID             int64   `json:"id"`
 	Name           string  `json:"name"`
@@ -50,6 +63,13 @@ type MetricPoint struct {
 	Timestamp     string   `json:"timestamp"`
 }
 
+// Timeline is a server's raw up/down history as parallel columns:
+// Up[i] reports whether the row at Timestamps[i] had a cpu sample.
+type Timeline struct {
+	Timestamps []string
+	Up         []bool
+}
+
 type ServiceHistory struct {
 	ID        int64   `json:"id"`
 	ServiceID int64   `json:"service_id"`
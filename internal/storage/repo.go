@@ -6,20 +6,29 @@ import (
 	"errors"
 	"fmt"
 	"strings"
+	"sync"
+	"sync/atomic"
 	"time"
 )
 
 type Store struct {
 	StoreCore
 	maxBackups int
+	keyTouched sync.Map // API key id -> unix time of its last last_used write
+	serversGen atomic.Uint64
 }
 
+// ServersGen changes whenever the servers table may have changed, so
+// callers can reuse anything derived from ListServers while it holds.
+func (st *Store) ServersGen() uint64 { return st.serversGen.Load() }
+
 func NewStore(db *sql.DB, path string) *Store {
 	return &Store{StoreCore: StoreCore{DB: db, DBPath: path}}
 }
 
-func scanServer(row interface{ Scan(...any) error }) (*Server, error) {
-	var s Server
+// scanServer fills s from one servers row. List queries scan straight into
+// their result slice, so a row costs no intermediate Server allocation.
+func scanServer(row interface{ Scan(...any) error }, s *Server) error {
 	var group, osType, exporter, errMsg, volumes, labels sql.NullString
 	var lastCheck, createdAt sql.NullString
 	var cpu, mem, disk sql.NullFloat64
@@ -28,7 +37,7 @@ func scanServer(row interface{ Scan(...any) error }) (*Server, error) {
 		&exporter, &errMsg, &s.IsMaintenance, &s.FlappingCount, &volumes, &s.ScrapeInterval,
 		&labels, &createdAt)
 	if err != nil {
-		return nil, err
+		return err
 	}
 	s.ServerGroup = group.String
 	s.OSType = osType.String
@@ -47,7 +56,7 @@ func scanServer(row interface{ Scan(...any) error }) (*Server, error) {
 	if s.Labels == "" {
 		s.Labels = "{}"
 	}
-	return &s, nil
+	return nil
 }
 
 const serverCols = `id, name, host, agent_port, server_group, os_type, enabled, last_status,
@@ -55,42 +64,113 @@ const serverCols = `id, name, host, agent_port, server_group, os_type, enabled,
  is_maintenance, flapping_count, volumes, scrape_interval, labels, created_at`
 
 func (st *Store) ListServers() ([]Server, error) {
-	rows, err := st.DB.Query(`SELECT ` + serverCols + ` FROM servers ORDER BY name`)
+	out := []Server{}
+	err := st.EachServer(func(s *Server) error {
+		out = append(out, *s)
+		return nil
+	})
 	if err != nil {
 		return nil, err
 	}
+	return out, nil
+}
+
+// EachServer is ListServers delivered row by row into one reused Server, so
+// the list can be encoded straight from the cursor. fn must not keep s; an
+// error from fn stops the scan and is returned.
+func (st *Store) EachServer(fn func(s *Server) error) error {
+	stmt, err := st.readStmt(`SELECT ` + serverCols + ` FROM servers ORDER BY name`)
+	if err != nil {
+		return err
+	}
+	rows, err := stmt.Query()
+	if err != nil {
+		return err
+	}
 	defer rows.Close()
-	out := []Server{}
+	var s Server
 	for rows.Next() {
-		s, err := scanServer(rows)
-		if err != nil {
-			return nil, err
+		if err := scanServer(rows, &s); err != nil {
+			return err
+		}
+		if err := fn(&s); err != nil {
+			return err
 		}
-		out = append(out, *s)
 	}
-	return out, rows.Err()
+	return rows.Err()
 }
 
 func (st *Store) GetServer(id int64) (*Server, error) {
-	row := st.DB.QueryRow(`SELECT `+serverCols+` FROM servers WHERE id = ?`, id)
-	s, err := scanServer(row)
+	stmt, err := st.readStmt(`SELECT ` + serverCols + ` FROM servers WHERE id = ?`)
+	if err != nil {
+		return nil, err
+	}
+	var s Server
+	err = scanServer(stmt.QueryRow(id), &s)
 	if errors.Is(err, sql.ErrNoRows) {
 		return nil, nil
 	}
-	return s, err
+	if err != nil {
+		return nil, err
+	}
+	return &s, nil
 }
 
-func (st *Store) CreateServer(s *Server) (int64, error) {
-	res, err := st.DB.Exec(`INSERT INTO servers (name, host, agent_port, server_group, os_type,
+const sqlServerInsert = `INSERT INTO servers (name, host, agent_port, server_group, os_type,
 	  enabled, cpu_percent, memory_percent, disk_percent, is_maintenance, volumes, scrape_interval, labels, created_at)
-	  VALUES (?,?,?,?,?,?,0,0,0,0,?,?,?,?)`,
-		s.Name, s.Host, s.AgentPort, s.ServerGroup, s.OSType, s.Enabled, s.Volumes, s.ScrapeInterval, s.Labels, Now())
+	  VALUES (?,?,?,?,?,?,0,0,0,0,?,?,?,?)`
+
+func (st *Store) CreateServer(s *Server) (int64, error) {
+	stmt, err := st.stmt(sqlServerInsert)
+	if err != nil {
+		return 0, err
+	}
+	res, err := stmt.Exec(s.Name, s.Host, s.AgentPort, s.ServerGroup, s.OSType, s.Enabled, s.Volumes, s.ScrapeInterval, s.Labels, Now())
+	st.serversGen.Add(1)
 	if err != nil {
 		return 0, err
 	}
 	return res.LastInsertId()
 }
 
+// CreateServers inserts several servers in one transaction, so a bulk
+// import pays for one commit instead of one per row. Either every server
+// is created or none is; the ids come back in input order.
+func (st *Store) CreateServers(ss []*Server) ([]int64, error) {
+	ids := make([]int64, 0, len(ss))
+	if len(ss) == 0 {
+		return ids, nil
+	}
+	defer st.serversGen.Add(1)
+	tx, err := st.DB.Begin()
+	if err != nil {
+		return nil, err
+	}
+	defer tx.Rollback()
+	prepared, err := st.stmt(sqlServerInsert)
+	if err != nil {
+		return nil, err
+	}
+	stmt := tx.Stmt(prepared)
+	defer stmt.Close()
+	now := Now()
+	for _, s := range ss {
+		res, err := stmt.Exec(s.Name, s.Host, s.AgentPort, s.ServerGroup, s.OSType, s.Enabled, s.Volumes, s.ScrapeInterval, s.Labels, now)
+		if err != nil {
+			return nil, err
+		}
+		id, err := res.LastInsertId()
+		if err != nil {
+			return nil, err
+		}
+		ids = append(ids, id)
+	}
+	if err := tx.Commit(); err != nil {
+		return nil, err
+	}
+	return ids, nil
+}
+
 func (st *Store) UpdateServer(id int64, fields map[string]any) error {
 	if len(fields) == 0 {
 		return nil
@@ -103,10 +183,12 @@ func (st *Store) UpdateServer(id int64, fields map[string]any) error {
 	}
 	args = append(args, id)
 	_, err := st.DB.Exec(`UPDATE servers SET `+strings.Join(sets, ", ")+` WHERE id = ?`, args...)
+	st.serversGen.Add(1)
 	return err
 }
 
 func (st *Store) DeleteServer(id int64) error {
+	defer st.serversGen.Add(1)
 	tx, err := st.DB.Begin()
 	if err != nil {
 		return err
@@ -124,30 +206,139 @@ func (st *Store) DeleteServer(id int64) error {
 	return tx.Commit()
 }
 
+// ServerEndpoints maps host+port to server id. The projection is covered by
+// idx_servers_host_port, so SQLite answers it from the index without
+// touching the full rows (volumes/labels JSON).
+func (st *Store) ServerEndpoints() (map[Endpoint]int64, error) {
+	rows, err := st.reader().Query(`SELECT id, host, agent_port FROM servers`)
+	if err != nil {
+		return nil, err
+	}
+	defer rows.Close()
+	out := map[Endpoint]int64{}
+	for rows.Next() {
+		var id int64
+		var e Endpoint
+		if err := rows.Scan(&id, &e.Host, &e.Port); err != nil {
+			return nil, err
+		}
+		out[e] = id
+	}
+	return out, rows.Err()
+}
+
+// EnabledServers returns the servers to scrape. A scrape round needs only
+// the identity, target and alerting state of each server, so just those
+// columns are read; the telemetry text (volumes, labels, exporter version,
+// last error) of every row is skipped and left empty.
 func (st *Store) EnabledServers() ([]Server, error) {
-	rows, err := st.DB.Query(`SELECT ` + serverCols + ` FROM servers WHERE enabled = 1`)
+	stmt, err := st.readStmt(`SELECT id, name, host, agent_port, last_status, cpu_percent,
+	  is_maintenance FROM servers WHERE enabled = 1`)
+	if err != nil {
+		return nil, err
+	}
+	rows, err := stmt.Query()
 	if err != nil {
 		return nil, err
 	}
 	defer rows.Close()
 	out := []Server{}
 	for rows.Next() {
-		s, err := scanServer(rows)
-		if err != nil {
+		s := Server{Enabled: 1}
+		var cpu sql.NullFloat64
+		if err := rows.Scan(&s.ID, &s.Name, &s.Host, &s.AgentPort, &s.LastStatus, &cpu, &s.IsMaintenance); err != nil {
 			return nil, err
 		}
-		out = append(out, *s)
+		s.CPUPercent = cpu.Float64
+		out = append(out, s)
 	}
 	return out, rows.Err()
 }
 
+const (
+	sqlInsertMetricPoint = `INSERT INTO metrics_history (server_id, cpu_percent, memory_percent,
+	  disk_percent, network_rx, network_tx, disk_info, timestamp) VALUES (?,?,?,?,?,?,?,?)`
+	// sqlScrapeStatus records both outcomes with one statement: a down
+	// scrape binds NULL metrics, and COALESCE keeps the last known values.
+	sqlScrapeStatus = `UPDATE servers SET last_status = ?, last_check = ?,
+	  cpu_percent = COALESCE(?, cpu_percent), memory_percent = COALESCE(?, memory_percent),
+	  disk_percent = COALESCE(?, disk_percent), volumes = COALESCE(?, volumes),
+	  exporter_version = COALESCE(?, exporter_version) WHERE id = ?`
+)
+
 func (st *Store) InsertMetricPoint(serverID int64, cpu, mem, disk, rx, tx *float64, diskInfo string) error {
-	_, err := st.DB.Exec(`INSERT INTO metrics_history (server_id, cpu_percent, memory_percent,
-	  disk_percent, network_rx, network_tx, disk_info, timestamp) VALUES (?,?,?,?,?,?,?,?)`,
-		serverID, cpu, mem, disk, rx, tx, diskInfo, Now())
+	stmt, err := st.stmt(sqlInsertMetricPoint)
+	if err != nil {
+		return err
+	}
+	_, err = stmt.Exec(serverID, cpu, mem, disk, rx, tx, diskInfo, Now())
 	return err
 }
 
+// ClearMetricHistory deletes every stored history point.
+func (st *Store) ClearMetricHistory() error {
+	_, err := st.DB.Exec(`DELETE FROM metrics_history`)
+	return err
+}
+
+// ScrapeWrite is the outcome of one exporter scrape: a metrics_history row
+// plus the matching servers status update.
+type ScrapeWrite struct {
+	ServerID        int64
+	Up              bool
+	Timestamp       string
+	CPU             float64
+	Memory          float64
+	Disk            float64
+	NetRx           float64
+	NetTx           float64
+	DiskInfo        string
+	Volumes         string
+	ExporterVersion string
+}
+
+// WriteScrapes persists a whole scrape round in one transaction, so N
+// servers cost one commit (one WAL sync) instead of 2N. The statements are
+// prepared once and rebound to each transaction.
+func (st *Store) WriteScrapes(batch []ScrapeWrite) error {
+	if len(batch) == 0 {
+		return nil
+	}
+	defer st.serversGen.Add(1)
+	tx, err := st.DB.Begin()
+	if err != nil {
+		return err
+	}
+	defer tx.Rollback()
+	var stmts [2]*sql.Stmt
+	for i, q := range []string{sqlInsertMetricPoint, sqlScrapeStatus} {
+		s, err := st.stmt(q)
+		if err != nil {
+			return err
+		}
+		stmts[i] = tx.Stmt(s)
+		defer stmts[i].Close()
+	}
+	insert, update := stmts[0], stmts[1]
+	for _, w := range batch {
+		// Down rows store NULL metrics and leave the server's values as-is.
+		var cpu, mem, disk, netRx, netTx, vols, version any
+		status, diskInfo := "down", "{}"
+		if w.Up {
+			cpu, mem, disk, netRx, netTx = w.CPU, w.Memory, w.Disk, w.NetRx, w.NetTx
+			vols, version = w.Volumes, w.ExporterVersion
+			status, diskInfo = "up", w.DiskInfo
+		}
+		if _, err := insert.Exec(w.ServerID, cpu, mem, disk, netRx, netTx, diskInfo, w.Timestamp); err != nil {
+			return err
+		}
+		if _, err := update.Exec(status, w.Timestamp, cpu, mem, disk, vols, version, w.ServerID); err != nil {
+			return err
+		}
+	}
+	return tx.Commit()
+}
+
 // HistoryRange maps a token (5m,15m,1h,6h,12h,24h,3d,7d,15d,30d) to a SQLite
 // datetime modifier and a downsample bucket size in seconds.
 func HistoryRange(token string) (modifier string, bucketSec int) {
@@ -178,126 +369,126 @@ func HistoryRange(token string) (modifier string, bucketSec int) {
 	return "-1 hours", 60
 }
 
+// bucketExpr truncates the fixed-layout TEXT timestamp to the minute or
+// hour by prefix, which avoids a strftime date parse on every row scanned.
 func bucketExpr(bucketSec int) string {
 	if bucketSec >= 3600 {
-		return "strftime('%Y-%m-%dT%H:00', timestamp)"
+		return "substr(timestamp, 1, 13)"
 	}
-	return "strftime('%Y-%m-%dT%H:%M', timestamp)"
+	return "substr(timestamp, 1, 16)"
 }
 
+// historyCols are the metrics_history columns scanMetricPoint reads, from
+// the alias m. The window queries rank only ids, which the
+// (server_id, timestamp) index covers, and look up full rows for the one
+// point kept per bucket, instead of carrying every column of every row in
+// the range through the window sort.
+const historyCols = `m.id, m.server_id, m.cpu_percent, m.memory_percent, m.disk_percent,
+ m.network_rx, m.network_tx, m.disk_info, m.timestamp`
+
 // ServerHistory returns downsampled history points for a server.
 func (st *Store) ServerHistory(serverID int64, token string) ([]MetricPoint, error) {
 	mod, bucket := HistoryRange(token)
-	q := fmt.Sprintf(`SELECT id, server_id, cpu_percent, memory_percent, disk_percent,
-	  network_rx, network_tx, disk_info, timestamp FROM (
-	    SELECT *, ROW_NUMBER() OVER (PARTITION BY %s ORDER BY id DESC) AS rn
+	q := fmt.Sprintf(`SELECT `+historyCols+` FROM (
+	    SELECT id, ROW_NUMBER() OVER (PARTITION BY %s ORDER BY id DESC) AS rn
 	    FROM metrics_history
-	    WHERE server_id = ? AND timestamp >= datetime('now', ?)
-	  ) WHERE rn = 1 ORDER BY timestamp ASC`, bucketExpr(bucket))
-	rows, err := st.DB.Query(q, serverID, mod)
+	    WHERE server_id = ? AND timestamp >= %s
+	  ) k JOIN metrics_history m ON m.id = k.id WHERE k.rn = 1 ORDER BY m.timestamp ASC`, bucketExpr(bucket), sqlSince)
+	rows, err := st.reader().Query(q, serverID, mod)
 	if err != nil {
 		return nil, err
 	}
 	defer rows.Close()
 	out := []MetricPoint{}
 	for rows.Next() {
-		var m MetricPoint
-		var cpu, mem, disk, rx, tx sql.NullFloat64
-		var diskInfo sql.NullString
-		var ts sql.NullString
-		if err := rows.Scan(&m.ID, &m.ServerID, &cpu, &mem, &disk, &rx, &tx, &diskInfo, &ts); err != nil {
+		m, err := scanMetricPoint(rows)
+		if err != nil {
 			return nil, err
 		}
-		m.CPUPercent = floatPtr(cpu)
-		m.MemoryPercent = floatPtr(mem)
-		m.DiskPercent = floatPtr(disk)
-		m.NetworkRX = floatPtr(rx)
-		m.NetworkTX = floatPtr(tx)
-		m.DiskInfo = diskInfo.String
-		m.Timestamp = ts.String
 		out = append(out, m)
 	}
-	return out, rows.Err()
+	if err := rows.Err(); err != nil {
+		return nil, err
+	}
+	return out, nil
 }
 
 // AllServersHistory is the same downsampling across all servers (used by
 // /servers/history and /metrics/trend).
 func (st *Store) AllServersHistory(token string) (map[int64][]MetricPoint, error) {
 	mod, bucket := HistoryRange(token)
-	q := fmt.Sprintf(`SELECT id, server_id, cpu_percent, memory_percent, disk_percent,
-	  network_rx, network_tx, disk_info, timestamp FROM (
-	    SELECT *, ROW_NUMBER() OVER (PARTITION BY server_id, %s ORDER BY id DESC) AS rn
+	q := fmt.Sprintf(`SELECT `+historyCols+` FROM (
+	    SELECT id, ROW_NUMBER() OVER (PARTITION BY server_id, %s ORDER BY id DESC) AS rn
 	    FROM metrics_history
-	    WHERE timestamp >= datetime('now', ?)
-	  ) WHERE rn = 1 ORDER BY timestamp ASC`, bucketExpr(bucket))
-	rows, err := st.DB.Query(q, mod)
+	    WHERE timestamp >= %s
+	  ) k JOIN metrics_history m ON m.id = k.id WHERE k.rn = 1 ORDER BY m.timestamp ASC`, bucketExpr(bucket), sqlSince)
+	rows, err := st.reader().Query(q, mod)
 	if err != nil {
 		return nil, err
 	}
 	defer rows.Close()
 	out := map[int64][]MetricPoint{}
 	for rows.Next() {
-		var m MetricPoint
-		var cpu, mem, disk, rx, tx sql.NullFloat64
-		var diskInfo sql.NullString
-		var ts sql.NullString
-		if err := rows.Scan(&m.ID, &m.ServerID, &cpu, &mem, &disk, &rx, &tx, &diskInfo, &ts); err != nil {
+		m, err := scanMetricPoint(rows)
+		if err != nil {
 			return nil, err
 		}
-		m.CPUPercent = floatPtr(cpu)
-		m.MemoryPercent = floatPtr(mem)
-		m.DiskPercent = floatPtr(disk)
-		m.NetworkRX = floatPtr(rx)
-		m.NetworkTX = floatPtr(tx)
-		m.DiskInfo = diskInfo.String
-		m.Timestamp = ts.String
 		out[m.ServerID] = append(out[m.ServerID], m)
 	}
 	return out, rows.Err()
 }
 
-func floatPtr(n sql.NullFloat64) *float64 {
-	if !n.Valid {
-		return nil
+// scanMetricPoint reads one metrics_history row (id, server_id, the five
+// metric columns, disk_info, timestamp). History queries return thousands of
+// rows, so the non-NULL metrics of a row share one backing array instead of
+// being allocated one pointer at a time.
+func scanMetricPoint(rows *sql.Rows) (MetricPoint, error) {
+	var m MetricPoint
+	var vals [5]sql.NullFloat64
+	var diskInfo, ts sql.NullString
+	if err := rows.Scan(&m.ID, &m.ServerID, &vals[0], &vals[1], &vals[2], &vals[3], &vals[4], &diskInfo, &ts); err != nil {
+		return m, err
+	}
+	var store *[5]float64 // stays nil for downtime rows (all NULL)
+	ptrs := [5]**float64{&m.CPUPercent, &m.MemoryPercent, &m.DiskPercent, &m.NetworkRX, &m.NetworkTX}
+	for i, v := range vals {
+		if v.Valid {
+			if store == nil {
+				store = new([5]float64)
+			}
+			store[i] = v.Float64
+			*ptrs[i] = &store[i]
+		}
 	}
-	f := n.Float64
-	return &f
+	m.DiskInfo = diskInfo.String
+	m.Timestamp = ts.String
+	return m, nil
 }
 
-// UptimeTimeline counts non-NULL cpu rows as "up".
-func (st *Store) UptimeTimeline(serverID int64, days int) (up int, down int, timeline []MetricPoint, err error) {
+// UptimeTimeline counts non-NULL cpu rows as "up". Only the timestamp and
+// the cpu NULL flag are read, into parallel columns, since callers never
+// need the metric values or disk_info of the (unsampled) rows.
+func (st *Store) UptimeTimeline(serverID int64, days int) (up int, down int, timeline Timeline, err error) {
 	mod := fmt.Sprintf("-%d days", days)
-	rows, err := st.DB.Query(`SELECT id, server_id, cpu_percent, memory_percent, disk_percent,
-	  network_rx, network_tx, disk_info, timestamp FROM metrics_history
-	  WHERE server_id = ? AND timestamp >= datetime('now', ?) ORDER BY timestamp ASC`, serverID, mod)
+	rows, err := st.reader().Query(`SELECT timestamp, cpu_percent IS NOT NULL FROM metrics_history
+	  WHERE server_id = ? AND timestamp >= `+sqlSince+` ORDER BY timestamp ASC`, serverID, mod)
 	if err != nil {
-		return 0, 0, nil, err
+		return 0, 0, timeline, err
 	}
 	defer rows.Close()
 	for rows.Next() {
-		var m MetricPoint
-		var cpu, mem, disk, rx, tx sql.NullFloat64
-		var diskInfo sql.NullString
 		var ts sql.NullString
-		if err := rows.Scan(&m.ID, &m.ServerID, &cpu, &mem, &disk, &rx, &tx, &diskInfo, &ts); err != nil {
-			return 0, 0, nil, err
-		}
-		m.CPUPercent = floatPtr(cpu)
-		m.MemoryPercent = floatPtr(mem)
-		m.DiskPercent = floatPtr(disk)
-		m.NetworkRX = floatPtr(rx)
-		m.NetworkTX = floatPtr(tx)
-		m.DiskInfo = diskInfo.String
-		m.Timestamp = ts.String
-		status := "down"
-		if cpu.Valid {
-			status = "up"
+		var isUp bool
+		if err := rows.Scan(&ts, &isUp); err != nil {
+			return 0, 0, timeline, err
+		}
+		if isUp {
 			up++
 		} else {
 			down++
 		}
-		_ = status
-		timeline = append(timeline, m)
+		timeline.Timestamps = append(timeline.Timestamps, ts.String)
+		timeline.Up = append(timeline.Up, isUp)
 	}
 	return up, down, timeline, rows.Err()
 }
@@ -352,17 +543,16 @@ func num(v any) float64 {
 
 // --- Services ---
 
-func scanService(row interface{ Scan(...any) error }) (*Service, error) {
-	var s Service
+func scanService(row interface{ Scan(...any) error }, s *Service) error {
 	var ts, lc sql.NullString
 	err := row.Scan(&s.ID, &s.Name, &s.TargetURL, &s.CheckType, &s.Interval,
 		&s.Timeout, &s.ExpectedStatus, &s.Enabled, &s.Status, &lc, &s.ResponseTimeMS, &ts)
 	if err != nil {
-		return nil, err
+		return err
 	}
 	s.LastCheck = lc.String
 	s.CreatedAt = ts.String
-	return &s, nil
+	return nil
 }
 
 const serviceCols = `id, name, target_url, check_type, interval, timeout, expected_status,
@@ -376,22 +566,25 @@ func (st *Store) ListServices() ([]Service, error) {
 	defer rows.Close()
 	out := []Service{}
 	for rows.Next() {
-		s, err := scanService(rows)
-		if err != nil {
+		out = append(out, Service{})
+		if err := scanService(rows, &out[len(out)-1]); err != nil {
 			return nil, err
 		}
-		out = append(out, *s)
 	}
 	return out, rows.Err()
 }
 
 func (st *Store) GetService(id int64) (*Service, error) {
 	row := st.DB.QueryRow(`SELECT `+serviceCols+` FROM services WHERE id = ?`, id)
-	s, err := scanService(row)
+	var s Service
+	err := scanService(row, &s)
 	if errors.Is(err, sql.ErrNoRows) {
 		return nil, nil
 	}
-	return s, err
+	if err != nil {
+		return nil, err
+	}
+	return &s, nil
 }
 
 func (st *Store) CreateService(s *Service) (int64, error) {
@@ -439,18 +632,21 @@ func (st *Store) DeleteService(id int64) error {
 }
 
 func (st *Store) EnabledServices() ([]Service, error) {
-	rows, err := st.DB.Query(`SELECT ` + serviceCols + ` FROM services WHERE enabled = 1`)
+	stmt, err := st.stmt(`SELECT ` + serviceCols + ` FROM services WHERE enabled = 1`)
+	if err != nil {
+		return nil, err
+	}
+	rows, err := stmt.Query()
 	if err != nil {
 		return nil, err
 	}
 	defer rows.Close()
 	out := []Service{}
 	for rows.Next() {
-		s, err := scanService(rows)
-		if err != nil {
+		out = append(out, Service{})
+		if err := scanService(rows, &out[len(out)-1]); err != nil {
 			return nil, err
 		}
-		out = append(out, *s)
 	}
 	return out, rows.Err()
 }
@@ -461,10 +657,55 @@ func (st *Store) InsertServiceHistory(serviceID int64, status string, latency fl
 	return err
 }
 
+// CheckWrite is the outcome of one service check.
+type CheckWrite struct {
+	ServiceID int64
+	Status    string
+	LatencyMS float64
+	Timestamp string
+}
+
+const (
+	sqlCheckUpdate = `UPDATE services SET status = ?, last_check = ?, response_time_ms = ? WHERE id = ?`
+	sqlCheckInsert = `INSERT INTO services_history (service_id, status, latency_ms, timestamp) VALUES (?,?,?,?)`
+)
+
+// WriteChecks stores a round of service check results (status update plus
+// history row per service) in one transaction.
+func (st *Store) WriteChecks(batch []CheckWrite) error {
+	if len(batch) == 0 {
+		return nil
+	}
+	tx, err := st.DB.Begin()
+	if err != nil {
+		return err
+	}
+	defer tx.Rollback()
+	var stmts [2]*sql.Stmt
+	for i, q := range []string{sqlCheckUpdate, sqlCheckInsert} {
+		s, err := st.stmt(q)
+		if err != nil {
+			return err
+		}
+		stmts[i] = tx.Stmt(s)
+		defer stmts[i].Close()
+	}
+	update, insert := stmts[0], stmts[1]
+	for _, c := range batch {
+		if _, err := update.Exec(c.Status, c.Timestamp, c.LatencyMS, c.ServiceID); err != nil {
+			return err
+		}
+		if _, err := insert.Exec(c.ServiceID, c.Status, c.LatencyMS, c.Timestamp); err != nil {
+			return err
+		}
+	}
+	return tx.Commit()
+}
+
 func (st *Store) ServiceHistory(token string) ([]ServiceHistory, error) {
 	mod, _ := HistoryRange(token)
-	rows, err := st.DB.Query(`SELECT id, service_id, status, latency_ms, timestamp
-	  FROM services_history WHERE timestamp >= datetime('now', ?) ORDER BY id ASC`, mod)
+	rows, err := st.reader().Query(`SELECT id, service_id, status, latency_ms, timestamp
+	  FROM services_history WHERE timestamp >= `+sqlSince+` ORDER BY id ASC`, mod)
 	if err != nil {
 		return nil, err
 	}
@@ -554,9 +795,14 @@ func nullID(id int64) any {
 
 // --- Audit log ---
 
+// AddAudit runs after every mutating API call, so its statement is cached.
 func (st *Store) AddAudit(userID int64, action, details, ip string) error {
-	_, err := st.DB.Exec(`INSERT INTO audit_logs (user_id, action, details, ip_address, timestamp)
-	  VALUES (?,?,?,?,?)`, nullID(userID), action, details, ip, Now())
+	stmt, err := st.stmt(`INSERT INTO audit_logs (user_id, action, details, ip_address, timestamp)
+	  VALUES (?,?,?,?,?)`)
+	if err != nil {
+		return err
+	}
+	_, err = stmt.Exec(nullID(userID), action, details, ip, Now())
 	return err
 }
 
@@ -605,9 +851,12 @@ func (st *Store) GetUserByUsername(username string) (*User, error) {
 }
 
 func (st *Store) GetUserByID(id int64) (*User, error) {
-	row := st.DB.QueryRow(`SELECT id, username, password_hash, is_admin, must_change_password,
-	  created_at, last_login FROM users WHERE id = ?`, id)
-	return scanUser(row)
+	stmt, err := st.stmt(`SELECT id, username, password_hash, is_admin, must_change_password,
+	  created_at, last_login FROM users WHERE id = ?`)
+	if err != nil {
+		return nil, err
+	}
+	return scanUser(stmt.QueryRow(id))
 }
 
 func scanUser(row interface{ Scan(...any) error }) (*User, error) {
@@ -681,9 +930,12 @@ func (st *Store) CountAdmins() (int, error) {
 // --- API keys ---
 
 func (st *Store) GetAPIKeyBySHA(sha string) (*APIKey, error) {
-	row := st.DB.QueryRow(`SELECT id, user_id, key_hash, key_sha256, name, created_at, last_used
-	  FROM api_keys WHERE key_sha256 = ?`, sha)
-	return scanAPIKey(row)
+	stmt, err := st.stmt(`SELECT id, user_id, key_hash, key_sha256, name, created_at, last_used
+	  FROM api_keys WHERE key_sha256 = ?`)
+	if err != nil {
+		return nil, err
+	}
+	return scanAPIKey(stmt.QueryRow(sha))
 }
 
 func scanAPIKey(row interface{ Scan(...any) error }) (*APIKey, error) {
@@ -737,8 +989,20 @@ func (st *Store) DeleteAPIKey(id int64) error {
 	return err
 }
 
+// touchInterval is how stale an API key's last_used may get before a use
+// rewrites it.
+const touchInterval = time.Minute
+
+// TouchAPIKey records a use of the key. Agents present their key on every
+// push, so last_used is rewritten at most once per touchInterval per key:
+// a busy key costs one commit a minute instead of one per request.
 func (st *Store) TouchAPIKey(id int64) {
-	_, _ = st.DB.Exec(`UPDATE api_keys SET last_used = ? WHERE id = ?`, Now(), id)
+	now := time.Now()
+	if last, ok := st.keyTouched.Load(id); ok && now.Sub(time.Unix(last.(int64), 0)) < touchInterval {
+		return
+	}
+	st.keyTouched.Store(id, now.Unix())
+	_, _ = st.DB.Exec(`UPDATE api_keys SET last_used = ? WHERE id = ?`, Stamp(now), id)
 }
 
 // --- Notifications ---
@@ -760,18 +1024,51 @@ func (st *Store) GetNotifications() (*Notification, error) {
 }
 
 func (st *Store) SaveNotifications(config string, enabled int) error {
-	_, err := st.DB.Exec(`INSERT INTO notifications (channel, enabled, config) VALUES ('all',?,?)
-	  ON CONFLICT(channel) DO UPDATE SET enabled=excluded.enabled, config=excluded.config`,
-		enabled, config)
+	stmt, err := st.stmt(`INSERT INTO notifications (channel, enabled, config) VALUES ('all',?,?)
+	  ON CONFLICT(channel) DO UPDATE SET enabled=excluded.enabled, config=excluded.config`)
+	if err != nil {
+		return err
+	}
+	_, err = stmt.Exec(enabled, config)
 	return err
 }
 
 // --- Push metrics ---
 
+const sqlPushMetric = `INSERT INTO metrics (name, labels, value, timestamp) VALUES (?,?,?,?)`
+
 func (st *Store) PushMetric(name, labels string, value float64) error {
-	_, err := st.DB.Exec(`INSERT INTO metrics (name, labels, value, timestamp) VALUES (?,?,?,?)`,
-		name, labels, value, Now())
-	return err
+	return st.PushMetrics([]Metric{{Name: name, Labels: labels, Value: value}})
+}
+
+// PushMetrics inserts a batch of pushed samples in one transaction. An
+// empty Timestamp is stamped with the time of the call.
+func (st *Store) PushMetrics(batch []Metric) error {
+	if len(batch) == 0 {
+		return nil
+	}
+	s, err := st.stmt(sqlPushMetric)
+	if err != nil {
+		return err
+	}
+	tx, err := st.DB.Begin()
+	if err != nil {
+		return err
+	}
+	defer tx.Rollback()
+	insert := tx.Stmt(s)
+	defer insert.Close()
+	now := Now()
+	for _, m := range batch {
+		ts := m.Timestamp
+		if ts == "" {
+			ts = now
+		}
+		if _, err := insert.Exec(m.Name, m.Labels, m.Value, ts); err != nil {
+			return err
+		}
+	}
+	return tx.Commit()
 }
 
 func (st *Store) RecentMetrics(limit int) ([]Metric, error) {
@@ -800,12 +1097,30 @@ func (st *Store) RecentMetrics(limit int) ([]Metric, error) {
 
 // --- Retention / maintenance ---
 
+// cleanupBatch caps the rows removed per DELETE in Cleanup.
+var cleanupBatch = 5000
+
+// Cleanup deletes rows older than the retention window. Each table is
+// trimmed in short batches, each its own transaction, so purging a large
+// backlog (e.g. after downtime or a retention change) never holds the write
+// lock long enough to stall scrape and check writes.
 func (st *Store) Cleanup(retentionHours int) error {
-	mod := fmt.Sprintf("-%d hours", retentionHours)
+	var cutoff string
+	if err := st.DB.QueryRow(`SELECT `+sqlSince, fmt.Sprintf("-%d hours", retentionHours)).Scan(&cutoff); err != nil {
+		return err
+	}
 	tables := []string{"metrics_history", "services_history", "alerts", "metrics"}
 	for _, t := range tables {
-		if _, err := st.DB.Exec(fmt.Sprintf(`DELETE FROM %s WHERE timestamp < datetime('now', ?)`, t), mod); err != nil {
-			return err
+		q := fmt.Sprintf(`DELETE FROM %[1]s WHERE id IN (
+		  SELECT id FROM %[1]s WHERE timestamp < ? LIMIT ?)`, t)
+		for {
+			res, err := st.DB.Exec(q, cutoff, cleanupBatch)
+			if err != nil {
+				return err
+			}
+			if n, _ := res.RowsAffected(); n < int64(cleanupBatch) {
+				break
+			}
 		}
 	}
 	return nil
@@ -823,8 +1138,8 @@ func (st *Store) ServerLastTimestamp(serverID int64) string {
 
 // SlowDirtyUptimePercent returns uptime % for last 1h based on non-NULL cpu rows.
 func (st *Store) ServerSummary(serverID int64) (avgCPU, avgMem, avgDisk float64, status string, err error) {
-	rows, err := st.DB.Query(`SELECT cpu_percent, memory_percent, disk_percent FROM metrics_history
-	  WHERE server_id = ? AND timestamp >= datetime('now','-1 hours')`, serverID)
+	rows, err := st.reader().Query(`SELECT cpu_percent, memory_percent, disk_percent FROM metrics_history
+	  WHERE server_id = ? AND timestamp >= `+sqlSince, serverID, "-1 hours")
 	if err != nil {
 		return 0, 0, 0, "", err
 	}
@@ -877,4 +1192,22 @@ func (st *Store) TotalOnline() (int, error) {
 	return n, err
 }
 
+// ServerCounts returns how many servers there are and how many were last
+// seen up. Only last_status is read, so idx_servers_status covers it.
+func (st *Store) ServerCounts() (total, online int, err error) {
+	err = st.reader().QueryRow(`SELECT COUNT(*), COALESCE(SUM(last_status = 'up'), 0) FROM servers`).
+		Scan(&total, &online)
+	return total, online, err
+}
+
+// ServerTotals computes FleetTotals in one aggregate row instead of loading
+// and scanning every server.
+func (st *Store) ServerTotals() (FleetTotals, error) {
+	var t FleetTotals
+	err := st.reader().QueryRow(`SELECT COUNT(*), COALESCE(SUM(last_status = 'up'), 0),
+	  TOTAL(cpu_percent), TOTAL(memory_percent), TOTAL(disk_percent) FROM servers`).
+		Scan(&t.Total, &t.Online, &t.CPUSum, &t.MemorySum, &t.DiskSum)
+	return t, err
+}
+
 var _ = time.Now
@@ -1,11 +1,13 @@
 package storage
 
 import (
+	"context"
 	"database/sql"
 	"fmt"
 	"os"
 	"path/filepath"
 	"sync"
+	"sync/atomic"
 	"time"
 
 	_ "modernc.org/sqlite"
@@ -34,6 +36,9 @@ CREATE TABLE IF NOT EXISTS servers (
   labels TEXT DEFAULT '{}',
   created_at TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_servers_host_port ON servers(host, agent_port);
+CREATE INDEX IF NOT EXISTS idx_servers_status ON servers(last_status);
+CREATE INDEX IF NOT EXISTS idx_servers_name ON servers(name);
 
 CREATE TABLE IF NOT EXISTS services (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -49,6 +54,7 @@ CREATE TABLE IF NOT EXISTS services (
   response_time_ms REAL DEFAULT 0,
   created_at TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_services_name ON services(name);
 
 CREATE TABLE IF NOT EXISTS metrics_history (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -149,6 +155,15 @@ CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name);
 CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics(timestamp);
 `
 
+// connPragmas are applied to every pooled connection (SQLite pragmas are
+// per connection): wait for locks instead of failing, keep temp tables and
+// sort spills in memory, memory-map up to 256 MiB of the file so hot reads
+// skip the read() syscall, and raise the page cache from the 2 MiB default
+// to 16 MiB so index pages touched by the history window queries and
+// retention deletes stay cached. journal_mode=WAL persists in the file and
+// is set once by initFile.
+const connPragmas = "_pragma=busy_timeout(30000)&_pragma=temp_store(MEMORY)&_pragma=mmap_size(268435456)&_pragma=cache_size(-16000)"
+
 func Open(path string) (*sql.DB, string, error) {
 	if path == "" {
 		path = "pymon.db"
@@ -160,20 +175,145 @@ func Open(path string) (*sql.DB, string, error) {
 	if dir := filepath.Dir(abs); dir != "." && dir != "" {
 		_ = os.MkdirAll(dir, 0o755)
 	}
-	dsn := fmt.Sprintf("file:%s?_pragma=journal_mode(WAL)&_pragma=busy_timeout(30000)&_pragma=synchronous(NORMAL)", abs)
+	// synchronous is per connection; with WAL, NORMAL syncs only at
+	// checkpoints instead of on every commit.
+	dsn := fmt.Sprintf("file:%s?_pragma=synchronous(NORMAL)&%s", abs, connPragmas)
 	db, err := sql.Open("sqlite", dsn)
 	if err != nil {
 		return nil, abs, err
 	}
-	db.SetMaxOpenConns(10)
-	if _, err := db.Exec(Schema); err != nil {
+	if err := initFile(db); err != nil {
+		db.Close()
+		return nil, abs, fmt.Errorf("init database file: %w", err)
+	}
+	// database/sql keeps only 2 idle connections by default, so under
+	// concurrent scrapes/checks/API reads the other 8 were closed after each
+	// use and reopened (re-running the DSN pragmas) on the next one. Keep
+	// the whole pool warm instead.
+	db.SetMaxOpenConns(writePoolSize)
+	db.SetMaxIdleConns(writePoolSize)
+	if err := applySchema(db); err != nil {
+		db.Close()
 		return nil, abs, fmt.Errorf("apply schema: %w", err)
 	}
+	if err := warmPool(db, writePoolSize); err != nil {
+		db.Close()
+		return nil, abs, err
+	}
 	return db, abs, nil
 }
 
+// initFile sets the file-level pragmas once per Open, on one connection,
+// rather than on every pooled connection as DSN pragmas would be.
+// page_size only takes effect on a new, empty file (it has to precede
+// journal_mode, which fixes the size once the WAL exists); on existing
+// databases it is a no-op. 8 KiB pages keep the history indexes a level
+// shallower than the 4 KiB default.
+func initFile(db *sql.DB) error {
+	c, err := db.Conn(context.Background())
+	if err != nil {
+		return err
+	}
+	defer c.Close()
+	if _, err := c.ExecContext(context.Background(), `PRAGMA page_size = 8192`); err != nil {
+		return err
+	}
+	var mode string
+	return c.QueryRowContext(context.Background(), `PRAGMA journal_mode = WAL`).Scan(&mode)
+}
+
+// Pool sizes of the main and the read-only pool.
+const (
+	writePoolSize = 10
+	readPoolSize  = 4
+)
+
+// warmPool opens n connections up front and leaves them idle in the pool,
+// so the first burst of concurrent scrapes and API reads does not open the
+// file and run the DSN pragmas on the request path. Pooled connections are
+// not health-checked on reuse; a broken one is dropped by database/sql.
+func warmPool(db *sql.DB, n int) error {
+	conns := make([]*sql.Conn, 0, n)
+	defer func() {
+		for _, c := range conns {
+			c.Close()
+		}
+	}()
+	for i := 0; i < n; i++ {
+		c, err := db.Conn(context.Background())
+		if err != nil {
+			return err
+		}
+		conns = append(conns, c)
+	}
+	return nil
+}
+
+// applySchema runs Schema in one transaction. Executed bare, each of its
+// CREATE statements is its own autocommit transaction with its own WAL
+// commit; together they cost one.
+func applySchema(db *sql.DB) error {
+	tx, err := db.Begin()
+	if err != nil {
+		return err
+	}
+	defer tx.Rollback()
+	if _, err := tx.Exec(Schema); err != nil {
+		return err
+	}
+	return tx.Commit()
+}
+
+// OpenReader opens a second, read-only pool on an existing database (call
+// Open first so the schema and WAL mode are in place). Dashboard and
+// scheduler lookups of the servers table and the history window scans use
+// it, so they never wait behind writers for a connection from the main
+// pool, and its connections keep the page cache of the hot read paths;
+// query_only makes any stray write through it fail loudly.
+func OpenReader(path string) (*sql.DB, error) {
+	dsn := fmt.Sprintf("file:%s?_pragma=query_only(1)&%s", path, connPragmas)
+	db, err := sql.Open("sqlite", dsn)
+	if err != nil {
+		return nil, err
+	}
+	db.SetMaxOpenConns(readPoolSize)
+	db.SetMaxIdleConns(readPoolSize)
+	if err := warmPool(db, readPoolSize); err != nil {
+		db.Close()
+		return nil, err
+	}
+	return db, nil
+}
+
+// sqlSince is the SQL lower bound for a timestamp column: now shifted by the
+// modifier bound to ?, in the layout Now writes. datetime() uses a space
+// separator, which sorts below 'T' and let rows from earlier in the cutoff
+// day through every range filter.
+const sqlSince = "strftime('%Y-%m-%dT%H:%M:%S', 'now', ?)"
+
+type cachedStamp struct {
+	sec int64
+	s   string
+}
+
+var lastStamp atomic.Pointer[cachedStamp]
+
+// Now returns the current UTC time in the second-resolution format stored in
+// the TEXT timestamp columns.
 func Now() string {
-	return time.Now().UTC().Format("2006-01-02T15:04:05")
+	return Stamp(time.Now())
+}
+
+// Stamp formats t like Now. Scrapes, checks and audit writes stamp many rows
+// per second, so the formatted string is reused within a second.
+func Stamp(t time.Time) string {
+	sec := t.Unix()
+	if c := lastStamp.Load(); c != nil && c.sec == sec {
+		return c.s
+	}
+	c := &cachedStamp{sec: sec, s: t.UTC().Format("2006-01-02T15:04:05")}
+	lastStamp.Store(c)
+	return c.s
 }
 
 // Store holds a *sql.DB plus the resolved DB path (for backup/restore).
@@ -181,6 +321,67 @@ type StoreCore struct {
 	DB     *sql.DB
 	DBPath string
 	mu     sync.Mutex
+	readDB *sql.DB // optional read-only pool, see OpenReader
+
+	stmtMu sync.Mutex
+	stmtDB *sql.DB // DB the cached statements were prepared on
+	stmts  map[stmtKey]*sql.Stmt
+}
+
+type stmtKey struct {
+	db    *sql.DB
+	query string
+}
+
+// stmt returns a prepared statement for a hot-path query, preparing it once
+// per *sql.DB. The cache is dropped when RestoreFrom swaps the DB.
+func (c *StoreCore) stmt(query string) (*sql.Stmt, error) {
+	return c.prepared(c.DB, query)
+}
+
+// readStmt is stmt for a query run on the reader pool.
+func (c *StoreCore) readStmt(query string) (*sql.Stmt, error) {
+	return c.prepared(c.reader(), query)
+}
+
+func (c *StoreCore) prepared(db *sql.DB, query string) (*sql.Stmt, error) {
+	c.stmtMu.Lock()
+	defer c.stmtMu.Unlock()
+	if c.stmtDB != c.DB {
+		c.stmts = map[stmtKey]*sql.Stmt{}
+		c.stmtDB = c.DB
+	}
+	k := stmtKey{db, query}
+	if s, ok := c.stmts[k]; ok {
+		return s, nil
+	}
+	s, err := db.Prepare(query)
+	if err != nil {
+		return nil, err
+	}
+	c.stmts[k] = s
+	return s, nil
+}
+
+// reader returns the read-only pool when one is configured, else DB.
+func (c *StoreCore) reader() *sql.DB {
+	if c.readDB != nil {
+		return c.readDB
+	}
+	return c.DB
+}
+
+// Close closes the read-only pool, then the main one. The last connection
+// to close checkpoints the WAL into the database file, so the next start
+// does not have to replay it.
+func (c *StoreCore) Close() error {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	if c.readDB != nil {
+		c.readDB.Close()
+		c.readDB = nil
+	}
+	return c.DB.Close()
 }
 
 func NewStoreCore(db *sql.DB, path string) *StoreCore {
@@ -1,8 +1,11 @@
 package storage
 
 import (
+	"context"
 	"path/filepath"
+	"strings"
 	"testing"
+	"time"
 )
 
 func newTestStore(t *testing.T) *Store {
@@ -46,6 +49,26 @@ func TestServerCRUD(t *testing.T) {
 	}
 }
 
+func TestCreateServersInOneTransaction(t *testing.T) {
+	st := newTestStore(t)
+	ids, err := st.CreateServers([]*Server{
+		{Name: "a", Host: "10.0.0.1", AgentPort: 9100, OSType: "linux", Enabled: 1, Volumes: "[]", Labels: "{}"},
+		{Name: "b", Host: "10.0.0.2", AgentPort: 9100, OSType: "linux", Enabled: 1, Volumes: "[]", Labels: "{}"},
+	})
+	if err != nil {
+		t.Fatalf("create: %v", err)
+	}
+	if len(ids) != 2 || ids[1] <= ids[0] {
+		t.Fatalf("ids = %v", ids)
+	}
+	if s, _ := st.GetServer(ids[1]); s == nil || s.Name != "b" {
+		t.Fatalf("second server = %+v", s)
+	}
+	if ids, err := st.CreateServers(nil); err != nil || len(ids) != 0 {
+		t.Fatalf("empty create = %v, %v", ids, err)
+	}
+}
+
 func TestMetricPointAndHistory(t *testing.T) {
 	st := newTestStore(t)
 	s := &Server{Name: "db", Host: "h", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"}
@@ -64,6 +87,9 @@ func TestMetricPointAndHistory(t *testing.T) {
 	if hist[0].CPUPercent == nil || *hist[0].CPUPercent != 55 {
 		t.Errorf("cpu = %v, want 55", hist[0].CPUPercent)
 	}
+	if hist[0].MemoryPercent != nil {
+		t.Errorf("mem = %v, want nil for NULL column", *hist[0].MemoryPercent)
+	}
 }
 
 func TestBackupRestore(t *testing.T) {
@@ -98,13 +124,293 @@ func TestUptimeTimeline(t *testing.T) {
 	cpu := 1.0
 	_ = st.InsertMetricPoint(id, &cpu, nil, nil, nil, nil, "{}") // up
 	_ = st.InsertMetricPoint(id, nil, nil, nil, nil, nil, "{}")  // down
-	up, down, _, err := st.UptimeTimeline(id, 1)
+	up, down, tl, err := st.UptimeTimeline(id, 1)
 	if err != nil {
 		t.Fatalf("timeline: %v", err)
 	}
 	if up != 1 || down != 1 {
 		t.Errorf("up/down = %d/%d, want 1/1", up, down)
 	}
+	if len(tl.Timestamps) != 2 || len(tl.Up) != 2 || tl.Up[0] == tl.Up[1] {
+		t.Errorf("timeline = %+v, want one up and one down row", tl)
+	}
+}
+
+func TestWriteScrapesBatch(t *testing.T) {
+	st := newTestStore(t)
+	a, _ := st.CreateServer(&Server{Name: "a", Host: "h1", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	b, _ := st.CreateServer(&Server{Name: "b", Host: "h2", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	err := st.WriteScrapes([]ScrapeWrite{
+		{ServerID: a, Up: true, Timestamp: Now(), CPU: 12.5, Memory: 40, Disk: 70, DiskInfo: "[]", Volumes: "[]", ExporterVersion: "1.8.2"},
+		{ServerID: b, Timestamp: Now()},
+	})
+	if err != nil {
+		t.Fatalf("write: %v", err)
+	}
+	ga, _ := st.GetServer(a)
+	if ga.LastStatus != "up" || ga.CPUPercent != 12.5 || ga.ExporterVersion != "1.8.2" {
+		t.Errorf("server a = %+v", ga)
+	}
+	gb, _ := st.GetServer(b)
+	if gb.LastStatus != "down" {
+		t.Errorf("server b status = %q, want down", gb.LastStatus)
+	}
+	up, down, _, err := st.UptimeTimeline(b, 1)
+	if err != nil || up != 0 || down != 1 {
+		t.Errorf("server b up/down = %d/%d (%v), want 0/1", up, down, err)
+	}
+	if err := st.WriteScrapes([]ScrapeWrite{{ServerID: a, Timestamp: Now()}}); err != nil {
+		t.Fatalf("write down: %v", err)
+	}
+	if ga, _ = st.GetServer(a); ga.LastStatus != "down" || ga.CPUPercent != 12.5 || ga.ExporterVersion != "1.8.2" {
+		t.Errorf("server a after down = %+v, want last values kept", ga)
+	}
+}
+
+func TestNowMatchesFormat(t *testing.T) {
+	before := time.Now().UTC().Truncate(time.Second)
+	got, err := time.Parse("2006-01-02T15:04:05", Now())
+	if err != nil {
+		t.Fatalf("parse: %v", err)
+	}
+	if d := got.Sub(before); d < 0 || d > 2*time.Second {
+		t.Errorf("Now() = %v, want close to %v", got, before)
+	}
+	at := time.Date(2024, 5, 6, 10, 11, 12, 0, time.FixedZone("EET", 3*3600))
+	if got := Stamp(at); got != "2024-05-06T07:11:12" {
+		t.Errorf("Stamp = %q, want UTC 2024-05-06T07:11:12", got)
+	}
+}
+
+func TestNewDatabasePageSize(t *testing.T) {
+	st := newTestStore(t)
+	var size int
+	if err := st.DB.QueryRow(`PRAGMA page_size`).Scan(&size); err != nil || size != 8192 {
+		t.Errorf("page_size = %d, %v; want 8192", size, err)
+	}
+}
+
+func TestConnectionsUseWALAndNormalSync(t *testing.T) {
+	st := newTestStore(t)
+	ctx := context.Background()
+	for i := 0; i < 3; i++ {
+		c, err := st.DB.Conn(ctx)
+		if err != nil {
+			t.Fatal(err)
+		}
+		defer c.Close()
+		var mode string
+		var sync int
+		if err := c.QueryRowContext(ctx, `PRAGMA journal_mode`).Scan(&mode); err != nil || mode != "wal" {
+			t.Errorf("conn %d journal_mode = %q, %v; want wal", i, mode, err)
+		}
+		if err := c.QueryRowContext(ctx, `PRAGMA synchronous`).Scan(&sync); err != nil || sync != 1 {
+			t.Errorf("conn %d synchronous = %d, %v; want 1 (NORMAL)", i, sync, err)
+		}
+	}
+}
+
+func TestPoolsOpenWarm(t *testing.T) {
+	st := newTestStore(t)
+	if idle := st.DB.Stats().Idle; idle != writePoolSize {
+		t.Errorf("main pool idle = %d, want %d", idle, writePoolSize)
+	}
+	rdb, err := OpenReader(st.DBPath)
+	if err != nil {
+		t.Fatalf("open reader: %v", err)
+	}
+	defer rdb.Close()
+	if idle := rdb.Stats().Idle; idle != readPoolSize {
+		t.Errorf("read pool idle = %d, want %d", idle, readPoolSize)
+	}
+}
+
+func TestCloseClosesBothPools(t *testing.T) {
+	st := newTestStore(t)
+	rdb, err := OpenReader(st.DBPath)
+	if err != nil {
+		t.Fatalf("open reader: %v", err)
+	}
+	st.SetReader(rdb)
+	if err := st.Close(); err != nil {
+		t.Fatalf("close: %v", err)
+	}
+	if rdb.Ping() == nil {
+		t.Error("read pool still open after Close")
+	}
+	if st.DB.Ping() == nil {
+		t.Error("main pool still open after Close")
+	}
+}
+
+func TestReaderPool(t *testing.T) {
+	st := newTestStore(t)
+	rdb, err := OpenReader(st.DBPath)
+	if err != nil {
+		t.Fatalf("open reader: %v", err)
+	}
+	t.Cleanup(func() { _ = rdb.Close() })
+	st.SetReader(rdb)
+	id, _ := st.CreateServer(&Server{Name: "r", Host: "h", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	if g, err := st.GetServer(id); err != nil || g == nil {
+		t.Fatalf("reader does not see committed server: %v", err)
+	}
+	if err := st.InsertMetricPoint(id, ptr(10.0), nil, nil, nil, nil, "{}"); err != nil {
+		t.Fatal(err)
+	}
+	if h, err := st.ServerHistory(id, "1h"); err != nil || len(h) != 1 {
+		t.Fatalf("history through reader = %d rows, %v", len(h), err)
+	}
+	if _, err := rdb.Exec(`DELETE FROM servers`); err == nil {
+		t.Errorf("write through reader pool succeeded")
+	}
+}
+
+func TestListsReadInIndexOrder(t *testing.T) {
+	st := newTestStore(t)
+	for _, q := range []string{
+		`SELECT ` + serverCols + ` FROM servers ORDER BY name`,
+		`SELECT ` + serviceCols + ` FROM services ORDER BY name`,
+	} {
+		rows, err := st.DB.Query(`EXPLAIN QUERY PLAN ` + q)
+		if err != nil {
+			t.Fatal(err)
+		}
+		var plan []string
+		for rows.Next() {
+			var id, parent, notused int
+			var detail string
+			_ = rows.Scan(&id, &parent, &notused, &detail)
+			plan = append(plan, detail)
+		}
+		rows.Close()
+		if p := strings.Join(plan, "; "); strings.Contains(p, "TEMP B-TREE") {
+			t.Errorf("%s sorts: %s", q, p)
+		}
+	}
+}
+
+func TestServerTotals(t *testing.T) {
+	st := newTestStore(t)
+	for i, status := range []string{"up", "down", "up"} {
+		id, _ := st.CreateServer(&Server{Name: "s", Host: "h", AgentPort: 9100 + i, Enabled: 1, Volumes: "[]", Labels: "{}"})
+		if err := st.UpdateServer(id, map[string]any{"last_status": status, "cpu_percent": float64(10 * (i + 1))}); err != nil {
+			t.Fatal(err)
+		}
+	}
+	total, online, err := st.ServerCounts()
+	if err != nil || total != 3 || online != 2 {
+		t.Fatalf("counts = %d, %d, %v", total, online, err)
+	}
+	tot, err := st.ServerTotals()
+	if err != nil || tot.Total != 3 || tot.Online != 2 || tot.CPUSum != 60 || tot.MemorySum != 0 {
+		t.Fatalf("totals = %+v, %v", tot, err)
+	}
+}
+
+func TestTouchAPIKeyThrottled(t *testing.T) {
+	st := newTestStore(t)
+	id, err := st.CreateAPIKey(1, "hash", "sha", "agent")
+	if err != nil {
+		t.Fatal(err)
+	}
+	st.TouchAPIKey(id)
+	if k, _ := st.GetAPIKeyBySHA("sha"); k == nil || k.LastUsed == "" {
+		t.Fatalf("first use not recorded: %+v", k)
+	}
+	_, _ = st.DB.Exec(`UPDATE api_keys SET last_used = 'marker' WHERE id = ?`, id)
+	st.TouchAPIKey(id)
+	if k, _ := st.GetAPIKeyBySHA("sha"); k == nil || k.LastUsed != "marker" {
+		t.Errorf("second use within a minute rewrote last_used: %+v", k)
+	}
+}
+
+func TestEnabledServersScrapeFields(t *testing.T) {
+	st := newTestStore(t)
+	on, _ := st.CreateServer(&Server{Name: "on", Host: "10.0.0.1", AgentPort: 9182, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	_, _ = st.CreateServer(&Server{Name: "off", Host: "10.0.0.2", AgentPort: 9100, Enabled: 0, Volumes: "[]", Labels: "{}"})
+	_ = st.UpdateServer(on, map[string]any{"last_status": "up", "cpu_percent": 12.5, "is_maintenance": 1})
+	got, err := st.EnabledServers()
+	if err != nil || len(got) != 1 {
+		t.Fatalf("enabled = %+v, %v", got, err)
+	}
+	s := got[0]
+	if s.ID != on || s.Name != "on" || s.Host != "10.0.0.1" || s.AgentPort != 9182 ||
+		s.LastStatus != "up" || s.CPUPercent != 12.5 || s.IsMaintenance != 1 {
+		t.Errorf("enabled server = %+v", s)
+	}
+}
+
+func TestWriteChecksBatch(t *testing.T) {
+	st := newTestStore(t)
+	id, err := st.CreateService(&Service{Name: "web", TargetURL: "https://example.com", CheckType: "http",
+		Interval: 60, Timeout: 10, ExpectedStatus: 200, Enabled: 1})
+	if err != nil {
+		t.Fatalf("create: %v", err)
+	}
+	if err := st.WriteChecks([]CheckWrite{{ServiceID: id, Status: "up", LatencyMS: 42, Timestamp: Now()}}); err != nil {
+		t.Fatalf("write: %v", err)
+	}
+	svc, _ := st.GetService(id)
+	if svc == nil || svc.Status != "up" || svc.ResponseTimeMS != 42 {
+		t.Errorf("service = %+v", svc)
+	}
+	hist, err := st.ServiceHistory("1h")
+	if err != nil || len(hist) != 1 || hist[0].Status != "up" {
+		t.Errorf("history = %+v (%v)", hist, err)
+	}
+}
+
+func TestServerEndpoints(t *testing.T) {
+	st := newTestStore(t)
+	id, _ := st.CreateServer(&Server{Name: "a", Host: "10.0.0.1", AgentPort: 9182, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	eps, err := st.ServerEndpoints()
+	if err != nil {
+		t.Fatalf("endpoints: %v", err)
+	}
+	if got := eps[Endpoint{Host: "10.0.0.1", Port: 9182}]; got != id {
+		t.Errorf("endpoint id = %d, want %d", got, id)
+	}
 }
 
 func ptr(f float64) *float64 { return &f }
+
+func TestCleanupInBatches(t *testing.T) {
+	st := newTestStore(t)
+	defer func(n int) { cleanupBatch = n }(cleanupBatch)
+	cleanupBatch = 2
+	for i := 0; i < 5; i++ {
+		if _, err := st.DB.Exec(`INSERT INTO metrics_history (server_id, timestamp) VALUES (1, '2000-01-01T00:00:00')`); err != nil {
+			t.Fatalf("insert: %v", err)
+		}
+	}
+	_ = st.InsertMetricPoint(1, ptr(1.0), nil, nil, nil, nil, "{}")
+	if err := st.Cleanup(24); err != nil {
+		t.Fatalf("cleanup: %v", err)
+	}
+	var n int
+	_ = st.DB.QueryRow(`SELECT COUNT(*) FROM metrics_history`).Scan(&n)
+	if n != 1 {
+		t.Errorf("rows left = %d, want only the fresh one", n)
+	}
+}
+
+func TestHistoryRangeCutoff(t *testing.T) {
+	st := newTestStore(t)
+	id, _ := st.CreateServer(&Server{Name: "s", Host: "h", AgentPort: 9100, Enabled: 1, Volumes: "[]", Labels: "{}"})
+	old := time.Now().UTC().Add(-3 * time.Hour).Format("2006-01-02T15:04:05")
+	if _, err := st.DB.Exec(`INSERT INTO metrics_history (server_id, cpu_percent, timestamp) VALUES (?, 1, ?)`, id, old); err != nil {
+		t.Fatalf("insert: %v", err)
+	}
+	_ = st.InsertMetricPoint(id, ptr(2.0), nil, nil, nil, nil, "{}")
+	hist, err := st.ServerHistory(id, "1h")
+	if err != nil {
+		t.Fatalf("history: %v", err)
+	}
+	if len(hist) != 1 || *hist[0].CPUPercent != 2 {
+		t.Errorf("1h history = %+v, want only the fresh point", hist)
+	}
+	if hist, _ := st.ServerHistory(id, "24h"); len(hist) != 2 {
+		t.Errorf("24h history has %d points, want 2", len(hist))
+	}
+}